@@ -0,0 +1,197 @@
+"""
+Núcleo de análise do dashboard de parceiros, sem dependência do Streamlit.
+
+Carga dos CSVs, merges, KPIs, cubo temporal e figuras podem ser usados por jobs
+em lote, workers ou testes; app_w7m.py é só a camada de apresentação.
+"""
+
+from .config import (
+    DIRETORIO_DADOS,
+    DIRETORIO_SNAPSHOTS,
+    VERSAO_SNAPSHOT,
+    TODOS_OS_PARCEIROS,
+    DIRETORIO_ARTEFATOS,
+    VERSOES_ARTEFATOS_MANTIDAS,
+    TTL_DADOS_SEGUNDOS,
+    CACHE_FIGURAS_MAX_ITENS,
+    CACHE_FIGURAS_MAX_MB,
+    MAX_PONTOS_SERIE,
+    MAX_BARRAS,
+    TAMANHO_BLOCO_EXPORTACAO,
+    CONTAGEM_APROXIMADA,
+    LIMITE_LINHAS_CONTAGEM_EXATA,
+    ERRO_RELATIVO_HLL,
+    TRABALHADORES_INGESTAO,
+    POOL_INGESTAO,
+    INGESTAO_INCREMENTAL,
+    PARQUET_DISPONIVEL,
+    MOTOR_DADOS,
+    DUCKDB_DISPONIVEL,
+    POLARS_DISPONIVEL,
+    definir_diretorio_dados,
+)
+from .esquemas import extrair_chaves_metadata, ESQUEMAS, TABELAS_CARREGAR_DADOS, ler_csv_com_esquema
+from .carga import (
+    MOTORES_DISPONIVEIS,
+    resolver_motor,
+    calcular_fingerprint_arquivo,
+    carregar_tabela,
+    carregar_tabelas,
+    carregar_dados,
+)
+from .merges import (
+    FATOR_MAXIMO_CRESCIMENTO_JOIN,
+    SEM_LIMITE_CRESCIMENTO,
+    ErroCardinalidadeJoin,
+    juntar_com_controle,
+    verificar_crescimento_join,
+    nomes_merge,
+    restaurar_tipos,
+    vincular_transacoes_store_product,
+    Aviso,
+    registrar_aviso,
+    ORDEM_DIAS_SEMANA,
+    TIPO_DIA_SEMANA,
+    adicionar_colunas_calendario,
+    resolver_partner_id,
+    fazer_merge_campanhas_corrigido,
+    fazer_merge_rewards_corrigido,
+    fazer_merge_boosts_corrigido,
+)
+from .tipos import (
+    COLUNAS_CHAVE,
+    CodificadorChaves,
+    LIMITE_CARDINALIDADE_CATEGORIA,
+    memoria_dataframe,
+    otimizar_tipos,
+    contar_valores,
+    concatenar_alinhando_tipos,
+)
+from .ingestao import TAMANHO_BLOCO_CONFERENCIA, estado_leitura, ler_linhas_anexadas
+from .distintos import (
+    precisao_para_erro,
+    EsbocoHLL,
+    usar_contagem_aproximada,
+    esbocos_por_grupo,
+    contar_distintos,
+    contar_distintos_por_grupo,
+)
+from .kpis import COLUNAS_KPI, materializar_kpis, obter_kpis, calcular_kpis_dashboard_geral
+from .cubo import (
+    FONTES_CUBO,
+    COLUNAS_CUBO,
+    materializar_cubo_temporal,
+    materializar_usuarios_semanais,
+    fatiar_cubo,
+    fatiar_usuarios_semanais,
+)
+from .motor_duckdb import fazer_merge_campanhas_duckdb, fazer_merge_rewards_duckdb, fazer_merge_boosts_duckdb
+from .motor_polars import (
+    varrer_csv,
+    varrer_tabela,
+    ler_csv_polars,
+    fazer_merge_campanhas_polars,
+    fazer_merge_rewards_polars,
+    fazer_merge_boosts_polars,
+)
+from .registro import (
+    RegistroTabelas,
+    particionar_por_parceiro,
+    resumir_memoria,
+    MERGES_POR_MOTOR,
+    criar_registro_padrao,
+)
+from .graficos import (
+    CacheFiguras,
+    indices_lttb,
+    reduzir_serie,
+    agrupar_cauda,
+    criar_grafico_novos_usuarios_por_semana,
+    criar_grafico_total_assinaturas_por_boost,
+    criar_grafico_campanhas_pontos_tempo,
+    criar_grafico_top5_campanhas_engajamento,
+    criar_tabela_top_usuario,
+    criar_grafico_distribuicao_faixa_etaria,
+    criar_grafico_top10_usuarios_product_points,
+    criar_grafico_pontos_resgatados_item,
+    criar_grafico_unidades_resgatadas_item,
+    criar_grafico_participacoes_tempo,
+    criar_grafico_engajamento_dia_semana,
+    criar_grafico_engajamento_por_hora,
+)
+from .exportacao import (
+    TAMANHOS_PAGINA,
+    filtrar_texto,
+    paginar_dados,
+    TABELAS_EXPORTACAO,
+    FORMATOS_EXPORTACAO,
+    montar_resumo_resgates,
+    mascara_periodo,
+    blocos_exportacao,
+    escrever_exportacao,
+    exportar_para_arquivo,
+)
+from .painel import (
+    TABELAS_PARCEIRO,
+    GRUPOS_METRICAS,
+    FIGURAS_PAINEL,
+    ENTRADAS_AGREGADAS,
+    TABELAS_PAINEL,
+    calcular_metricas_tabela,
+    PainelParceiro,
+)
+from .precalculo import (
+    VERSAO_FORMATO_ARTEFATOS,
+    ARQUIVO_VERSAO_ATUAL,
+    gravar_painel,
+    precalcular,
+    versao_atual,
+    ler_manifesto,
+    PainelPrecalculado,
+)
+from .paridade import verificar_paridade_motores
+
+__all__ = [
+    'DIRETORIO_DADOS', 'DIRETORIO_SNAPSHOTS', 'VERSAO_SNAPSHOT', 'TODOS_OS_PARCEIROS', 'DIRETORIO_ARTEFATOS',
+    'VERSOES_ARTEFATOS_MANTIDAS', 'TTL_DADOS_SEGUNDOS', 'CACHE_FIGURAS_MAX_ITENS', 'CACHE_FIGURAS_MAX_MB',
+    'MAX_PONTOS_SERIE', 'MAX_BARRAS', 'TAMANHO_BLOCO_EXPORTACAO', 'CONTAGEM_APROXIMADA',
+    'LIMITE_LINHAS_CONTAGEM_EXATA', 'ERRO_RELATIVO_HLL', 'TRABALHADORES_INGESTAO', 'POOL_INGESTAO',
+    'INGESTAO_INCREMENTAL',
+    'PARQUET_DISPONIVEL', 'MOTOR_DADOS', 'DUCKDB_DISPONIVEL', 'POLARS_DISPONIVEL', 'definir_diretorio_dados',
+    'extrair_chaves_metadata', 'ESQUEMAS', 'TABELAS_CARREGAR_DADOS', 'ler_csv_com_esquema',
+    'MOTORES_DISPONIVEIS', 'resolver_motor', 'calcular_fingerprint_arquivo', 'carregar_tabela',
+    'carregar_tabelas', 'carregar_dados',
+    'FATOR_MAXIMO_CRESCIMENTO_JOIN', 'SEM_LIMITE_CRESCIMENTO', 'ErroCardinalidadeJoin', 'juntar_com_controle',
+    'verificar_crescimento_join', 'nomes_merge', 'restaurar_tipos', 'vincular_transacoes_store_product',
+    'Aviso', 'registrar_aviso', 'ORDEM_DIAS_SEMANA', 'TIPO_DIA_SEMANA', 'adicionar_colunas_calendario',
+    'resolver_partner_id', 'fazer_merge_campanhas_corrigido', 'fazer_merge_rewards_corrigido',
+    'fazer_merge_boosts_corrigido',
+    'COLUNAS_CHAVE', 'CodificadorChaves', 'LIMITE_CARDINALIDADE_CATEGORIA', 'memoria_dataframe',
+    'otimizar_tipos', 'contar_valores', 'concatenar_alinhando_tipos',
+    'TAMANHO_BLOCO_CONFERENCIA', 'estado_leitura', 'ler_linhas_anexadas',
+    'precisao_para_erro', 'EsbocoHLL', 'usar_contagem_aproximada', 'esbocos_por_grupo', 'contar_distintos',
+    'contar_distintos_por_grupo',
+    'COLUNAS_KPI', 'materializar_kpis', 'obter_kpis', 'calcular_kpis_dashboard_geral',
+    'FONTES_CUBO', 'COLUNAS_CUBO', 'materializar_cubo_temporal', 'materializar_usuarios_semanais',
+    'fatiar_cubo', 'fatiar_usuarios_semanais',
+    'fazer_merge_campanhas_duckdb', 'fazer_merge_rewards_duckdb', 'fazer_merge_boosts_duckdb',
+    'varrer_csv', 'varrer_tabela', 'ler_csv_polars', 'fazer_merge_campanhas_polars',
+    'fazer_merge_rewards_polars', 'fazer_merge_boosts_polars',
+    'RegistroTabelas', 'particionar_por_parceiro', 'resumir_memoria', 'MERGES_POR_MOTOR',
+    'criar_registro_padrao',
+    'CacheFiguras', 'indices_lttb', 'reduzir_serie', 'agrupar_cauda',
+    'criar_grafico_novos_usuarios_por_semana', 'criar_grafico_total_assinaturas_por_boost',
+    'criar_grafico_campanhas_pontos_tempo', 'criar_grafico_top5_campanhas_engajamento',
+    'criar_tabela_top_usuario', 'criar_grafico_distribuicao_faixa_etaria',
+    'criar_grafico_top10_usuarios_product_points', 'criar_grafico_pontos_resgatados_item',
+    'criar_grafico_unidades_resgatadas_item', 'criar_grafico_participacoes_tempo',
+    'criar_grafico_engajamento_dia_semana', 'criar_grafico_engajamento_por_hora',
+    'TAMANHOS_PAGINA', 'filtrar_texto', 'paginar_dados', 'TABELAS_EXPORTACAO', 'FORMATOS_EXPORTACAO',
+    'montar_resumo_resgates', 'mascara_periodo', 'blocos_exportacao', 'escrever_exportacao',
+    'exportar_para_arquivo',
+    'TABELAS_PARCEIRO', 'GRUPOS_METRICAS', 'FIGURAS_PAINEL', 'ENTRADAS_AGREGADAS', 'TABELAS_PAINEL',
+    'calcular_metricas_tabela', 'PainelParceiro',
+    'VERSAO_FORMATO_ARTEFATOS', 'ARQUIVO_VERSAO_ATUAL', 'gravar_painel', 'precalcular', 'versao_atual',
+    'ler_manifesto', 'PainelPrecalculado',
+    'verificar_paridade_motores',
+]
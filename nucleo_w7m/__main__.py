@@ -0,0 +1,66 @@
+"""Linha de comando do núcleo: python -m nucleo_w7m <comando>."""
+
+import argparse
+import logging
+import sys
+
+from . import config
+from .precalculo import precalcular
+from .paridade import verificar_paridade_motores
+
+logger = logging.getLogger('nucleo_w7m')
+
+def _comando_precalcular(args):
+    if args.dados:
+        config.definir_diretorio_dados(args.dados)
+    try:
+        versao = precalcular(diretorio_artefatos=args.artefatos, processos=args.processos,
+                             parceiros=args.parceiros, manter=args.manter)
+    except FileNotFoundError as e:
+        logger.error("Arquivo de dados ausente: %s", e)
+        return 1
+    print(versao)
+    return 0
+
+def _comando_paridade(args):
+    if args.dados:
+        config.definir_diretorio_dados(args.dados)
+    try:
+        diferencas = verificar_paridade_motores(args.motor, por_parceiro=not args.sem_parceiros)
+    except FileNotFoundError as e:
+        logger.error("Arquivo de dados ausente: %s", e)
+        return 1
+    for tabela, partner_id, mensagem in diferencas:
+        print(f"{tabela} (partner_id={partner_id}): {mensagem}")
+    print(f"{args.motor}: {'paridade com o pandas' if not diferencas else f'{len(diferencas)} diferenças'}")
+    return 1 if diferencas else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m nucleo_w7m', description=__doc__)
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    precalculo = comandos.add_parser(
+        'precalcular', help="pré-calcula os painéis de todos os parceiros (modo DASHBOARD_SERVIR_PRECALCULADO)")
+    precalculo.add_argument('--dados', help=f"diretório dos CSVs (padrão: {config.DIRETORIO_DADOS})")
+    precalculo.add_argument('--artefatos', help=f"diretório dos artefatos (padrão: {config.DIRETORIO_ARTEFATOS})")
+    precalculo.add_argument('--processos', type=int, help="processos em paralelo (padrão: número de CPUs)")
+    precalculo.add_argument('--parceiros', nargs='+', metavar='NOME', help="só estes parceiros")
+    precalculo.add_argument('--manter', type=int,
+                            help=f"versões mantidas após publicar (padrão: {config.VERSOES_ARTEFATOS_MANTIDAS})")
+    precalculo.set_defaults(executar=_comando_precalcular)
+
+    paridade = comandos.add_parser(
+        'paridade', help="compara as tabelas e os merges de um motor de dados com os do motor pandas")
+    paridade.add_argument('--motor', default='polars', choices=['duckdb', 'polars'],
+                          help="motor verificado (padrão: polars)")
+    paridade.add_argument('--dados', help=f"diretório dos CSVs (padrão: {config.DIRETORIO_DADOS})")
+    paridade.add_argument('--sem-parceiros', action='store_true',
+                          help="não compara os merges filtrados por parceiro")
+    paridade.set_defaults(executar=_comando_paridade)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    return args.executar(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Carga das tabelas com snapshots Parquet."""
+
+import io
+import json
+import os
+import hashlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from . import config
+from .config import (
+    VERSAO_SNAPSHOT,
+    PARQUET_DISPONIVEL,
+    TRABALHADORES_INGESTAO,
+    POOL_INGESTAO,
+    MOTOR_DADOS,
+    DUCKDB_DISPONIVEL,
+    POLARS_DISPONIVEL,
+)
+from .esquemas import (
+    _derivar_faixa_etaria,
+    ESQUEMAS,
+    TABELAS_CARREGAR_DADOS,
+    _assinatura_esquema,
+    ler_csv_com_esquema,
+)
+from .ingestao import linhas_completas
+from .motor_polars import ler_csv_polars
+
+logger = logging.getLogger(__name__)
+
+# ==================== MOTORES ====================
+
+# Motor de dados -> pacote extra instalado (ver MOTOR_DADOS)
+MOTORES_DISPONIVEIS = {
+    'pandas': True,
+    'duckdb': DUCKDB_DISPONIVEL,
+    'polars': POLARS_DISPONIVEL,
+}
+
+def resolver_motor(motor=None):
+    """
+    Motor de dados efetivo: o pedido (padrão MOTOR_DADOS) ou 'pandas' se o pacote dele não estiver instalado.
+    
+    Raises:
+        ValueError: motor desconhecido
+    """
+    motor = motor or MOTOR_DADOS
+    if motor not in MOTORES_DISPONIVEIS:
+        raise ValueError(f"Motor de dados desconhecido: {motor}")
+    if not MOTORES_DISPONIVEIS[motor]:
+        logger.warning("Pacote %s não instalado; usando o motor pandas", motor)
+        return 'pandas'
+    return motor
+
+# ==================== SNAPSHOTS PARQUET ====================
+
+def _hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Calcula o SHA-256 do arquivo lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def calcular_fingerprint_arquivo(caminho, com_hash=True):
+    """
+    Identifica o conteúdo atual de um arquivo de dados.
+    
+    Returns:
+        dict: tamanho, mtime_ns e (opcionalmente) sha256 do arquivo
+    """
+    stat = os.stat(caminho)
+    fingerprint = {'tamanho': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if com_hash:
+        fingerprint['sha256'] = _hash_arquivo(caminho)
+    return fingerprint
+
+def _erros_snapshot():
+    """Falhas esperadas de leitura/gravação de snapshot (pyarrow só é importado quando há snapshots)."""
+    import pyarrow
+    return (OSError, ValueError, pyarrow.ArrowException)
+
+def _caminhos_snapshot(nome_tabela):
+    base = os.path.join(config.DIRETORIO_SNAPSHOTS, nome_tabela)
+    return base + '.parquet', base + '.json'
+
+def _ler_snapshot(nome_tabela, caminho_csv):
+    """
+    Devolve a tabela limpa do snapshot se ele corresponder ao CSV atual, senão None.
+    
+    Tamanho e mtime iguais bastam; se só o mtime mudou (cópia do export noturno),
+    o hash do conteúdo decide.
+    
+    Returns:
+        tuple: (DataFrame, offset gravado com o snapshot ou None), ou None
+    """
+    caminho_parquet, caminho_meta = _caminhos_snapshot(nome_tabela)
+    if not PARQUET_DISPONIVEL or not os.path.exists(caminho_parquet) or not os.path.exists(caminho_meta):
+        return None
+    
+    try:
+        with open(caminho_meta, encoding='utf-8') as f:
+            meta = json.load(f)
+        
+        if meta.get('versao') != VERSAO_SNAPSHOT or meta.get('esquema') != _assinatura_esquema(ESQUEMAS[nome_tabela]):
+            return None
+        
+        fingerprint = calcular_fingerprint_arquivo(caminho_csv, com_hash=False)
+        if fingerprint['tamanho'] != meta.get('tamanho'):
+            return None
+        
+        if fingerprint['mtime_ns'] != meta.get('mtime_ns'):
+            if _hash_arquivo(caminho_csv) != meta.get('sha256'):
+                return None
+            # Mesmo conteúdo: atualizar o mtime para não recalcular o hash na próxima carga
+            meta['mtime_ns'] = fingerprint['mtime_ns']
+            _gravar_json_atomico(caminho_meta, meta)
+        
+        return pd.read_parquet(caminho_parquet), meta.get('offset')
+    except _erros_snapshot() as e:
+        logger.warning("Snapshot de %s ignorado, relendo o CSV: %s", nome_tabela, e)
+        return None
+
+def _gravar_json_atomico(caminho, conteudo):
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f)
+    os.replace(temporario, caminho)
+
+def _gravar_snapshot(nome_tabela, caminho_csv, df, fingerprint):
+    """Grava a tabela limpa em Parquet. Falhas apenas desativam o snapshot desta tabela."""
+    if not PARQUET_DISPONIVEL:
+        return
+    
+    caminho_parquet, caminho_meta = _caminhos_snapshot(nome_tabela)
+    try:
+        os.makedirs(config.DIRETORIO_SNAPSHOTS, exist_ok=True)
+        temporario = caminho_parquet + '.tmp'
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho_parquet)
+        
+        meta = dict(fingerprint, versao=VERSAO_SNAPSHOT, esquema=_assinatura_esquema(ESQUEMAS[nome_tabela]),
+                    arquivo=os.path.basename(caminho_csv))
+        _gravar_json_atomico(caminho_meta, meta)
+    except _erros_snapshot() as e:
+        logger.warning("Snapshot de %s não gravado: %s", nome_tabela, e)
+        for caminho in (caminho_parquet + '.tmp', caminho_meta):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+def carregar_tabela(nome_tabela, usar_snapshot=True, motor=None, offsets=None):
+    """
+    Carrega uma tabela limpa, usando o snapshot Parquet quando ele estiver atualizado.
+    
+    Args:
+        nome_tabela: chave em ESQUEMAS
+        usar_snapshot: se False, sempre relê e limpa o CSV
+        motor: com 'polars', o CSV é lido e limpo pelo Polars (mesmo resultado); padrão MOTOR_DADOS
+        offsets: dict que recebe, para tabelas de eventos ('marca_dagua'), nome_tabela -> bytes
+            do CSV cobertos pela tabela (onde a leitura incremental continua)
+    
+    Returns:
+        DataFrame: tabela limpa e transformada
+    """
+    esquema = ESQUEMAS[nome_tabela]
+    caminho_csv = os.path.join(config.DIRETORIO_DADOS, esquema['arquivo'])
+    
+    snapshot = _ler_snapshot(nome_tabela, caminho_csv) if usar_snapshot else None
+    if snapshot is not None:
+        df, offset = snapshot
+    else:
+        # Fingerprint tirado antes da leitura: se o arquivo mudar durante a carga, o snapshot fica inválido
+        fingerprint = calcular_fingerprint_arquivo(caminho_csv)
+        ler_csv = ler_csv_polars if resolver_motor(motor) == 'polars' else ler_csv_com_esquema
+        offset = None
+        if 'marca_dagua' in esquema:
+            # Tabela de eventos: bytes lidos uma vez e cortados na última quebra de linha, como em
+            # ler_linhas_anexadas; linhas ainda sendo escritas ficam para a leitura incremental
+            with open(caminho_csv, 'rb') as f:
+                conteudo = f.read()
+            conteudo = linhas_completas(conteudo) or conteudo
+            offset = len(conteudo)
+            df = ler_csv(io.BytesIO(conteudo), esquema)
+        else:
+            df = ler_csv(caminho_csv, esquema)
+        if usar_snapshot:
+            _gravar_snapshot(nome_tabela, caminho_csv, df, dict(fingerprint, offset=offset))
+    
+    if offsets is not None and offset is not None:
+        offsets[nome_tabela] = offset
+    
+    if nome_tabela == 'user':
+        df = _derivar_faixa_etaria(df)
+    
+    return df
+
+def _carregar_tabela_cronometrada(nome_tabela, usar_snapshot, diretorio_dados, motor=None):
+    """carregar_tabela medindo o tempo; recebe o diretório para valer também em processos filhos."""
+    if diretorio_dados != config.DIRETORIO_DADOS:
+        config.definir_diretorio_dados(diretorio_dados)
+    inicio = time.perf_counter()
+    offsets = {}
+    df = carregar_tabela(nome_tabela, usar_snapshot=usar_snapshot, motor=motor, offsets=offsets)
+    return df, time.perf_counter() - inicio, offsets.get(nome_tabela)
+
+def carregar_tabelas(nomes, usar_snapshot=True, trabalhadores=None, pool=None, motor=None, offsets=None):
+    """
+    Carrega várias tabelas em paralelo (leitura e limpeza de cada CSV são independentes).
+    
+    Todas as tabelas são tentadas mesmo que alguma falhe; o erro propagado é o da primeira
+    tabela de nomes que falhou, não o da primeira a terminar, então o resultado não depende
+    da ordem de conclusão.
+    
+    Args:
+        nomes: tabelas de ESQUEMAS, na ordem desejada
+        trabalhadores: tamanho do pool; padrão TRABALHADORES_INGESTAO, 1 = sequencial
+        pool: 'thread' ou 'process'; padrão POOL_INGESTAO
+        motor, offsets: ver carregar_tabela
+    
+    Returns:
+        tuple: (dict nome -> DataFrame, dict nome -> segundos), ambos na ordem de nomes
+    
+    Raises:
+        FileNotFoundError: o CSV da primeira tabela com falha não existe
+    """
+    nomes = list(nomes)
+    trabalhadores = min(trabalhadores or TRABALHADORES_INGESTAO, len(nomes)) or 1
+    pool = pool or POOL_INGESTAO
+    if pool not in ('thread', 'process'):
+        raise ValueError(f"Pool de ingestão desconhecido: {pool}")
+    
+    inicio = time.perf_counter()
+    resultados = {}
+    if trabalhadores == 1:
+        for nome in nomes:
+            try:
+                resultados[nome] = (_carregar_tabela_cronometrada(nome, usar_snapshot, config.DIRETORIO_DADOS, motor),
+                                    None)
+            except Exception as e:
+                resultados[nome] = (None, e)
+    else:
+        classe_pool = ThreadPoolExecutor if pool == 'thread' else ProcessPoolExecutor
+        with classe_pool(max_workers=trabalhadores) as executor:
+            futuros = {nome: executor.submit(_carregar_tabela_cronometrada, nome, usar_snapshot, config.DIRETORIO_DADOS,
+                                             motor)
+                       for nome in nomes}
+            for nome, futuro in futuros.items():
+                erro = futuro.exception()
+                resultados[nome] = (None, erro) if erro is not None else (futuro.result(), None)
+    
+    erros = [(nome, erro) for nome, (_, erro) in resultados.items() if erro is not None]
+    for nome, erro in erros[1:]:
+        logger.error("Falha ao carregar %s: %s", nome, erro)
+    if erros:
+        raise erros[0][1]
+    
+    tabelas = {nome: resultados[nome][0][0] for nome in nomes}
+    tempos = {nome: resultados[nome][0][1] for nome in nomes}
+    if offsets is not None:
+        offsets.update((nome, resultados[nome][0][2]) for nome in nomes if resultados[nome][0][2] is not None)
+    logger.info("%d tabelas carregadas em %.2f s (%s, %d trabalhadores; soma das tabelas %.2f s): %s",
+                len(nomes), time.perf_counter() - inicio, pool, trabalhadores, sum(tempos.values()),
+                ', '.join(f"{nome} {segundos:.2f} s" for nome, segundos in tempos.items()))
+    return tabelas, tempos
+
+def carregar_dados(usar_snapshot=True, trabalhadores=None, pool=None, motor=None):
+    """
+    Carrega e preprocessa todos os arquivos CSV necessários para a análise.
+    Cada tabela é lida conforme ESQUEMAS, sem materializar as colunas descartadas.
+    Tabelas já limpas em execuções anteriores são lidas do snapshot Parquet.
+    As tabelas são lidas em paralelo (ver carregar_tabelas).
+    
+    Returns:
+        tuple: DataFrames limpos e transformados, na ordem de TABELAS_CARREGAR_DADOS
+    
+    Raises:
+        FileNotFoundError: algum CSV não existe em DIRETORIO_DADOS (o primeiro na ordem)
+    """
+    tabelas, _ = carregar_tabelas(TABELAS_CARREGAR_DADOS, usar_snapshot=usar_snapshot,
+                                  trabalhadores=trabalhadores, pool=pool, motor=motor)
+    return tuple(tabelas.values())
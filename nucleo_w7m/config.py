@@ -0,0 +1,67 @@
+"""Configuração dos dados e limites, lidos do ambiente."""
+
+import importlib.util
+import os
+
+# ==================== CONFIGURAÇÃO DE DADOS ====================
+
+# Lidos como config.DIRETORIO_* pelos módulos de carga; troque com definir_diretorio_dados
+DIRETORIO_DADOS = os.environ.get('DASHBOARD_DIRETORIO_DADOS') or 'data_new'
+DIRETORIO_SNAPSHOTS = os.path.join(DIRETORIO_DADOS, '.snapshots')
+
+# Incrementar sempre que o formato dos snapshots mudar; mudanças de esquema já os invalidam
+VERSAO_SNAPSHOT = 3
+
+TODOS_OS_PARCEIROS = 'Todos os Parceiros'
+
+# Artefatos do job de pré-cálculo (python -m nucleo_w7m precalcular): uma pasta por versão
+# e o arquivo ATUAL apontando para a publicada; as versões mais antigas além destas são apagadas
+DIRETORIO_ARTEFATOS = os.environ.get('DASHBOARD_DIRETORIO_ARTEFATOS') or 'artefatos'
+VERSOES_ARTEFATOS_MANTIDAS = int(os.environ.get('DASHBOARD_VERSOES_ARTEFATOS') or 3)
+
+# Idade máxima (segundos) de uma tabela carregada mesmo sem mudança no CSV; vazio = sem TTL
+TTL_DADOS_SEGUNDOS = float(os.environ.get('DASHBOARD_TTL_DADOS') or 0) or None
+
+# Limites do cache de figuras compartilhado entre sessões (número de figuras e MB de JSON)
+CACHE_FIGURAS_MAX_ITENS = int(os.environ.get('DASHBOARD_CACHE_FIGURAS_ITENS') or 256)
+CACHE_FIGURAS_MAX_MB = float(os.environ.get('DASHBOARD_CACHE_FIGURAS_MB') or 64)
+
+# Teto de pontos por série temporal (LTTB acima disso) e de barras por gráfico categórico (resto vira 'Outros')
+MAX_PONTOS_SERIE = int(os.environ.get('DASHBOARD_MAX_PONTOS_SERIE') or 500)
+MAX_BARRAS = int(os.environ.get('DASHBOARD_MAX_BARRAS') or 20)
+
+# Linhas por bloco na exportação CSV/Parquet (cada bloco é decodificado e escrito separadamente)
+TAMANHO_BLOCO_EXPORTACAO = int(os.environ.get('DASHBOARD_BLOCO_EXPORTACAO') or 50_000)
+
+# Contagens de distintos (usuários únicos) acima deste número de linhas usam HyperLogLog;
+# DASHBOARD_CONTAGEM_APROXIMADA='0' desativa o HyperLogLog (contagens sempre exatas)
+CONTAGEM_APROXIMADA = os.environ.get('DASHBOARD_CONTAGEM_APROXIMADA', '1') != '0'
+LIMITE_LINHAS_CONTAGEM_EXATA = (int(os.environ.get('DASHBOARD_LIMITE_CONTAGEM_EXATA') or 5_000_000)
+                                if CONTAGEM_APROXIMADA else None)
+# Erro padrão relativo desejado para as contagens aproximadas
+ERRO_RELATIVO_HLL = float(os.environ.get('DASHBOARD_ERRO_HLL') or 0.01)
+
+# Tabelas lidas em paralelo na carga a frio: número de trabalhadores ('1' = sequencial) e tipo
+# do pool ('thread' ou 'process'; processos evitam o GIL na limpeza, ao custo de serializar os DataFrames)
+TRABALHADORES_INGESTAO = int(os.environ.get('DASHBOARD_TRABALHADORES_INGESTAO') or min(8, os.cpu_count() or 1))
+POOL_INGESTAO = os.environ.get('DASHBOARD_POOL_INGESTAO') or 'thread'
+
+# Tabelas de eventos com 'marca_dagua' no esquema recebem só as linhas anexadas ao CSV; '0' desativa
+INGESTAO_INCREMENTAL = os.environ.get('DASHBOARD_INGESTAO_INCREMENTAL', '1') != '0'
+
+# Snapshots e exportação Parquet; verificado sem importar o pyarrow
+PARQUET_DISPONIVEL = importlib.util.find_spec('pyarrow') is not None
+
+# Motor dos merges de rewards, boosts e campanhas: 'pandas', 'duckdb' (cada merge vira uma
+# consulta SQL embutida) ou 'polars' (leitura dos CSVs e merges como LazyFrames); os dois
+# últimos são multi-thread e, sem o pacote instalado, caem no pandas
+MOTOR_DADOS = os.environ.get('DASHBOARD_MOTOR_DADOS') or 'pandas'
+# Verificados sem importar: duckdb e polars só são carregados quando o motor é usado
+DUCKDB_DISPONIVEL = importlib.util.find_spec('duckdb') is not None
+POLARS_DISPONIVEL = importlib.util.find_spec('polars') is not None
+
+def definir_diretorio_dados(diretorio):
+    """Aponta a carga dos CSVs (e os snapshots) para outro diretório, ex.: num job em lote."""
+    global DIRETORIO_DADOS, DIRETORIO_SNAPSHOTS
+    DIRETORIO_DADOS = diretorio
+    DIRETORIO_SNAPSHOTS = os.path.join(diretorio, '.snapshots')
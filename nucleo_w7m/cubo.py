@@ -0,0 +1,104 @@
+"""Cubo temporal e usuários distintos por semana."""
+
+import numpy as np
+import pandas as pd
+
+from .config import TODOS_OS_PARCEIROS
+from .distintos import usar_contagem_aproximada, esbocos_por_grupo
+
+# ==================== CUBO TEMPORAL ====================
+
+# Derivado -> colunas de calendário (montadas no merge) e de pontos que alimentam o cubo
+FONTES_CUBO = {
+    'campanhas': {'data': 'data_participacao', 'hora': 'hora_participacao', 'semana': 'semana_participacao',
+                  'pontos': 'Product Points'},
+    'boosts': {'data': 'data_inicio', 'hora': 'hora_inicio', 'semana': 'semana_inicio', 'pontos': None},
+}
+
+COLUNAS_CUBO = ['fonte', 'Partner Name', 'dia', 'hora', 'dia_semana', 'semana', 'eventos', 'pontos']
+
+def _cubo_da_fonte(df, fonte):
+    colunas = FONTES_CUBO[fonte]
+    if colunas['data'] not in df.columns or len(df) == 0:
+        return pd.DataFrame(columns=COLUNAS_CUBO)
+    
+    celulas = pd.DataFrame({
+        'Partner Name': df['Partner Name'].astype(object) if 'Partner Name' in df.columns else np.nan,
+        'dia': df[colunas['data']],
+        'hora': df[colunas['hora']],
+        'pontos': df[colunas['pontos']] if colunas['pontos'] in df.columns else 0,
+    }, index=df.index).dropna(subset=['dia'])
+    
+    cubo = celulas.groupby(['Partner Name', 'dia', 'hora'], dropna=False) \
+        .agg(eventos=('pontos', 'size'), pontos=('pontos', 'sum')).reset_index()
+    cubo['hora'] = cubo['hora'].astype(np.int8)
+    cubo['dia_semana'] = cubo['dia'].dt.dayofweek.astype(np.int8)
+    cubo['semana'] = cubo['dia'].dt.to_period('W')
+    cubo['fonte'] = fonte
+    return cubo[COLUNAS_CUBO]
+
+def materializar_cubo_temporal(df_campanhas, df_boosts, partner_id=None):
+    """
+    Agrega campanhas e boosts em células (fonte, parceiro, dia, hora), com dia da semana
+    e semana ISO de cada célula. Os gráficos temporais são fatias deste cubo.
+    
+    Args:
+        partner_id: aceito pelo registro; os DataFrames recebidos já vêm restritos ao parceiro
+    
+    Returns:
+        DataFrame: uma linha por célula com eventos (contagem) e pontos (soma)
+    """
+    cubo = pd.concat([_cubo_da_fonte(df_campanhas, 'campanhas'), _cubo_da_fonte(df_boosts, 'boosts')],
+                     ignore_index=True)
+    return cubo.astype({'fonte': 'category', 'eventos': np.int64})
+
+def _usuarios_semanais_da_fonte(df, fonte):
+    coluna_semana = FONTES_CUBO[fonte]['semana']
+    if coluna_semana not in df.columns or 'User ID' not in df.columns or len(df) == 0:
+        return []
+    
+    semanas = df[coluna_semana]
+    parceiros = df['Partner Name'].astype(object).fillna('') if 'Partner Name' in df.columns else \
+        pd.Series('', index=df.index)
+    validos = (semanas.notna() & df['User ID'].notna()).to_numpy()
+    usuarios, semanas, parceiros = df['User ID'][validos], semanas[validos], parceiros[validos]
+    
+    # Linhas sem parceiro ('') entram só no total da semana
+    if not usar_contagem_aproximada(len(usuarios)):
+        por_parceiro = usuarios.groupby([parceiros, semanas]).nunique()
+        total = usuarios.groupby(semanas).nunique()
+        return ([(fonte, parceiro, semana, n, None) for (parceiro, semana), n in por_parceiro.items() if parceiro != '']
+                + [(fonte, TODOS_OS_PARCEIROS, semana, n, None) for semana, n in total.items()])
+    
+    codigos, rotulos = pd.MultiIndex.from_arrays([parceiros, semanas]).factorize()
+    linhas, totais = [], {}
+    for codigo, esboco in esbocos_por_grupo(usuarios, pd.Series(codigos, index=usuarios.index)).items():
+        parceiro, semana = rotulos[codigo]
+        totais[semana] = totais[semana] | esboco if semana in totais else esboco
+        if parceiro != '':
+            linhas.append((fonte, parceiro, semana, esboco.estimar(), esboco))
+    return linhas + [(fonte, TODOS_OS_PARCEIROS, semana, esboco.estimar(), esboco) for semana, esboco in totais.items()]
+
+def materializar_usuarios_semanais(df_campanhas, df_boosts, partner_id=None):
+    """
+    Usuários distintos por (fonte, parceiro, semana ISO), com TODOS_OS_PARCEIROS já unido.
+    Acima do limite de contagem exata as contagens vêm de esboços HLL, guardados na
+    coluna esboco para permitir uniões entre semanas ou parceiros.
+    
+    Returns:
+        DataFrame: colunas fonte, Partner Name, semana, usuarios e esboco
+    """
+    linhas = _usuarios_semanais_da_fonte(df_campanhas, 'campanhas') + _usuarios_semanais_da_fonte(df_boosts, 'boosts')
+    usuarios = pd.DataFrame(linhas, columns=['fonte', 'Partner Name', 'semana', 'usuarios', 'esboco'])
+    return usuarios.astype({'usuarios': np.int64})
+
+def fatiar_cubo(cubo, fonte, partner_name):
+    """Células do cubo de uma fonte para o parceiro (todas as células para TODOS_OS_PARCEIROS)."""
+    fatia = cubo[cubo['fonte'] == fonte]
+    if partner_name != TODOS_OS_PARCEIROS:
+        fatia = fatia[fatia['Partner Name'] == partner_name]
+    return fatia
+
+def fatiar_usuarios_semanais(usuarios, fonte, partner_name):
+    """Contagens semanais de usuários distintos de uma fonte para o parceiro."""
+    return usuarios[(usuarios['fonte'] == fonte) & (usuarios['Partner Name'] == partner_name)]
@@ -0,0 +1,120 @@
+"""Contagem de distintos exata ou por HyperLogLog."""
+
+import numpy as np
+import pandas as pd
+
+from .config import LIMITE_LINHAS_CONTAGEM_EXATA, ERRO_RELATIVO_HLL
+
+# ==================== CONTAGEM APROXIMADA DE DISTINTOS ====================
+
+def precisao_para_erro(erro_relativo):
+    """Menor precisão (log2 do número de registradores) com erro padrão até erro_relativo."""
+    return int(min(18, max(4, np.ceil(np.log2((1.04 / erro_relativo) ** 2)))))
+
+def _bit_length(valores):
+    """Bits significativos de cada uint64; calculado por metades de 32 bits, exatas em float64."""
+    alto = (valores >> np.uint64(32)).astype(np.float64)
+    baixo = (valores & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(alto > 0, np.frexp(alto)[1] + 32, np.frexp(baixo)[1])
+
+def _indices_e_postos(valores, precisao):
+    """Registrador e posto (posição do primeiro bit 1) do hash de 64 bits de cada valor não nulo."""
+    hashes = pd.util.hash_pandas_object(pd.Series(valores), index=False).to_numpy(dtype=np.uint64)
+    bits_resto = 64 - precisao
+    indices = (hashes >> np.uint64(bits_resto)).astype(np.intp)
+    resto = hashes & np.uint64((1 << bits_resto) - 1)
+    postos = (bits_resto - _bit_length(resto) + 1).astype(np.uint8)
+    return indices, postos
+
+def _estimar_hll(registradores):
+    """Estimativa HyperLogLog (com contagem linear para cardinalidades pequenas) por linha da matriz."""
+    m = registradores.shape[-1]
+    alfa = 0.7213 / (1 + 1.079 / m)
+    bruta = alfa * m * m / np.exp2(-registradores.astype(np.float64)).sum(axis=-1)
+    zeros = (registradores == 0).sum(axis=-1)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.rint(np.where((bruta <= 2.5 * m) & (zeros > 0), linear, bruta)).astype(np.int64)
+
+class EsbocoHLL:
+    """
+    Esboço HyperLogLog para contar valores distintos em memória fixa (2^precisao bytes).
+    
+    Esboços de mesma precisão se combinam com | (união), então os usuários de rewards,
+    boosts e campanhas, ou de vários parceiros e semanas, são somados sem voltar às linhas.
+    Erro padrão relativo ≈ 1,04 / sqrt(2^precisao).
+    """
+    
+    def __init__(self, precisao=None, registradores=None):
+        self.precisao = precisao if precisao is not None else precisao_para_erro(ERRO_RELATIVO_HLL)
+        if registradores is None:
+            registradores = np.zeros(1 << self.precisao, dtype=np.uint8)
+        self.registradores = registradores
+    
+    def adicionar(self, valores):
+        """Acrescenta os valores não nulos de uma série ao esboço."""
+        valores = pd.Series(valores).dropna()
+        if len(valores) > 0:
+            indices, postos = _indices_e_postos(valores, self.precisao)
+            np.maximum.at(self.registradores, indices, postos)
+        return self
+    
+    def __or__(self, outro):
+        if outro.precisao != self.precisao:
+            raise ValueError(f"Esboços com precisões diferentes: {self.precisao} e {outro.precisao}")
+        return EsbocoHLL(self.precisao, np.maximum(self.registradores, outro.registradores))
+    
+    def estimar(self):
+        """Número estimado de valores distintos."""
+        return int(_estimar_hll(self.registradores))
+
+def usar_contagem_aproximada(linhas, limite_linhas=None):
+    """Indica se uma contagem de distintos sobre tantas linhas deve usar HyperLogLog."""
+    limite = LIMITE_LINHAS_CONTAGEM_EXATA if limite_linhas is None else limite_linhas
+    return bool(limite) and linhas > limite
+
+def esbocos_por_grupo(valores, grupos, precisao=None):
+    """
+    Monta um EsbocoHLL por grupo numa única passada de hash.
+    
+    Returns:
+        dict: grupo -> EsbocoHLL (linhas com valor ou grupo nulo são ignoradas)
+    """
+    if precisao is None:
+        precisao = precisao_para_erro(ERRO_RELATIVO_HLL)
+    validos = (valores.notna() & grupos.notna()).to_numpy()
+    codigos, rotulos = pd.factorize(grupos[validos])
+    m = 1 << precisao
+    matriz = np.zeros(len(rotulos) * m, dtype=np.uint8)
+    if len(codigos) > 0:
+        indices, postos = _indices_e_postos(valores[validos], precisao)
+        np.maximum.at(matriz, codigos * m + indices, postos)
+    matriz = matriz.reshape(len(rotulos), m)
+    return {rotulo: EsbocoHLL(precisao, matriz[i]) for i, rotulo in enumerate(rotulos)}
+
+def contar_distintos(*series, limite_linhas=None):
+    """
+    Número de valores distintos na união das séries; exato até limite_linhas,
+    estimado por HyperLogLog acima disso.
+    """
+    series = [serie for serie in series if len(serie) > 0]
+    if not series:
+        return 0
+    if not usar_contagem_aproximada(sum(len(serie) for serie in series), limite_linhas):
+        return int(pd.concat(series, ignore_index=True).nunique())
+    esboco = EsbocoHLL()
+    for serie in series:
+        esboco.adicionar(serie)
+    return esboco.estimar()
+
+def contar_distintos_por_grupo(valores, grupos, limite_linhas=None):
+    """
+    nunique de valores por grupo; acima de limite_linhas, estimado com um esboço por grupo.
+    
+    Returns:
+        Series: grupo -> número de valores distintos, ordenada pelo grupo
+    """
+    if not usar_contagem_aproximada(len(valores), limite_linhas):
+        return valores.groupby(grupos, observed=True).nunique()
+    esbocos = esbocos_por_grupo(valores, grupos)
+    contagem = pd.Series({grupo: esboco.estimar() for grupo, esboco in esbocos.items()}, dtype=np.int64)
+    return contagem.sort_index()
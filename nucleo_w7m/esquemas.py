@@ -0,0 +1,272 @@
+"""Esquemas das tabelas e leitura dos CSVs."""
+
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==================== ESQUEMAS DAS TABELAS ====================
+
+def _decodificar_metadata(texto):
+    """
+    Decodifica uma string de Metadata, tentando JSON válido e depois aspas simples.
+    
+    Returns:
+        tuple: (objeto decodificado ou None, se precisou do caminho lento)
+    """
+    try:
+        return json.loads(texto), False
+    except ValueError:
+        pass
+    try:
+        return json.loads(texto.replace("'", '"')), True
+    except ValueError:
+        return None, True
+
+def _valor_numerico(objeto, chave):
+    if not isinstance(objeto, dict) or chave not in objeto:
+        return 0.0
+    try:
+        return float(objeto[chave])
+    except (TypeError, ValueError):
+        return 0.0
+
+def extrair_chaves_metadata(serie, chaves=('points',)):
+    """
+    Extrai chaves numéricas da coluna Metadata em lote.
+    
+    Cada string distinta é decodificada uma única vez. As distintas bem formadas são
+    lidas num só json.loads (como um array JSON); só se esse lote falhar cada string
+    é decodificada separadamente, com o fallback de aspas simples quando necessário.
+    Valores ausentes, vazios ou inválidos viram 0.
+    
+    Returns:
+        tuple: (DataFrame com uma coluna float por chave, dict com estatísticas da extração)
+    """
+    codigos, distintos = pd.factorize(serie)
+    textos = [texto if isinstance(texto, str) else '' for texto in distintos]
+    validos = [i for i, texto in enumerate(textos) if texto.strip()]
+    
+    objetos = [None] * len(textos)
+    lento = np.zeros(len(textos), dtype=bool)
+    
+    # Caminho rápido: todas as strings distintas como um único array JSON
+    try:
+        lote = json.loads('[' + ','.join(textos[i] for i in validos) + ']')
+    except ValueError:
+        lote = None
+    if lote is not None and len(lote) == len(validos):
+        for i, objeto in zip(validos, lote):
+            objetos[i] = objeto
+    else:
+        for i in validos:
+            objetos[i], lento[i] = _decodificar_metadata(textos[i])
+    
+    valores = np.zeros((len(textos) + 1, len(chaves)))
+    for i, objeto in enumerate(objetos):
+        valores[i] = [_valor_numerico(objeto, chave) for chave in chaves]
+    
+    # Código -1 (ausente) aponta para a última linha, toda zerada
+    por_linha = valores[np.where(codigos >= 0, codigos, len(textos))]
+    resultado = pd.DataFrame(por_linha, columns=list(chaves), index=serie.index)
+    
+    presentes = codigos >= 0
+    estatisticas = {
+        'linhas': len(serie),
+        'strings_distintas': len(textos),
+        'linhas_caminho_lento': int(lento[codigos[presentes]].sum()),
+        'linhas_invalidas': int(np.isin(codigos[presentes], [i for i in validos if objetos[i] is None]).sum()),
+    }
+    return resultado, estatisticas
+
+def _adicionar_pontos_produto(df_product):
+    """Extrai pontos da coluna Metadata."""
+    if 'Metadata' in df_product.columns:
+        extraidos, estatisticas = extrair_chaves_metadata(df_product['Metadata'], chaves=('points',))
+        df_product['Product Points'] = extraidos['points']
+        if estatisticas['linhas_caminho_lento'] or estatisticas['linhas_invalidas']:
+            logger.info("Metadata de produtos: %(linhas_caminho_lento)d linhas no caminho lento, "
+                        "%(linhas_invalidas)d inválidas de %(linhas)d", estatisticas)
+    else:
+        df_product['Product Points'] = 0
+    return df_product
+
+# Faixas etárias de Faixa_Etaria: intervalos [início, fim) entre limites consecutivos
+LIMITES_FAIXA_ETARIA = [0, 18, 24, 34, 44, 54, 64, 100]
+ROTULOS_FAIXA_ETARIA = ['<18', '18-24', '25-34', '35-44', '45-54', '55-64', '65+']
+
+def _derivar_faixa_etaria(df_user):
+    """
+    Cria Age e Faixa_Etaria a partir de Birth Date.
+    Fica fora do snapshot porque depende do ano corrente.
+    """
+    if 'Birth Date' in df_user.columns:
+        try:
+            current_year = datetime.now().year
+            df_user['Age'] = current_year - df_user['Birth Date'].dt.year
+            df_user['Faixa_Etaria'] = pd.cut(df_user['Age'], bins=LIMITES_FAIXA_ETARIA, labels=ROTULOS_FAIXA_ETARIA,
+                                             right=False)
+        except Exception:
+            df_user['Faixa_Etaria'] = 'Não informado'
+    
+    return df_user
+
+# Esquema declarativo de cada tabela:
+#   arquivo:  CSV em DIRETORIO_DADOS
+#   colunas:  colunas lidas do CSV (todas as outras nunca são materializadas)
+#   dtypes:   tipos passados ao read_csv
+#   datas:    coluna destino -> coluna origem convertida para datetime
+#             (destino igual à origem converte no lugar, via parse_dates)
+#   renomear: renomeações aplicadas depois da leitura
+#   pos:      transformação extra aplicada antes do snapshot
+ESQUEMAS = {
+    'transacoes': {
+        'arquivo': 'store_transaction.csv',
+        'colunas': ['ID', 'User ID', 'Price', 'Created At', 'Store Product ID'],
+        'dtypes': {'ID': str, 'User ID': str, 'Price': 'float64', 'Store Product ID': str},
+        'datas': {'Transaction Created At': 'Created At'},
+        'renomear': {'ID': 'Transaction ID'},
+    },
+    'user_product': {
+        'arquivo': 'user_product.csv',
+        'colunas': ['ID', 'Product ID', 'User ID', 'Created At'],
+        'dtypes': {'ID': str, 'Product ID': str, 'User ID': str},
+        'datas': {'Created At': 'Created At'},
+        'renomear': {'ID': 'User Product ID', 'Created At': 'User Product Created At'},
+    },
+    'product': {
+        'arquivo': 'product.csv',
+        'colunas': ['Name', 'ID', 'Partner ID', 'Collection ID', 'Type', 'Metadata'],
+        'dtypes': {'Name': str, 'ID': str, 'Partner ID': str, 'Collection ID': str, 'Type': str, 'Metadata': str},
+        'renomear': {'ID': 'Product ID'},
+        'pos': _adicionar_pontos_produto,
+    },
+    'boost_trans': {
+        'arquivo': 'boost_transaction.csv',
+        'colunas': ['ID', 'User ID', 'Boost ID', 'Status', 'Payment Method', 'Created At',
+                    'Updated At', 'Subscription ID', 'Price'],
+        'dtypes': {'ID': str, 'User ID': str, 'Boost ID': str, 'Status': str, 'Payment Method': str,
+                   'Subscription ID': str, 'Price': 'float64'},
+        'renomear': {'ID': 'Boost Transaction ID'},
+    },
+    'boost': {
+        'arquivo': 'boost.csv',
+        'colunas': ['ID', 'Price', 'Status', 'End Date', 'Partner ID', 'Name', 'Points', 'Points Multiplier'],
+        'dtypes': {'ID': str, 'Price': 'float64', 'Status': str, 'Partner ID': str, 'Name': str,
+                   'Points': 'float64', 'Points Multiplier': 'float64'},
+        'renomear': {'ID': 'Boost ID', 'Name': 'Boost Name'},
+    },
+    'partner': {
+        'arquivo': 'partner.csv',
+        'colunas': ['Name', 'ID', 'Team'],
+        'dtypes': {'Name': str, 'ID': str, 'Team': str},
+        'renomear': {'ID': 'Partner ID', 'Name': 'Partner Name'},
+    },
+    'campaign': {
+        'arquivo': 'campaign.csv',
+        'colunas': ['ID', 'Season ID', 'Partner ID', 'Category ID', 'Name', 'Created At'],
+        'dtypes': {'ID': str, 'Season ID': str, 'Partner ID': str, 'Category ID': str, 'Name': str},
+        'renomear': {'ID': 'Campaign ID', 'Created At': 'Campaign Created At', 'Name': 'Campaign Name'},
+    },
+    'campaign_user': {
+        'arquivo': 'campaign_user.csv',
+        'colunas': ['ID', 'User ID', 'Status', 'Campaign ID', 'Created At', 'Claimed'],
+        'dtypes': {'ID': str, 'User ID': str, 'Status': str, 'Campaign ID': str},
+        'datas': {'Created At': 'Created At'},
+        'renomear': {'ID': 'Campaign User ID', 'Created At': 'Campaign User Created At'},
+        'marca_dagua': 'Campaign User Created At',
+    },
+    'campaign_quest': {
+        'arquivo': 'campaign_quest.csv',
+        'colunas': ['ID', 'Quest ID', 'Campaign ID', 'Created At'],
+        'dtypes': {'ID': str, 'Quest ID': str, 'Campaign ID': str},
+        'renomear': {'ID': 'Campaign Quest ID', 'Created At': 'Campaign Quest Created At'},
+    },
+    'reward': {
+        'arquivo': 'reward.csv',
+        'colunas': ['ID', 'Campaign ID', 'Product ID'],
+        'dtypes': {'ID': str, 'Campaign ID': str, 'Product ID': str},
+        'renomear': {'ID': 'Reward ID'},
+    },
+    'user': {
+        'arquivo': 'user.csv',
+        'colunas': ['Username', 'Email', 'Score', 'ID', 'Birth Date', 'Created At'],
+        'dtypes': {'Username': str, 'Email': str, 'ID': str},
+        'datas': {'Birth Date': 'Birth Date', 'User Created At': 'Created At'},
+        'renomear': {'Score': 'Actual Points', 'ID': 'User ID'},
+    },
+    'user_partner_score': {
+        'arquivo': 'user_partner_score.csv',
+        'colunas': ['ID', 'User ID', 'Partner ID', 'Score', 'Created At'],
+        'dtypes': {'ID': str, 'User ID': str, 'Partner ID': str},
+        'renomear': {'Score': 'Partner Points', 'ID': 'User Partner Score ID',
+                     'Created At': 'User Partner Score Created At'},
+    },
+    'subscription': {
+        'arquivo': 'subscription.csv',
+        'colunas': ['ID', 'User ID', 'Status', 'Boost ID', 'Start Date', 'End Date',
+                    'Update Date', 'Created At', 'Hash'],
+        'dtypes': {'ID': str, 'User ID': str, 'Status': str, 'Boost ID': str, 'Hash': str},
+        'datas': {'Subscription Created At': 'Created At', 'Start Date': 'Start Date'},
+        'renomear': {'ID': 'Subscription ID'},
+        'marca_dagua': 'Subscription Created At',
+    },
+    'store_product': {
+        'arquivo': 'store_product.csv',
+        'colunas': ['ID', 'Product ID'],
+        'dtypes': {'ID': str, 'Product ID': str},
+        'renomear': {'ID': 'Store Product ID'},
+    },
+}
+
+# Tabelas devolvidas por carregar_dados, nesta ordem
+TABELAS_CARREGAR_DADOS = ['transacoes', 'user_product', 'product', 'boost_trans', 'boost', 'partner', 'campaign',
+                          'campaign_user', 'campaign_quest', 'reward', 'user', 'user_partner_score', 'subscription']
+
+def _assinatura_esquema(esquema):
+    """Resumo estável do esquema, gravado no snapshot para invalidá-lo quando o esquema mudar."""
+    conteudo = {chave: valor for chave, valor in esquema.items() if chave != 'pos'}
+    if 'pos' in esquema:
+        conteudo['pos'] = esquema['pos'].__name__
+    texto = json.dumps(conteudo, sort_keys=True, default=lambda valor: getattr(valor, '__name__', str(valor)))
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+def ler_csv_com_esquema(caminho_csv, esquema):
+    """
+    Lê o CSV aplicando o esquema já no read_csv (usecols/dtype/parse_dates).
+    Colunas ausentes no arquivo são ignoradas, como na limpeza original.
+    
+    Args:
+        caminho_csv: caminho do arquivo ou buffer binário com cabeçalho e linhas
+        esquema: entrada de ESQUEMAS
+    
+    Returns:
+        DataFrame: tabela com colunas selecionadas, datas convertidas e renomeadas
+    """
+    cabecalho = pd.read_csv(caminho_csv, nrows=0).columns
+    if hasattr(caminho_csv, 'seek'):
+        caminho_csv.seek(0)
+    colunas = [col for col in esquema['colunas'] if col in cabecalho]
+    dtypes = {col: tipo for col, tipo in esquema.get('dtypes', {}).items() if col in colunas}
+    datas = {destino: origem for destino, origem in esquema.get('datas', {}).items() if origem in colunas}
+    datas_no_lugar = [origem for destino, origem in datas.items() if destino == origem]
+    
+    df = pd.read_csv(caminho_csv, usecols=colunas, dtype=dtypes,
+                     parse_dates=datas_no_lugar, date_format='ISO8601')
+    
+    for destino, origem in datas.items():
+        # Valores fora do padrão ISO deixam a coluna como texto no read_csv; converter com coerção
+        if destino != origem or not pd.api.types.is_datetime64_any_dtype(df[origem]):
+            df[destino] = pd.to_datetime(df[origem], errors='coerce', format='ISO8601')
+    
+    df = df.rename(columns=esquema.get('renomear', {}))
+    
+    if 'pos' in esquema:
+        df = esquema['pos'](df)
+    
+    return df
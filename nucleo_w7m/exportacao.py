@@ -0,0 +1,199 @@
+"""Paginação e exportação em blocos dos dados brutos."""
+
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .config import TAMANHO_BLOCO_EXPORTACAO
+
+# ==================== VISUALIZAÇÃO PAGINADA DE DADOS BRUTOS ====================
+
+TAMANHOS_PAGINA = (25, 50, 100, 250)
+
+def filtrar_texto(serie, texto):
+    """
+    Máscara das linhas cujo valor, como texto, contém texto (sem diferenciar maiúsculas).
+    Em colunas category o teste é feito uma vez por categoria e propagado pelos códigos.
+    
+    Returns:
+        np.ndarray: booleano por linha; valores nulos nunca casam
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        casa = serie.cat.categories.astype(str).str.contains(texto, case=False, regex=False)
+        # código -1 (nulo) cai no False acrescentado ao fim
+        return np.append(np.asarray(casa, dtype=bool), False)[serie.cat.codes.to_numpy()]
+    casa = serie.astype('string').str.contains(texto, case=False, regex=False)
+    return casa.fillna(False).to_numpy(dtype=bool)
+
+def paginar_dados(df, pagina, tamanho_pagina, mascara=None, ordenacao=None, ascendente=True):
+    """
+    Seleciona só as linhas de uma página, com filtro e ordenação feitos no servidor.
+    
+    Args:
+        df: DataFrame completo (não é copiado nem reordenado)
+        pagina: número da página, começando em 1
+        tamanho_pagina: linhas por página
+        mascara: booleano por linha de df (opcional)
+        ordenacao: série alinhada a df usada como chave de ordenação (opcional)
+        ascendente: sentido da ordenação
+    
+    Returns:
+        tuple: (DataFrame da página, total de linhas após o filtro)
+    """
+    posicoes = np.arange(len(df)) if mascara is None else np.flatnonzero(mascara)
+    if ordenacao is not None:
+        valores = ordenacao.iloc[posicoes].reset_index(drop=True)
+        ordem = valores.sort_values(ascending=ascendente, kind='stable', na_position='last').index
+        posicoes = posicoes[ordem.to_numpy()]
+    
+    inicio = (pagina - 1) * tamanho_pagina
+    return df.iloc[posicoes[inicio:inicio + tamanho_pagina]], len(posicoes)
+
+# ==================== EXPORTAÇÃO DE DADOS ====================
+
+# Tabelas exportáveis e a coluna de data usada no filtro de período
+TABELAS_EXPORTACAO = {
+    'rewards': ('Rewards', 'Transaction Created At'),
+    'boosts': ('Boosts', 'Subscription Created At'),
+    'campanhas': ('Campanhas', 'Campaign User Created At'),
+    'resumo_resgates': ('Resumo de Resgates', 'Transaction Created At'),
+}
+
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+def montar_resumo_resgates(df_rewards, df_user, linhas=None):
+    """
+    Quantidade resgatada por usuário e item, contando cada transação uma vez.
+    
+    Args:
+        df_rewards: merge de rewards do parceiro
+        df_user: tabela de usuários (fonte do Email quando ele não vem nos rewards)
+        linhas: máscara booleana opcional sobre df_rewards (ex.: período)
+    
+    Returns:
+        DataFrame com Username, Email, Name e Quantidade, ou None sem as colunas necessárias
+    """
+    # Primeira linha de cada transação: máscara em vez de cópias deduplicadas do DataFrame
+    if 'Transaction ID' in df_rewards.columns:
+        transacao_unica = ~df_rewards['Transaction ID'].duplicated().to_numpy()
+    else:
+        transacao_unica = np.ones(len(df_rewards), dtype=bool)
+    if linhas is not None:
+        transacao_unica &= linhas
+    
+    # Só as colunas do resumo, nas linhas de transações únicas
+    colunas_resumo = [col for col in ['User ID', 'Username', 'Email', 'Name'] if col in df_rewards.columns]
+    df_com_email = df_rewards.loc[transacao_unica, colunas_resumo]
+    
+    # Se Email não existe nos rewards, fazer merge com user
+    if 'Email' not in df_com_email.columns and 'User ID' in df_com_email.columns:
+        df_com_email = pd.merge(
+            df_com_email,
+            df_user[['User ID', 'Email']],
+            on='User ID',
+            how='left'
+        )
+    
+    if not {'Name', 'Username', 'Email'}.issubset(df_com_email.columns):
+        return None
+    return df_com_email.groupby(['Username', 'Email', 'Name'], observed=True).size().reset_index(name='Quantidade')
+
+def mascara_periodo(df, coluna_data, inicio=None, fim=None):
+    """
+    Máscara das linhas com coluna_data entre inicio e fim (datas, ambas inclusivas).
+    
+    Returns:
+        np.ndarray booleano, ou None quando não há filtro a aplicar
+    """
+    if coluna_data not in df.columns or (inicio is None and fim is None):
+        return None
+    datas = df[coluna_data]
+    mascara = np.ones(len(df), dtype=bool)
+    if inicio is not None:
+        mascara &= (datas >= pd.Timestamp(inicio)).to_numpy()
+    if fim is not None:
+        mascara &= (datas < pd.Timestamp(fim) + pd.Timedelta(days=1)).to_numpy()
+    return mascara
+
+def blocos_exportacao(df, mascara=None, decodificar=None, tamanho_bloco=None):
+    """
+    Gera o DataFrame em blocos de até tamanho_bloco linhas, prontos para escrita.
+    
+    Chaves são decodificadas e semanas (period) viram texto bloco a bloco, então a cópia
+    decodificada do DataFrame inteiro nunca existe. Sempre gera ao menos um bloco (vazio
+    quando nenhuma linha passa no filtro), para o arquivo ter cabeçalho/esquema.
+    """
+    tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO_EXPORTACAO
+    posicoes = None if mascara is None else np.flatnonzero(mascara)
+    total = len(df) if posicoes is None else len(posicoes)
+    
+    for inicio in range(0, max(total, 1), tamanho_bloco):
+        if posicoes is None:
+            bloco = df.iloc[inicio:inicio + tamanho_bloco]
+        else:
+            bloco = df.iloc[posicoes[inicio:inicio + tamanho_bloco]]
+        if decodificar is not None:
+            bloco = decodificar(bloco)
+        periodos = [col for col in bloco.columns if isinstance(bloco[col].dtype, pd.PeriodDtype)]
+        if periodos:
+            bloco = bloco.assign(**{col: bloco[col].astype(str) for col in periodos})
+        yield bloco
+
+def _esquema_parquet(esquema):
+    """Esquema do primeiro bloco, com colunas todas nulas (tipo null) promovidas a string."""
+    import pyarrow as pa
+    campos = [campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo for campo in esquema]
+    return pa.schema(campos, metadata=esquema.metadata)
+
+def escrever_exportacao(blocos, destino, formato):
+    """
+    Escreve os blocos em destino (arquivo binário) um a um, sem montar o arquivo em memória.
+    
+    Args:
+        blocos: iterável de DataFrames com as mesmas colunas
+        destino: arquivo binário aberto para escrita
+        formato: 'csv' ou 'parquet'
+    """
+    if formato == 'csv':
+        texto = io.TextIOWrapper(destino, encoding='utf-8', newline='', write_through=True)
+        cabecalho = True
+        for bloco in blocos:
+            bloco.to_csv(texto, index=False, header=cabecalho)
+            cabecalho = False
+        texto.flush()
+        texto.detach()
+    elif formato == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        escritor = None
+        try:
+            for bloco in blocos:
+                if escritor is None:
+                    esquema = _esquema_parquet(pa.Schema.from_pandas(bloco, preserve_index=False))
+                    escritor = pq.ParquetWriter(destino, esquema)
+                escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+        finally:
+            if escritor is not None:
+                escritor.close()
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+def exportar_para_arquivo(df, formato, mascara=None, decodificar=None, tamanho_bloco=None):
+    """
+    Gera a exportação num arquivo temporário em disco, bloco a bloco, e devolve o conteúdo.
+    
+    Os blocos intermediários não ficam em memória, só o arquivo final; o temporário é
+    fechado (e apagado) antes do retorno.
+    
+    Returns:
+        bytes: conteúdo do arquivo, no tipo aceito pelo st.download_button
+    """
+    with tempfile.TemporaryFile() as destino:
+        escrever_exportacao(blocos_exportacao(df, mascara, decodificar, tamanho_bloco), destino, formato)
+        destino.seek(0)
+        return destino.read()
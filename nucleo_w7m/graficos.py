@@ -0,0 +1,514 @@
+"""Figuras Plotly do dashboard, cache de figuras e redução de pontos."""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+from .config import CACHE_FIGURAS_MAX_ITENS, CACHE_FIGURAS_MAX_MB, MAX_PONTOS_SERIE, MAX_BARRAS
+from .merges import ORDEM_DIAS_SEMANA
+from .tipos import contar_valores
+
+# ==================== CACHE DE FIGURAS ====================
+
+_AUSENTE = object()
+
+class CacheFiguras:
+    """
+    Cache LRU de figuras Plotly serializadas em JSON, com limite de itens e de bytes.
+    
+    A chave deve identificar tudo de que a figura depende (função, parceiro, versão dos
+    dados e parâmetros); figuras None ("sem dados") também são guardadas.
+    """
+    
+    def __init__(self, max_itens=None, max_bytes=None):
+        self.max_itens = max_itens if max_itens is not None else CACHE_FIGURAS_MAX_ITENS
+        self.max_bytes = max_bytes if max_bytes is not None else int(CACHE_FIGURAS_MAX_MB * 2 ** 20)
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._itens)
+    
+    def obter(self, chave, construir):
+        """
+        Devolve a figura da chave, chamando construir() só se ela não estiver no cache.
+        
+        Returns:
+            go.Figure ou None
+        """
+        with self._lock:
+            texto = self._itens.get(chave, _AUSENTE)
+            if texto is not _AUSENTE:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+            else:
+                self.falhas += 1
+        
+        if texto is not _AUSENTE:
+            return None if texto is None else pio.from_json(texto)
+        
+        figura = construir()
+        self._guardar(chave, None if figura is None else figura.to_json())
+        return figura
+    
+    def _guardar(self, chave, texto):
+        tamanho = 0 if texto is None else len(texto)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                anterior = self._itens.pop(chave)
+                self._bytes -= 0 if anterior is None else len(anterior)
+            self._itens[chave] = texto
+            self._bytes += tamanho
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                _, descartado = self._itens.popitem(last=False)
+                self._bytes -= 0 if descartado is None else len(descartado)
+                self.descartes += 1
+    
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+    
+    def estatisticas(self):
+        """Acertos, falhas, descartes, itens e bytes guardados."""
+        with self._lock:
+            return {'acertos': self.acertos, 'falhas': self.falhas, 'descartes': self.descartes,
+                    'itens': len(self._itens), 'bytes': self._bytes}
+
+# ==================== REDUÇÃO DE PONTOS DOS GRÁFICOS ====================
+
+def indices_lttb(x, y, max_pontos):
+    """
+    Escolhe até max_pontos pontos de uma série pelo Largest-Triangle-Three-Buckets.
+    
+    O primeiro e o último ponto são mantidos; de cada balde intermediário fica o ponto
+    que forma o maior triângulo com o escolhido antes e a média do balde seguinte, o que
+    preserva picos e vales.
+    
+    Args:
+        x, y: sequências numéricas de mesmo tamanho, com x ordenado
+        max_pontos: número máximo de pontos (mínimo 3)
+    
+    Returns:
+        np.ndarray: posições dos pontos escolhidos, em ordem
+    """
+    n = len(x)
+    if max_pontos >= n or max_pontos < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # max_pontos - 2 baldes entre o primeiro e o último ponto; cada um tem ao menos um ponto
+    limites = np.floor(np.linspace(1, n - 1, max_pontos - 1)).astype(np.intp)
+    
+    indices = np.empty(max_pontos, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(max_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        if i + 2 < len(limites):
+            proximo_inicio, proximo_fim = limites[i + 1], limites[i + 2]
+        else:
+            proximo_inicio, proximo_fim = n - 1, n
+        media_x = x[proximo_inicio:proximo_fim].mean()
+        media_y = y[proximo_inicio:proximo_fim].mean()
+        
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(areas.argmax())
+        indices[i + 1] = anterior
+    return indices
+
+def reduzir_serie(df, coluna_x, coluna_y, max_pontos=None):
+    """
+    Limita uma série temporal a max_pontos linhas (padrão MAX_PONTOS_SERIE) via LTTB.
+    
+    Args:
+        df: DataFrame ordenado por coluna_x (datas, períodos ou números)
+    
+    Returns:
+        DataFrame: o próprio df se já couber no limite, senão as linhas escolhidas
+    """
+    max_pontos = max_pontos or MAX_PONTOS_SERIE
+    if len(df) <= max_pontos:
+        return df
+    
+    x = df[coluna_x]
+    if isinstance(x.dtype, pd.PeriodDtype):
+        x = x.dt.start_time
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype('int64')
+    indices = indices_lttb(x.to_numpy(), df[coluna_y].to_numpy(dtype='float64', na_value=0), max_pontos)
+    return df.iloc[indices].copy()
+
+def agrupar_cauda(contagem, max_barras=None, rotulo='Outros'):
+    """
+    Mantém as maiores barras de uma série e soma o restante numa barra rotulo.
+    
+    Args:
+        contagem: Series valor por categoria (índice = rótulo da barra)
+        max_barras: total de barras, incluindo a de rotulo; padrão MAX_BARRAS
+    
+    Returns:
+        Series: a própria contagem se já couber no limite
+    """
+    max_barras = max(max_barras or MAX_BARRAS, 2)
+    if len(contagem) <= max_barras:
+        return contagem
+    
+    ordenada = contagem.sort_values(ascending=False)
+    topo = ordenada.iloc[:max_barras - 1]
+    topo.index = topo.index.astype(str)
+    cauda = pd.Series([ordenada.iloc[max_barras - 1:].sum()], index=[rotulo], name=contagem.name)
+    return pd.concat([topo, cauda])
+
+# ==================== FUNÇÕES DE GRÁFICOS ATUALIZADAS ====================
+
+def criar_grafico_novos_usuarios_por_semana(usuarios_boosts, data_limite=None):
+    """
+    Cria gráfico de usuários únicos com novas assinaturas por semana.
+    
+    Args:
+        usuarios_boosts: fatia de boosts de materializar_usuarios_semanais
+        data_limite: início da janela; padrão, 30 dias atrás
+    """
+    if len(usuarios_boosts) == 0:
+        return None
+    
+    # Semanas que tocam o último mês
+    if data_limite is None:
+        data_limite = datetime.now() - timedelta(days=30)
+    usuarios_por_semana = usuarios_boosts[usuarios_boosts['semana'].dt.end_time >= data_limite]
+    usuarios_por_semana = usuarios_por_semana.sort_values('semana').rename(columns={'usuarios': 'User ID'})
+    usuarios_por_semana['semana_str'] = usuarios_por_semana['semana'].astype(str)
+    
+    if len(usuarios_por_semana) == 0:
+        return None
+    
+    fig = px.bar(
+        usuarios_por_semana,
+        x='semana_str',
+        y='User ID',
+        title='Usuários semanais Únicos com Novas Assinaturas (Último Mês)',
+        labels={'semana_str': 'Semana', 'User ID': 'Usuários Únicos'},
+        color='User ID',
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=400, title_x=0.5, xaxis_tickangle=-45, showlegend=False)
+    
+    return fig
+
+def criar_grafico_total_assinaturas_por_boost(df_boosts):
+    """Cria gráfico de barras com total de assinaturas por tipo de boost."""
+    if 'Boost Name' not in df_boosts.columns:
+        return None
+    
+    # value_counts já ignora boosts sem nome; nenhuma cópia do DataFrame é feita
+    assinaturas_por_boost = agrupar_cauda(contar_valores(df_boosts['Boost Name']))
+    
+    if len(assinaturas_por_boost) == 0:
+        return None
+    
+    fig = px.bar(
+        x=assinaturas_por_boost.index,
+        y=assinaturas_por_boost.values,
+        title='Total de Assinaturas por Tipo de Boost',
+        labels={'x': 'Tipo de Boost', 'y': 'Total de Assinaturas'},
+        color=assinaturas_por_boost.values,
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=400, showlegend=False, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+def criar_grafico_campanhas_pontos_tempo(cubo_campanhas):
+    """Cria gráfico de Product Points ao longo do tempo a partir do cubo de campanhas."""
+    if len(cubo_campanhas) == 0:
+        return None
+    
+    pontos_semanais = cubo_campanhas.groupby('semana')['pontos'].sum().reset_index()
+    pontos_semanais = reduzir_serie(pontos_semanais.rename(columns={'pontos': 'Product Points'}),
+                                    'semana', 'Product Points')
+    pontos_semanais['semana_str'] = pontos_semanais['semana'].astype(str)
+    
+    if len(pontos_semanais) == 0:
+        return None
+    
+    fig = px.line(
+        pontos_semanais,
+        x='semana_str',
+        y='Product Points',
+        title='Pontos de Missões Gerados ao Longo do Tempo',
+        labels={'semana_str': 'Semana', 'Product Points': 'Pontos de Missões'},
+        markers=True
+    )
+    
+    fig.update_traces(line_color='#FF6B6B', line_width=3, marker_size=8)
+    fig.update_layout(height=400, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+def criar_grafico_top5_campanhas_engajamento(df_campanhas):
+    """Cria gráfico das Top 5 campanhas por engajamento."""
+    if 'Campaign Name' not in df_campanhas.columns:
+        return None
+    
+    campanhas_count = contar_valores(df_campanhas['Campaign Name']).head(5)
+    
+    if len(campanhas_count) == 0:
+        return None
+    
+    fig = px.bar(
+        x=campanhas_count.index,
+        y=campanhas_count.values,
+        title='Top 5 Campanhas por Engajamento',
+        labels={'x': 'Campanha', 'y': 'Número de Participações'},
+        color=campanhas_count.values,
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=400, showlegend=False, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+def criar_tabela_top_usuario(df_user, df_campanhas, codificador=None):
+    """
+    Cria tabela com informações do top usuário por Product Points.
+    Com codificador, o User ID codificado é exibido como UUID.
+    """
+    if 'Username' not in df_campanhas.columns or 'Product Points' not in df_campanhas.columns:
+        return None
+    
+    pontos_por_usuario = df_campanhas.groupby('Username', observed=True)['Product Points'].sum()
+    if len(pontos_por_usuario) == 0:
+        return None
+    
+    top_usuario_nome = pontos_por_usuario.idxmax()
+    total_product_points = pontos_por_usuario[top_usuario_nome]
+    
+    usuario_data = df_user[df_user['Username'] == top_usuario_nome]
+    if usuario_data.empty:
+        return None
+    
+    usuario = usuario_data.iloc[0]
+    
+    info_dict = {
+        'Métrica': ['Username', 'Pontos de Missões Total'],
+        'Valor': [top_usuario_nome, f"{total_product_points:,.0f}"]
+    }
+    
+    if 'User ID' in usuario.index:
+        user_id = usuario['User ID']
+        if codificador is not None:
+            user_id = codificador.decodificar(pd.Series([user_id])).iloc[0]
+        info_dict['Métrica'].append('User ID')
+        info_dict['Valor'].append(user_id)
+    
+    if 'Actual Points' in usuario.index:
+        info_dict['Métrica'].append('Saldo Atual')
+        info_dict['Valor'].append(f"{usuario['Actual Points']:,.0f}")
+    
+    if 'Faixa_Etaria' in usuario.index:
+        info_dict['Métrica'].append('Faixa Etária')
+        info_dict['Valor'].append(str(usuario['Faixa_Etaria']))
+    
+    return pd.DataFrame(info_dict)
+
+# ==================== NOVAS FUNÇÕES PARA ANÁLISE DE USUÁRIO ====================
+
+def criar_grafico_distribuicao_faixa_etaria(df_user):
+    """Cria gráfico de pizza com distribuição por faixa etária."""
+    if 'Faixa_Etaria' not in df_user.columns:
+        return None
+    
+    faixa_count = df_user['Faixa_Etaria'].value_counts()
+    
+    if len(faixa_count) == 0:
+        return None
+    
+    fig = px.pie(
+        values=faixa_count.values,
+        names=faixa_count.index,
+        title='Distribuição de Usuários por Faixa Etária',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(height=450, title_x=0.5)
+    
+    return fig
+
+def criar_grafico_top10_usuarios_product_points(df_campanhas):
+    """Cria gráfico de barras com top 10 usuários por Product Points."""
+    if 'Username' not in df_campanhas.columns or 'Product Points' not in df_campanhas.columns:
+        return None
+    
+    pontos_por_usuario = df_campanhas.groupby('Username', observed=True)['Product Points'].sum().nlargest(10)
+    
+    if len(pontos_por_usuario) == 0:
+        return None
+    
+    top_usuario = pontos_por_usuario.idxmax() if len(pontos_por_usuario) > 0 else None
+    
+    colors = ['#FFD700' if username == top_usuario else '#4ECDC4' for username in pontos_por_usuario.index]
+    
+    fig = px.bar(
+        x=pontos_por_usuario.index,
+        y=pontos_por_usuario.values,
+        title='Top 10 Usuários por Pontos de Missões',
+        labels={'x': 'Usuário', 'y': 'Product Points Total'},
+    )
+    
+    fig.update_traces(marker_color=colors)
+    fig.update_layout(height=500, showlegend=False, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+# ==================== FUNÇÕES RESTAURADAS PARA ANÁLISE DE REWARDS ====================
+
+def criar_grafico_pontos_resgatados_item(df_rewards):
+    """Cria gráfico de total de pontos resgatados por item."""
+    nome_col = None
+    for col in ['Name', 'Product Name']:
+        if col in df_rewards.columns:
+            nome_col = col
+            break
+    
+    if not nome_col or 'Price' not in df_rewards.columns:
+        return None
+    
+    # Itens sem nome ficam fora do groupby; itens só com Price nulo são descartados depois da soma
+    pontos_por_item = df_rewards['Price'].groupby(df_rewards[nome_col], observed=True).sum(min_count=1).dropna()
+    
+    if len(pontos_por_item) == 0:
+        return None
+    
+    pontos_por_item = pontos_por_item.sort_values(ascending=False).head(10)
+    
+    if pontos_por_item.sum() == 0:
+        return None
+    
+    fig = px.bar(
+        x=pontos_por_item.index,
+        y=pontos_por_item.values,
+        title='Total de Pontos Resgatados por Item',
+        labels={'x': 'Item', 'y': 'Total de Pontos'},
+        color=pontos_por_item.values,
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=500, showlegend=False, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+def criar_grafico_unidades_resgatadas_item(df_rewards):
+    """Cria gráfico de total de unidades resgatadas por item."""
+    nome_col = None
+    for col in ['Name', 'Product Name']:
+        if col in df_rewards.columns:
+            nome_col = col
+            break
+    
+    if not nome_col:
+        return None
+    
+    unidades_por_item = agrupar_cauda(contar_valores(df_rewards[nome_col]))
+    
+    if len(unidades_por_item) == 0:
+        return None
+    
+    fig = px.bar(
+        x=unidades_por_item.index,
+        y=unidades_por_item.values,
+        title='Total de Unidades Resgatadas por Item',
+        labels={'x': 'Item', 'y': 'Quantidade Resgatada'},
+        color=unidades_por_item.values,
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=500, showlegend=False, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+# ==================== FUNÇÕES RESTAURADAS PARA ANÁLISE DE CAMPANHAS ====================
+
+def criar_grafico_participacoes_tempo(cubo_campanhas):
+    """Cria gráfico de série temporal de participações em campanhas a partir do cubo."""
+    if len(cubo_campanhas) == 0:
+        return None
+    
+    participacoes_diarias = cubo_campanhas.groupby('dia')['eventos'].sum().reset_index(name='participacoes')
+    participacoes_diarias = reduzir_serie(participacoes_diarias, 'dia', 'participacoes')
+    participacoes_diarias['data_participacao'] = participacoes_diarias['dia'].dt.date
+    
+    if len(participacoes_diarias) == 0:
+        return None
+    
+    fig = px.line(
+        participacoes_diarias,
+        x='data_participacao',
+        y='participacoes',
+        title='Participações em Campanhas ao Longo do Tempo',
+        labels={'data_participacao': 'Data', 'participacoes': 'Número de Participações'}
+    )
+    
+    fig.update_traces(line_color='#4ECDC4', line_width=3)
+    fig.update_layout(height=400, title_x=0.5)
+    
+    return fig
+
+def criar_grafico_engajamento_dia_semana(cubo_campanhas):
+    """Cria gráfico de engajamento por dia da semana a partir do cubo de campanhas."""
+    if len(cubo_campanhas) == 0:
+        return None
+    
+    participacoes_por_dia = cubo_campanhas.groupby('dia_semana')['eventos'].sum().reindex(range(7), fill_value=0)
+    participacoes_por_dia.index = ORDEM_DIAS_SEMANA
+    
+    fig = px.bar(
+        x=participacoes_por_dia.index,
+        y=participacoes_por_dia.values,
+        title='Engajamento em Campanhas por Dia da Semana',
+        labels={'x': 'Dia da Semana', 'y': 'Número de Participações'},
+        color=participacoes_por_dia.values,
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=400, showlegend=False, title_x=0.5, xaxis_tickangle=-45)
+    
+    return fig
+
+def criar_grafico_engajamento_por_hora(cubo_campanhas):
+    """Cria gráfico de engajamento por hora do dia a partir do cubo de campanhas."""
+    if len(cubo_campanhas) == 0:
+        return None
+    
+    participacoes_por_hora = cubo_campanhas.groupby('hora')['eventos'].sum().sort_index()
+    
+    fig = px.bar(
+        x=participacoes_por_hora.index,
+        y=participacoes_por_hora.values,
+        title='Engajamento em Campanhas por Hora do Dia',
+        labels={'x': 'Hora do Dia (0-23)', 'y': 'Número de Participações'},
+        color=participacoes_por_hora.values,
+        color_continuous_scale='viridis'
+    )
+    
+    fig.update_layout(height=400, showlegend=False, title_x=0.5)
+    fig.update_xaxes(tickmode='linear', tick0=0, dtick=2)
+    
+    return fig
@@ -0,0 +1,85 @@
+"""Leitura incremental das linhas anexadas aos CSVs de eventos."""
+
+import os
+import hashlib
+import io
+import logging
+
+import pandas as pd
+
+from . import config
+from .esquemas import ESQUEMAS, ler_csv_com_esquema
+
+logger = logging.getLogger(__name__)
+
+# ==================== INGESTÃO INCREMENTAL ====================
+
+# Fim do trecho já lido que é conferido antes de tratar o crescimento do CSV como append
+TAMANHO_BLOCO_CONFERENCIA = 64 * 1024
+
+def _caminho_csv(nome_tabela):
+    return os.path.join(config.DIRETORIO_DADOS, ESQUEMAS[nome_tabela]['arquivo'])
+
+def linhas_completas(conteudo):
+    """Corta o conteúdo na última quebra de linha: uma linha ainda sendo escrita fica para a próxima leitura."""
+    return conteudo[:conteudo.rfind(b'\n') + 1]
+
+def estado_leitura(nome_tabela, offset):
+    """
+    Registra até onde o CSV foi lido: offset, cabeçalho e hash do último bloco antes do offset.
+    
+    Returns:
+        dict: estado usado por ler_linhas_anexadas
+    """
+    with open(_caminho_csv(nome_tabela), 'rb') as f:
+        cabecalho = f.readline()
+        inicio = max(0, offset - TAMANHO_BLOCO_CONFERENCIA)
+        f.seek(inicio)
+        bloco = f.read(offset - inicio)
+    return {'offset': offset, 'cabecalho': cabecalho, 'bloco_final': bloco,
+            'hash_final': hashlib.sha256(bloco).hexdigest(), 'marca_dagua': None}
+
+def ler_linhas_anexadas(nome_tabela, estado):
+    """
+    Lê apenas as linhas acrescentadas ao CSV depois do offset do estado.
+    
+    O crescimento só é tratado como append se o cabeçalho e o último bloco já lido
+    continuarem iguais; uma linha final incompleta fica para a próxima leitura.
+    
+    Returns:
+        tuple: (DataFrame limpo com as linhas novas, novo estado), ou None se o arquivo
+        foi reescrito e precisa ser recarregado inteiro
+    """
+    offset = estado['offset']
+    with open(_caminho_csv(nome_tabela), 'rb') as f:
+        tamanho = os.fstat(f.fileno()).st_size
+        if tamanho < offset or f.readline() != estado['cabecalho']:
+            return None
+        inicio = max(0, offset - TAMANHO_BLOCO_CONFERENCIA)
+        f.seek(inicio)
+        if hashlib.sha256(f.read(offset - inicio)).hexdigest() != estado['hash_final']:
+            return None
+        anexado = f.read(tamanho - offset)
+    
+    anexado = linhas_completas(anexado)
+    bloco = (estado['bloco_final'] + anexado)[-TAMANHO_BLOCO_CONFERENCIA:]
+    novo_estado = dict(estado, offset=offset + len(anexado), bloco_final=bloco,
+                       hash_final=hashlib.sha256(bloco).hexdigest())
+    
+    if not anexado.strip():
+        return pd.DataFrame(), novo_estado
+    df = ler_csv_com_esquema(io.BytesIO(estado['cabecalho'] + anexado), ESQUEMAS[nome_tabela])
+    return df, novo_estado
+
+def _atualizar_marca_dagua(nome_tabela, estado, df):
+    """Avança a marca d'água (maior data de criação lida) e avisa no log sobre eventos fora de ordem."""
+    coluna = ESQUEMAS[nome_tabela]['marca_dagua']
+    if coluna not in df.columns or len(df) == 0:
+        return estado
+    marca = estado['marca_dagua']
+    if marca is not None and df[coluna].min() < marca:
+        logger.info("%s: linhas anexadas com data anterior à marca d'água %s", nome_tabela, marca)
+    maior = df[coluna].max()
+    if pd.notna(maior) and (marca is None or maior > marca):
+        marca = maior
+    return dict(estado, marca_dagua=marca)
@@ -0,0 +1,101 @@
+"""Tabela de KPIs por parceiro."""
+
+import numpy as np
+import pandas as pd
+
+from .config import TODOS_OS_PARCEIROS
+from .distintos import EsbocoHLL, usar_contagem_aproximada, esbocos_por_grupo
+
+# ==================== FUNÇÕES PARA DASHBOARD GERAL ====================
+
+# KPIs por parceiro guardados na tabela materializada
+COLUNAS_KPI = ['usuarios_engajados', 'usuarios_ativos', 'pontos_missoes', 'media_pontos_missao',
+               'pontos_recompensas', 'recompensas_resgatadas', 'novas_assinaturas', 'total_pontos']
+
+def _agregar_por_parceiro(df, coluna, funcoes):
+    """
+    Agrega uma coluna por Partner Name e acrescenta a linha TODOS_OS_PARCEIROS,
+    que também conta as linhas sem parceiro.
+    """
+    valores = df[coluna] if coluna in df.columns else pd.Series(np.nan, index=df.index, dtype=float)
+    if 'Partner Name' in df.columns and len(df) > 0:
+        agregado = valores.groupby(df['Partner Name'], observed=True).agg(funcoes)
+        agregado.index = agregado.index.astype(object)
+    else:
+        agregado = pd.DataFrame(columns=funcoes, dtype=float)
+    agregado.loc[TODOS_OS_PARCEIROS] = valores.agg(funcoes)
+    return agregado
+
+def _distintos_por_parceiro(df, coluna):
+    """
+    Valores distintos de coluna por Partner Name e no total (TODOS_OS_PARCEIROS).
+    Acima do limite de contagem exata, o total é a união dos esboços dos parceiros.
+    """
+    valores = df[coluna]
+    if not usar_contagem_aproximada(len(valores)):
+        contagem = _agregar_por_parceiro(df, coluna, ['nunique'])['nunique']
+        return contagem.astype(np.int64)
+    
+    # Linhas sem parceiro entram só no total
+    parceiros = df['Partner Name'].astype(object).fillna('')
+    esbocos = esbocos_por_grupo(valores, parceiros)
+    contagem = pd.Series({parceiro: esboco.estimar() for parceiro, esboco in esbocos.items() if parceiro != ''},
+                         dtype=np.int64)
+    total = EsbocoHLL()
+    for esboco in esbocos.values():
+        total = total | esboco
+    contagem.loc[TODOS_OS_PARCEIROS] = total.estimar()
+    return contagem
+
+def materializar_kpis(df_rewards, df_boosts, df_campanhas, partner_id=None):
+    """
+    Calcula os KPIs do dashboard de todos os parceiros numa passada agrupada por DataFrame.
+    
+    Args:
+        partner_id: aceito pelo registro; os DataFrames recebidos já vêm restritos ao parceiro
+    
+    Returns:
+        DataFrame: uma linha por Partner Name, mais TODOS_OS_PARCEIROS, com as COLUNAS_KPI
+    """
+    # Usuários engajados: distintos por parceiro entre rewards, boosts e campanhas
+    usuarios = pd.concat([df.reindex(columns=['Partner Name', 'User ID', 'Actual Points'])
+                          for df in (df_rewards, df_boosts, df_campanhas)], ignore_index=True)
+    usuarios = usuarios.dropna(subset=['User ID'])
+    usuarios['Partner Name'] = usuarios['Partner Name'].astype(object)
+    usuarios['ativo'] = usuarios['User ID'].where(usuarios['Actual Points'] > 0)
+    engajados = _distintos_por_parceiro(usuarios, 'User ID')
+    ativos = _distintos_por_parceiro(usuarios, 'ativo')
+    
+    missoes = _agregar_por_parceiro(df_campanhas, 'Product Points', ['sum', 'mean'])
+    recompensas = _agregar_por_parceiro(df_rewards, 'Price', ['sum', 'size'])
+    assinaturas = _agregar_por_parceiro(df_boosts, 'Subscription ID', ['size'])
+    
+    kpis = pd.DataFrame({
+        'usuarios_engajados': engajados,
+        'usuarios_ativos': ativos,
+        'pontos_missoes': missoes['sum'],
+        'media_pontos_missao': missoes['mean'],
+        'pontos_recompensas': recompensas['sum'],
+        'recompensas_resgatadas': recompensas['size'],
+        'novas_assinaturas': assinaturas['size'],
+    }).fillna(0)
+    kpis['total_pontos'] = kpis['pontos_missoes'] + kpis['pontos_recompensas']
+    
+    contagens = ['usuarios_engajados', 'usuarios_ativos', 'recompensas_resgatadas', 'novas_assinaturas']
+    kpis = kpis.astype({col: np.int64 for col in contagens})
+    kpis.index.name = 'Partner Name'
+    return kpis[COLUNAS_KPI]
+
+def obter_kpis(df_kpis, parceiro_selecionado):
+    """Linha de KPIs do parceiro na tabela materializada; zeros se ele não tiver dados."""
+    if parceiro_selecionado in df_kpis.index:
+        return df_kpis.loc[parceiro_selecionado]
+    return pd.Series(0, index=COLUNAS_KPI)
+
+def calcular_kpis_dashboard_geral(df_kpis, parceiro_selecionado):
+    """
+    FUNÇÃO CORRIGIDA: Lê os KPIs do parceiro na tabela de materializar_kpis.
+    """
+    kpis = obter_kpis(df_kpis, parceiro_selecionado)
+    return (int(kpis['usuarios_engajados']), kpis['pontos_missoes'], int(kpis['recompensas_resgatadas']),
+            int(kpis['novas_assinaturas']), kpis['total_pontos'])
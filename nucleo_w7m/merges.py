@@ -0,0 +1,426 @@
+"""Joins com controle de cardinalidade e merges de rewards, boosts e campanhas."""
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==================== JOINS COM CONTROLE DE CARDINALIDADE ====================
+
+# Quantas vezes um join pode multiplicar as linhas da tabela da esquerda
+FATOR_MAXIMO_CRESCIMENTO_JOIN = 2.0
+
+# fator_maximo de joins um-para-muitos por natureza (ex.: campanha -> rewards), que não têm limite
+SEM_LIMITE_CRESCIMENTO = float('inf')
+
+class ErroCardinalidadeJoin(ValueError):
+    """Join recusado por multiplicar as linhas além do fator permitido."""
+
+def juntar_com_controle(df_esquerda, df_direita, on, how='inner', fator_maximo=None, descricao=None, **kwargs):
+    """
+    pd.merge que calcula o tamanho do resultado antes de materializá-lo e recusa
+    joins que cresceriam além de fator_maximo vezes as linhas da esquerda.
+    
+    Raises:
+        ErroCardinalidadeJoin: se o resultado excederia o limite
+    """
+    # Linhas resultantes = soma, por linha da esquerda, das ocorrências da chave na direita
+    # (pd.merge também casa chaves nulas entre si, por isso dropna=False)
+    ocorrencias = df_esquerda[on].map(df_direita[on].value_counts(dropna=False))
+    ocorrencias = ocorrencias.fillna(1 if how == 'left' else 0)
+    if how == 'left':
+        ocorrencias = ocorrencias.clip(lower=1)
+    verificar_crescimento_join(len(df_esquerda), int(ocorrencias.sum()), fator_maximo, descricao or on)
+    
+    return pd.merge(df_esquerda, df_direita, on=on, how=how, **kwargs)
+
+def verificar_crescimento_join(linhas_esquerda, linhas_resultado, fator_maximo=None, descricao=None):
+    """
+    Recusa um join que levaria linhas_esquerda a linhas_resultado, além de fator_maximo vezes.
+    
+    Raises:
+        ErroCardinalidadeJoin: se o resultado excederia o limite
+    """
+    if fator_maximo is None:
+        fator_maximo = FATOR_MAXIMO_CRESCIMENTO_JOIN
+    
+    limite = fator_maximo * max(linhas_esquerda, 1)
+    if linhas_resultado > limite:
+        raise ErroCardinalidadeJoin(
+            f"Join {descricao} geraria {linhas_resultado:,} linhas a partir de {linhas_esquerda:,} "
+            f"(fator máximo {fator_maximo})"
+        )
+
+def nomes_merge(colunas_esquerda, colunas_direita, chave, sufixos=('_x', '_y')):
+    """
+    Nomes das colunas de pd.merge(on=chave) para os motores que montam o join por conta própria.
+    
+    Returns:
+        tuple: (dict esquerda -> nome no resultado, dict direita -> nome no resultado); a chave
+            da direita não aparece no resultado
+    
+    Raises:
+        ValueError: colunas sobrepostas sem sufixo, como no pd.merge
+    """
+    sobrepostas = set(colunas_esquerda) & set(colunas_direita) - {chave}
+    if sobrepostas and not any(sufixos):
+        raise ValueError(f"columns overlap but no suffix specified: {sorted(sobrepostas)}")
+    esquerda = {coluna: coluna + sufixos[0] if coluna in sobrepostas else coluna for coluna in colunas_esquerda}
+    direita = {coluna: coluna + sufixos[1] if coluna in sobrepostas else coluna
+               for coluna in colunas_direita if coluna != chave}
+    return esquerda, direita
+
+def restaurar_tipos(df, tipos):
+    """
+    Devolve às colunas de um join montado fora do pandas os dtypes das colunas de origem (no lugar).
+    Colunas inteiras/booleanas que ganharam nulos num left join ficam float/object, como no pd.merge.
+    
+    Args:
+        tipos: dict coluna do resultado -> dtype de origem
+    """
+    for coluna, tipo in tipos.items():
+        if df[coluna].dtype == tipo:
+            continue
+        if isinstance(tipo, np.dtype) and tipo.kind in 'biu' and df[coluna].isna().any():
+            tipo = np.dtype('float64') if tipo.kind in 'iu' else np.dtype(object)
+            if df[coluna].dtype == tipo:
+                continue
+        df[coluna] = df[coluna].astype(tipo)
+    return df
+
+def vincular_transacoes_store_product(df_transacoes, df_store_product=None, df_user_product=None, avisos=None):
+    """
+    Liga cada transação da loja ao produto comprado.
+    
+    Usa a chave Store Product ID -> store_product quando ela existe; transações com a
+    chave nula ficam de fora, com um aviso da quantidade. Sem a chave, associa cada
+    transação ao user_product do mesmo usuário com Created At mais próximo, registrando
+    um aviso (ou um erro, se nenhuma transação puder ser ligada).
+    
+    Args:
+        df_user_product: DataFrame ou função sem argumentos que o devolve, chamada só
+            quando a ligação por data é necessária
+    
+    Returns:
+        DataFrame: transações com a coluna Product ID
+    """
+    if (df_store_product is not None and 'Store Product ID' in df_transacoes.columns
+            and 'Store Product ID' in df_store_product.columns):
+        _avisar_transacoes_sem_chave(avisos, int(df_transacoes['Store Product ID'].isna().sum()))
+        return juntar_com_controle(df_transacoes, df_store_product, on='Store Product ID', how='inner',
+                                   fator_maximo=1.0, descricao='transação -> store_product')
+    
+    if len(df_transacoes) == 0:
+        return pd.DataFrame()
+    
+    if callable(df_user_product):
+        df_user_product = df_user_product()
+    if (df_user_product is None or 'Transaction Created At' not in df_transacoes.columns
+            or 'User Product Created At' not in df_user_product.columns):
+        registrar_aviso(avisos, 'erro', "Transações sem Store Product ID e sem user_product com datas para "
+                                        "ligá-las aos produtos; resgates não exibidos")
+        return pd.DataFrame()
+    
+    # Sem chave: produto do mesmo usuário com data mais próxima da transação
+    registrar_aviso(avisos, 'aviso', "Transações sem Store Product ID: produto de cada resgate estimado pelo "
+                                     "user_product do mesmo usuário com data mais próxima")
+    transacoes = df_transacoes.dropna(subset=['User ID', 'Transaction Created At'])
+    produtos = df_user_product.dropna(subset=['User ID', 'User Product Created At'])
+    df_vinculado = pd.merge_asof(
+        transacoes.sort_values('Transaction Created At'),
+        produtos.sort_values('User Product Created At'),
+        left_on='Transaction Created At', right_on='User Product Created At',
+        by='User ID', direction='nearest'
+    ).dropna(subset=['Product ID'])
+    if len(df_vinculado) == 0:
+        registrar_aviso(avisos, 'erro', "Nenhuma transação ligada a um produto pela data do user_product")
+    return df_vinculado
+
+# ==================== AVISOS DE DADOS ====================
+
+# Problema de dados encontrado ao montar um derivado; nivel é 'aviso' ou 'erro'
+Aviso = namedtuple('Aviso', ['nivel', 'mensagem'])
+
+def registrar_aviso(avisos, nivel, mensagem):
+    """Acrescenta um Aviso à lista e o registra no log; sem lista (None), não faz nada."""
+    if avisos is None:
+        return
+    avisos.append(Aviso(nivel, mensagem))
+    logger.log(logging.ERROR if nivel == 'erro' else logging.WARNING, mensagem)
+
+def _avisar_transacoes_sem_chave(avisos, quantidade):
+    """Aviso das transações descartadas na ligação por Store Product ID por terem a chave nula (comum aos motores)."""
+    if quantidade:
+        registrar_aviso(avisos, 'aviso', f"{quantidade:,} transações sem Store Product ID não entram nos resgates")
+
+# ==================== COLUNAS DE CALENDÁRIO ====================
+
+ORDEM_DIAS_SEMANA = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira',
+                     'Sexta-feira', 'Sábado', 'Domingo']
+TIPO_DIA_SEMANA = pd.CategoricalDtype(ORDEM_DIAS_SEMANA, ordered=True)
+
+def adicionar_colunas_calendario(df, coluna_data, destinos):
+    """
+    Acrescenta ao DataFrame (no lugar) colunas de calendário tipadas derivadas de uma data.
+    
+    Args:
+        df: DataFrame montado pelo merge (não compartilhado)
+        coluna_data: coluna datetime64 de origem
+        destinos: dict tipo -> nome da coluna; tipos: 'data' (dia, datetime64), 'semana'
+            (period semanal), 'hora' (Int8) e 'dia_semana' (category ordenada em português)
+    """
+    datas = df[coluna_data]
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, errors='coerce', format='ISO8601')
+    
+    for tipo, destino in destinos.items():
+        if tipo == 'data':
+            df[destino] = datas.dt.normalize()
+        elif tipo == 'semana':
+            df[destino] = datas.dt.to_period('W')
+        elif tipo == 'hora':
+            df[destino] = datas.dt.hour.astype('Int8')
+        elif tipo == 'dia_semana':
+            codigos = datas.dt.dayofweek.fillna(-1).to_numpy(dtype=np.int8)
+            df[destino] = pd.Categorical.from_codes(codigos, dtype=TIPO_DIA_SEMANA)
+        else:
+            raise ValueError(f"Tipo de coluna de calendário desconhecido: {tipo}")
+
+# ==================== FILTRO DE PARCEIRO NA ORIGEM ====================
+
+def resolver_partner_id(df_partner, partner_name):
+    """Devolve o Partner ID do parceiro pelo nome, ou None se ele não existir."""
+    if 'Partner Name' not in df_partner.columns or 'Partner ID' not in df_partner.columns:
+        return None
+    
+    ids = df_partner.loc[df_partner['Partner Name'] == partner_name, 'Partner ID']
+    return ids.iloc[0] if len(ids) > 0 else None
+
+def _filtrar_por_ids(df, coluna, ids):
+    """Mantém as linhas cuja coluna está em ids; sem a coluna, devolve o DataFrame inalterado."""
+    if coluna not in df.columns:
+        return df
+    return df[df[coluna].isin(ids)]
+
+def fazer_merge_campanhas_corrigido(df_campaign_user, df_campaign, df_reward, df_product, df_partner, df_user,
+                                    partner_id=None, avisos=None):
+    """
+    LÓGICA RIGOROSA COM INNER JOINS: Constrói DataFrame apenas com dados válidos e completos.
+    
+    Com partner_id, campanhas, participações, rewards e produtos são restritos ao
+    parceiro antes de qualquer join. Resultados vazios e colunas ausentes são
+    registrados em avisos (lista de Aviso); sem lista, não são registrados (caso dos
+    lotes de linhas anexadas, que costumam ser pequenos).
+    """
+    
+    # PASSO 0: Filtro de parceiro na origem
+    if partner_id is not None:
+        df_campaign = _filtrar_por_ids(df_campaign, 'Partner ID', [partner_id])
+        df_campaign_user = _filtrar_por_ids(df_campaign_user, 'Campaign ID', df_campaign['Campaign ID'])
+        df_reward = _filtrar_por_ids(df_reward, 'Campaign ID', df_campaign['Campaign ID'])
+        df_product = _filtrar_por_ids(df_product, 'Product ID', df_reward['Product ID'])
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', [partner_id])
+    
+    # Debug: Verificar dados de entrada
+    if len(df_campaign_user) == 0:
+        registrar_aviso(avisos, 'aviso', "DataFrame campaign_user está vazio")
+        return pd.DataFrame()
+    
+    # PASSO 1: NORMALIZAR COLUNA STATUS E FILTRAR (CORREÇÃO CRÍTICA)
+    if 'Status' in df_campaign_user.columns:
+        # Comparar em lowercase para resolver problema de case sensitivity; só as linhas
+        # completadas são copiadas, já com o Status normalizado
+        completadas = df_campaign_user['Status'].str.lower() == 'completed'
+        df_base = df_campaign_user[completadas].assign(Status='completed')
+        #st.info(f"Missões completadas encontradas: {len(df_base)}")
+    else:
+        df_base = df_campaign_user
+        #st.info(f"Total de registros em campaign_user: {len(df_base)}")
+    
+    if len(df_base) == 0:
+        registrar_aviso(avisos, 'aviso', "Nenhuma missão com status 'completed' encontrada")
+        return pd.DataFrame()
+    
+    # PASSO 2: INNER JOIN com Campaign - OBRIGATÓRIO
+    if 'Campaign ID' in df_base.columns and 'Campaign ID' in df_campaign.columns:
+        before_count = len(df_base)
+        df_base = juntar_com_controle(df_base, df_campaign, on='Campaign ID', how='inner', descricao='campaign_user -> campaign')
+        #st.info(f"Após INNER JOIN com Campaign: {before_count} -> {len(df_base)} registros")
+        
+        if len(df_base) == 0:
+            registrar_aviso(avisos, 'erro', "INNER JOIN com Campaign resultou em DataFrame vazio")
+            return pd.DataFrame()
+    else:
+        registrar_aviso(avisos, 'erro', "Colunas Campaign ID não encontradas para merge")
+        return pd.DataFrame()
+    
+    # PASSO 3: INNER JOIN com Reward - OBRIGATÓRIO  
+    if 'Campaign ID' in df_base.columns and 'Campaign ID' in df_reward.columns:
+        before_count = len(df_base)
+        # Uma linha por reward da campanha: o crescimento é o número de rewards, sem limite
+        df_base = juntar_com_controle(df_base, df_reward, on='Campaign ID', how='inner',
+                                      fator_maximo=SEM_LIMITE_CRESCIMENTO, descricao='campanhas -> reward')
+        
+        if len(df_base) == 0:
+            registrar_aviso(avisos, 'erro', "INNER JOIN com Reward resultou em DataFrame vazio")
+            return pd.DataFrame()
+    else:
+        registrar_aviso(avisos, 'erro', "Colunas Campaign ID não encontradas para merge com Reward")
+        return pd.DataFrame()
+    
+    # PASSO 4: INNER JOIN com Product - OBRIGATÓRIO para obter pontos
+    if 'Product ID' in df_base.columns and 'Product ID' in df_product.columns:
+        before_count = len(df_base)
+        df_base = juntar_com_controle(df_base, df_product[['Product ID', 'Product Points', 'Name', 'Type']], 
+                                      on='Product ID', how='inner', suffixes=('', '_product'),
+                                      descricao='campanhas -> product')
+        
+        if len(df_base) == 0:
+            registrar_aviso(avisos, 'erro', "INNER JOIN com Product resultou em DataFrame vazio")
+            return pd.DataFrame()
+            
+        # Renomear colunas para evitar conflitos
+        if 'Name' in df_base.columns:
+            df_base = df_base.rename(columns={'Name': 'Product Name'})
+    else:
+        registrar_aviso(avisos, 'erro', "Colunas Product ID não encontradas para merge com Product")
+        return pd.DataFrame()
+    
+    # PASSO 5: LEFT JOIN com Partner para obter nome do parceiro (secundário)
+    if 'Partner ID' in df_base.columns and 'Partner ID' in df_partner.columns:
+        before_count = len(df_base)
+        df_base = juntar_com_controle(df_base, df_partner, on='Partner ID', how='left', descricao='campanhas -> partner')
+    
+    # PASSO 6: LEFT JOIN com User para obter dados demográficos (secundário)
+    if 'User ID' in df_base.columns and 'User ID' in df_user.columns:
+        user_cols = ['User ID', 'Username', 'Email', 'Actual Points', 'Faixa_Etaria']
+        if 'Age' in df_user.columns:
+            user_cols.append('Age')
+        before_count = len(df_base)
+        
+        # Verificar se Email já existe para evitar duplicação
+        suffixes = ('', '_user') if 'Email' in df_base.columns else ('', '')
+        df_base = juntar_com_controle(df_base, df_user[user_cols], on='User ID', how='left', suffixes=suffixes,
+                                      descricao='campanhas -> user')
+    
+    return _finalizar_campanhas(df_base, avisos)
+
+def _finalizar_campanhas(df_base, avisos=None):
+    """Passos finais do merge de campanhas (colunas de calendário e checagem dos pontos), comuns aos motores."""
+    # PASSO 7: Adicionar colunas de data processadas (a data já vem tipada do esquema)
+    if 'Campaign User Created At' in df_base.columns:
+        try:
+            adicionar_colunas_calendario(df_base, 'Campaign User Created At', {
+                'data': 'data_participacao', 'semana': 'semana_participacao',
+                'hora': 'hora_participacao', 'dia_semana': 'dia_semana_participacao'})
+        except Exception as e:
+            registrar_aviso(avisos, 'aviso', f"Erro ao processar datas: {e}")
+    
+    # Verificar se temos pontos válidos
+    if 'Product Points' in df_base.columns:
+        total_pontos = df_base['Product Points'].sum()
+    else:
+        registrar_aviso(avisos, 'erro', "Coluna Product Points não encontrada no resultado final")
+    
+    return df_base
+
+def fazer_merge_rewards_corrigido(df_transacoes, df_store_product, df_product, df_partner, df_user, df_user_product=None,
+                                  partner_id=None, avisos=None):
+    """
+    LÓGICA CORRIGIDA: Merge de recompensas com uma linha por transação.
+    
+    A transação é ligada ao produto pela chave Store Product ID; df_user_product (ou a
+    função que o devolve) só é usado, por proximidade de data, quando essa chave não
+    existe (com aviso). Com partner_id,
+    produtos, store products e transações são restritos ao parceiro antes dos joins.
+    """
+    
+    # PASSO 0: Filtro de parceiro na origem
+    if partner_id is not None:
+        df_product = _filtrar_por_ids(df_product, 'Partner ID', [partner_id])
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', [partner_id])
+        if df_store_product is not None and 'Store Product ID' in df_transacoes.columns:
+            df_store_product = _filtrar_por_ids(df_store_product, 'Product ID', df_product['Product ID'])
+            df_transacoes = _filtrar_por_ids(df_transacoes, 'Store Product ID', df_store_product['Store Product ID'])
+    
+    # PASSO 1: Ligar cada transação ao seu store product
+    df_merged = vincular_transacoes_store_product(df_transacoes, df_store_product, df_user_product, avisos)
+    if partner_id is not None:
+        # Sem a chave, a ligação por data precisa ver todos os produtos do usuário; filtrar depois
+        df_merged = _filtrar_por_ids(df_merged, 'Product ID', df_product['Product ID'])
+    if len(df_merged) == 0:
+        return pd.DataFrame()
+    
+    # PASSO 2: Juntar com Product
+    if 'Product ID' in df_merged.columns and 'Product ID' in df_product.columns:
+        df_merged = juntar_com_controle(df_merged, df_product, on='Product ID', how='left', descricao='rewards -> product')
+    
+    # PASSO 3: Juntar com Partner
+    if 'Partner ID' in df_merged.columns and 'Partner ID' in df_partner.columns:
+        df_merged = juntar_com_controle(df_merged, df_partner, on='Partner ID', how='left', descricao='rewards -> partner')
+    
+    # PASSO 4: Juntar com User (GERENCIAMENTO INTELIGENTE DE EMAIL)
+    if 'User ID' in df_merged.columns and 'User ID' in df_user.columns:
+        user_cols = ['User ID', 'Username', 'Actual Points', 'Faixa_Etaria']
+        
+        # Adicionar Email apenas se não existir para evitar conflitos
+        if 'Email' not in df_merged.columns:
+            user_cols.append('Email')
+        
+        if 'Age' in df_user.columns:
+            user_cols.append('Age')
+            
+        df_final = juntar_com_controle(df_merged, df_user[user_cols], on='User ID', how='left', descricao='rewards -> user')
+    else:
+        df_final = df_merged
+    
+    return df_final
+
+def fazer_merge_boosts_corrigido(df_subscription, df_boost, df_partner, df_user, partner_id=None):
+    """
+    LÓGICA CORRIGIDA: Merge de boosts baseado em subscriptions.
+    
+    Com partner_id, boosts e subscriptions são restritos ao parceiro antes dos joins.
+    """
+    
+    # PASSO 0: Filtro de parceiro na origem
+    if partner_id is not None:
+        df_boost = _filtrar_por_ids(df_boost, 'Partner ID', [partner_id])
+        df_subscription = _filtrar_por_ids(df_subscription, 'Boost ID', df_boost['Boost ID'])
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', [partner_id])
+    
+    # PASSO 1: Começar com subscription como base
+    df_merged = juntar_com_controle(df_subscription, df_boost, on='Boost ID', how='left', descricao='subscription -> boost')
+    
+    # PASSO 2: Juntar com Partner
+    if 'Partner ID' in df_merged.columns and 'Partner ID' in df_partner.columns:
+        df_merged = juntar_com_controle(df_merged, df_partner, on='Partner ID', how='left', descricao='boosts -> partner')
+    
+    # PASSO 3: Juntar com User
+    if 'User ID' in df_merged.columns and 'User ID' in df_user.columns:
+        user_cols = ['User ID', 'Username', 'Actual Points', 'Faixa_Etaria']
+        if 'Age' in df_user.columns:
+            user_cols.append('Age')
+        df_final = juntar_com_controle(df_merged, df_user[user_cols], on='User ID', how='left', descricao='boosts -> user')
+    else:
+        df_final = df_merged
+    
+    return _finalizar_boosts(df_final)
+
+def _finalizar_boosts(df_final):
+    """Colunas de calendário do merge de boosts, comuns aos motores."""
+    # PASSO 4: Processamento de datas
+    if 'Subscription Created At' in df_final.columns:
+        adicionar_colunas_calendario(df_final, 'Subscription Created At', {
+            'semana': 'semana_boost', 'data': 'data_boost', 'dia_semana': 'dia_semana'})
+        df_final['data_transacao'] = df_final['data_boost']
+    
+    # Início da assinatura, usado pelas séries temporais de boosts
+    if 'Start Date' in df_final.columns:
+        adicionar_colunas_calendario(df_final, 'Start Date', {
+            'data': 'data_inicio', 'semana': 'semana_inicio', 'hora': 'hora_inicio'})
+    
+    return df_final
@@ -0,0 +1,284 @@
+"""Merges de rewards, boosts e campanhas como consultas DuckDB (MOTOR_DADOS='duckdb')."""
+
+import pandas as pd
+
+from .merges import (
+    SEM_LIMITE_CRESCIMENTO,
+    verificar_crescimento_join,
+    nomes_merge,
+    restaurar_tipos,
+    registrar_aviso,
+    _avisar_transacoes_sem_chave,
+    _filtrar_por_ids,
+    _finalizar_campanhas,
+    _finalizar_boosts,
+    fazer_merge_rewards_corrigido,
+)
+
+# ==================== CADEIAS DE JOINS EM SQL ====================
+
+def _identificador(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+class _CadeiaJoins:
+    """
+    Sequência de joins com a semântica de pd.merge(on=chave), montada em DuckDB sobre os
+    DataFrames do registro (lidos sem cópia).
+
+    Chaves nulas casam entre si (IS NOT DISTINCT FROM), como no pd.merge; nomes de
+    colunas e sufixos seguem as regras do pd.merge; a ordem das linhas segue a da tabela
+    base e, para a mesma linha, a de cada tabela juntada. Cada join fica numa tabela
+    temporária do DuckDB; antes de criá-la, o tamanho do resultado é calculado pelas
+    contagens de cada chave nos dois lados e o join é recusado, como em
+    juntar_com_controle, se crescer além do fator.
+    """
+
+    def __init__(self, conexao, df_base, filtro=None, constantes=None):
+        """
+        Args:
+            conexao: conexão DuckDB (uma por merge)
+            df_base: tabela da esquerda do primeiro join
+            filtro: condição SQL sobre as colunas de df_base
+            constantes: dict coluna -> valor que substitui a coluna da base no resultado
+        """
+        self.conexao = conexao
+        self._tabelas = 0
+        self._etapa = 0
+        self._internas = 0
+        alias = self._registrar(df_base, list(df_base.columns), filtro)
+        constantes = constantes or {}
+        # (nome no resultado, expressão SQL sobre a etapa atual, dtype a restaurar)
+        self.colunas = []
+        selecao = []
+        for coluna in df_base.columns:
+            if coluna in constantes:
+                valor = pd.Series([constantes[coluna]])
+                self.colunas.append((coluna, "'" + str(constantes[coluna]).replace("'", "''") + "'", valor.dtype))
+            else:
+                interna = self._nova_interna()
+                selecao.append(f'{_identificador(coluna)} AS {interna}')
+                self.colunas.append((coluna, interna, df_base[coluna].dtype))
+        selecao.append('__posicao AS p0')
+        self.conexao.execute(f'CREATE TEMP TABLE s0 AS SELECT {", ".join(selecao)} FROM {alias}')
+        self._linhas = self.conexao.execute('SELECT count(*) FROM s0').fetchone()[0]
+
+    def _registrar(self, df, colunas, filtro=None):
+        alias = f't{self._tabelas}'
+        self._tabelas += 1
+        self.conexao.register(f'_{alias}', df)
+        # Posição original de cada linha, para ordenar o resultado como o pd.merge
+        selecao = ', '.join(_identificador(coluna) for coluna in colunas)
+        self.conexao.execute(
+            f'CREATE TEMP VIEW {alias} AS SELECT {selecao}, __posicao FROM _{alias} '
+            f'POSITIONAL JOIN (SELECT range AS __posicao FROM range({len(df)}))'
+            + (f' WHERE {filtro}' if filtro else ''))
+        return alias
+
+    def _nova_interna(self):
+        self._internas += 1
+        return f'c{self._internas}'
+
+    def __contains__(self, coluna):
+        return any(nome == coluna for nome, _, _ in self.colunas)
+
+    def __len__(self):
+        return self._linhas
+
+    def juntar(self, df_direita, chave, how='inner', colunas=None, sufixos=('_x', '_y'), fator_maximo=None,
+               descricao=None):
+        """
+        Acrescenta um join com df_direita[colunas] (padrão: todas) pela chave.
+
+        Raises:
+            ErroCardinalidadeJoin: se o join multiplicaria as linhas além do fator
+        """
+        colunas = list(colunas if colunas is not None else df_direita.columns)
+        expressao_chave = next((expressao for nome, expressao, _ in self.colunas if nome == chave), None)
+        if expressao_chave is None or chave not in colunas:
+            raise KeyError(chave)
+        nomes_esquerda, nomes_direita = nomes_merge([nome for nome, _, _ in self.colunas], colunas, chave, sufixos)
+
+        alias = self._registrar(df_direita, colunas)
+        chave_direita = _identificador(chave)
+        atual, proxima = f's{self._etapa}', f's{self._etapa + 1}'
+
+        # Linhas resultantes = soma, por chave, das ocorrências na esquerda vezes as na direita
+        # (sem par na direita: 1 linha num left join, nenhuma num inner join)
+        sem_par = 1 if how == 'left' else 0
+        linhas = self.conexao.execute(
+            f'SELECT coalesce(sum(e.n * coalesce(d.n, {sem_par})), 0) '
+            f'FROM (SELECT {expressao_chave} AS k, count(*) AS n FROM {atual} GROUP BY 1) e '
+            f'LEFT JOIN (SELECT {chave_direita} AS k, count(*) AS n FROM {alias} GROUP BY 1) d '
+            f'ON e.k IS NOT DISTINCT FROM d.k').fetchone()[0]
+        verificar_crescimento_join(self._linhas, int(linhas), fator_maximo, descricao or chave)
+
+        novas = []
+        selecao = ['e.*']
+        for coluna, nome in nomes_direita.items():
+            interna = self._nova_interna()
+            selecao.append(f'd.{_identificador(coluna)} AS {interna}')
+            novas.append((nome, interna, df_direita[coluna].dtype))
+        self._etapa += 1
+        selecao.append(f'd.__posicao AS p{self._etapa}')
+        juncao = 'JOIN' if how == 'inner' else 'LEFT JOIN'
+        self.conexao.execute(
+            f'CREATE TEMP TABLE {proxima} AS SELECT {", ".join(selecao)} FROM {atual} e '
+            f'{juncao} {alias} d ON e.{expressao_chave} IS NOT DISTINCT FROM d.{chave_direita}')
+        self.conexao.execute(f'DROP TABLE {atual}')
+        self._linhas = int(linhas)
+
+        self.colunas = [(nomes_esquerda[nome], expressao, tipo) for nome, expressao, tipo in self.colunas]
+        self.colunas += novas
+
+    def renomear(self, nomes):
+        """Renomeia colunas do resultado (como DataFrame.rename(columns=nomes))."""
+        self.colunas = [(nomes.get(nome, nome), expressao, tipo) for nome, expressao, tipo in self.colunas]
+
+    def materializar(self):
+        """Lê a última etapa e devolve o DataFrame com os dtypes das colunas de origem."""
+        selecao = ', '.join(f'{expressao} AS {_identificador(nome)}' for nome, expressao, _ in self.colunas)
+        ordem = ', '.join(f'p{etapa}' for etapa in range(self._etapa + 1))
+        df = self.conexao.execute(f'SELECT {selecao} FROM s{self._etapa} ORDER BY {ordem}').df()
+        return restaurar_tipos(df, {nome: tipo for nome, _, tipo in self.colunas})
+
+def _conectar():
+    # Importado aqui: o pacote só é carregado quando o motor DuckDB é usado
+    import duckdb
+    return duckdb.connect()
+
+# ==================== MERGES ====================
+
+def fazer_merge_campanhas_duckdb(df_campaign_user, df_campaign, df_reward, df_product, df_partner, df_user,
+                                 partner_id=None, avisos=None):
+    """
+    fazer_merge_campanhas_corrigido em DuckDB: mesmas colunas, avisos e controle de
+    cardinalidade, sem DataFrames intermediários no pandas.
+    """
+    # PASSO 0: Filtro de parceiro na origem (o mesmo do motor pandas)
+    if partner_id is not None:
+        df_campaign = _filtrar_por_ids(df_campaign, 'Partner ID', [partner_id])
+        df_campaign_user = _filtrar_por_ids(df_campaign_user, 'Campaign ID', df_campaign['Campaign ID'])
+        df_reward = _filtrar_por_ids(df_reward, 'Campaign ID', df_campaign['Campaign ID'])
+        df_product = _filtrar_por_ids(df_product, 'Product ID', df_reward['Product ID'])
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', [partner_id])
+
+    if len(df_campaign_user) == 0:
+        registrar_aviso(avisos, 'aviso', "DataFrame campaign_user está vazio")
+        return pd.DataFrame()
+
+    with _conectar() as conexao:
+        # PASSO 1: só as missões completadas, com o Status normalizado
+        if 'Status' in df_campaign_user.columns:
+            cadeia = _CadeiaJoins(conexao, df_campaign_user, filtro="lower(\"Status\") = 'completed'",
+                                  constantes={'Status': 'completed'})
+        else:
+            cadeia = _CadeiaJoins(conexao, df_campaign_user)
+
+        if len(cadeia) == 0:
+            registrar_aviso(avisos, 'aviso', "Nenhuma missão com status 'completed' encontrada")
+            return pd.DataFrame()
+
+        # PASSOS 2 a 4: INNER JOINs obrigatórios com Campaign, Reward (uma linha por reward, sem limite) e Product
+        obrigatorios = [
+            (df_campaign, 'Campaign ID', None, None, 'campaign_user -> campaign', 'Campaign',
+             "Colunas Campaign ID não encontradas para merge"),
+            (df_reward, 'Campaign ID', None, SEM_LIMITE_CRESCIMENTO, 'campanhas -> reward', 'Reward',
+             "Colunas Campaign ID não encontradas para merge com Reward"),
+            (df_product, 'Product ID', ['Product ID', 'Product Points', 'Name', 'Type'], None, 'campanhas -> product',
+             'Product', "Colunas Product ID não encontradas para merge com Product"),
+        ]
+        for df_direita, chave, colunas, fator_maximo, descricao, nome, erro_colunas in obrigatorios:
+            if chave not in cadeia or chave not in df_direita.columns:
+                registrar_aviso(avisos, 'erro', erro_colunas)
+                return pd.DataFrame()
+            sufixos = ('', '_product') if nome == 'Product' else ('_x', '_y')
+            cadeia.juntar(df_direita, chave, how='inner', colunas=colunas, sufixos=sufixos,
+                          fator_maximo=fator_maximo, descricao=descricao)
+            if len(cadeia) == 0:
+                registrar_aviso(avisos, 'erro', f"INNER JOIN com {nome} resultou em DataFrame vazio")
+                return pd.DataFrame()
+        cadeia.renomear({'Name': 'Product Name'})
+
+        # PASSO 5: LEFT JOIN com Partner
+        if 'Partner ID' in cadeia and 'Partner ID' in df_partner.columns:
+            cadeia.juntar(df_partner, 'Partner ID', how='left', descricao='campanhas -> partner')
+
+        # PASSO 6: LEFT JOIN com User
+        if 'User ID' in cadeia and 'User ID' in df_user.columns:
+            user_cols = ['User ID', 'Username', 'Email', 'Actual Points', 'Faixa_Etaria']
+            if 'Age' in df_user.columns:
+                user_cols.append('Age')
+            sufixos = ('', '_user') if 'Email' in cadeia else ('', '')
+            cadeia.juntar(df_user, 'User ID', how='left', colunas=user_cols, sufixos=sufixos,
+                          descricao='campanhas -> user')
+
+        df_base = cadeia.materializar()
+
+    return _finalizar_campanhas(df_base, avisos)
+
+def fazer_merge_rewards_duckdb(df_transacoes, df_store_product, df_product, df_partner, df_user, df_user_product=None,
+                               partner_id=None, avisos=None):
+    """
+    fazer_merge_rewards_corrigido em DuckDB. Sem a chave Store Product ID a
+    ligação é por data mais próxima (merge_asof) e fica com o motor pandas.
+    """
+    if (df_store_product is None or 'Store Product ID' not in df_transacoes.columns
+            or 'Store Product ID' not in df_store_product.columns):
+        return fazer_merge_rewards_corrigido(df_transacoes, df_store_product, df_product, df_partner, df_user,
+                                             df_user_product, partner_id=partner_id, avisos=avisos)
+
+    # PASSO 0: Filtro de parceiro na origem; com a chave, as transações já ficam só as do parceiro
+    if partner_id is not None:
+        df_product = _filtrar_por_ids(df_product, 'Partner ID', [partner_id])
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', [partner_id])
+        df_store_product = _filtrar_por_ids(df_store_product, 'Product ID', df_product['Product ID'])
+        df_transacoes = _filtrar_por_ids(df_transacoes, 'Store Product ID', df_store_product['Store Product ID'])
+
+    _avisar_transacoes_sem_chave(avisos, int(df_transacoes['Store Product ID'].isna().sum()))
+    with _conectar() as conexao:
+        # PASSO 1: Ligar cada transação ao seu store product
+        cadeia = _CadeiaJoins(conexao, df_transacoes)
+        cadeia.juntar(df_store_product, 'Store Product ID', how='inner', fator_maximo=1.0,
+                      descricao='transação -> store_product')
+        if len(cadeia) == 0:
+            return pd.DataFrame()
+
+        # PASSOS 2 e 3: Product e Partner
+        if 'Product ID' in cadeia and 'Product ID' in df_product.columns:
+            cadeia.juntar(df_product, 'Product ID', how='left', descricao='rewards -> product')
+        if 'Partner ID' in cadeia and 'Partner ID' in df_partner.columns:
+            cadeia.juntar(df_partner, 'Partner ID', how='left', descricao='rewards -> partner')
+
+        # PASSO 4: User, sem duplicar o Email
+        if 'User ID' in cadeia and 'User ID' in df_user.columns:
+            user_cols = ['User ID', 'Username', 'Actual Points', 'Faixa_Etaria']
+            if 'Email' not in cadeia:
+                user_cols.append('Email')
+            if 'Age' in df_user.columns:
+                user_cols.append('Age')
+            cadeia.juntar(df_user, 'User ID', how='left', colunas=user_cols, descricao='rewards -> user')
+
+        return cadeia.materializar()
+
+def fazer_merge_boosts_duckdb(df_subscription, df_boost, df_partner, df_user, partner_id=None):
+    """fazer_merge_boosts_corrigido em DuckDB."""
+    # PASSO 0: Filtro de parceiro na origem
+    if partner_id is not None:
+        df_boost = _filtrar_por_ids(df_boost, 'Partner ID', [partner_id])
+        df_subscription = _filtrar_por_ids(df_subscription, 'Boost ID', df_boost['Boost ID'])
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', [partner_id])
+
+    with _conectar() as conexao:
+        # PASSOS 1 a 3: subscription -> boost -> partner -> user
+        cadeia = _CadeiaJoins(conexao, df_subscription)
+        cadeia.juntar(df_boost, 'Boost ID', how='left', descricao='subscription -> boost')
+        if 'Partner ID' in cadeia and 'Partner ID' in df_partner.columns:
+            cadeia.juntar(df_partner, 'Partner ID', how='left', descricao='boosts -> partner')
+        if 'User ID' in cadeia and 'User ID' in df_user.columns:
+            user_cols = ['User ID', 'Username', 'Actual Points', 'Faixa_Etaria']
+            if 'Age' in df_user.columns:
+                user_cols.append('Age')
+            cadeia.juntar(df_user, 'User ID', how='left', colunas=user_cols, descricao='boosts -> user')
+        df_final = cadeia.materializar()
+
+    return _finalizar_boosts(df_final)
@@ -0,0 +1,494 @@
+"""Carga dos CSVs e merges de rewards, boosts e campanhas com LazyFrames Polars (MOTOR_DADOS='polars')."""
+
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .esquemas import ESQUEMAS, LIMITES_FAIXA_ETARIA, ROTULOS_FAIXA_ETARIA, _adicionar_pontos_produto
+from .merges import (
+    SEM_LIMITE_CRESCIMENTO,
+    verificar_crescimento_join,
+    nomes_merge,
+    restaurar_tipos,
+    registrar_aviso,
+    _avisar_transacoes_sem_chave,
+    _finalizar_campanhas,
+    _finalizar_boosts,
+    fazer_merge_rewards_corrigido,
+)
+
+# O pacote polars é importado dentro das funções: só é carregado quando o motor é usado
+
+# ==================== LEITURA DOS CSVs ====================
+
+# Valores lidos como ausentes pelo read_csv do pandas (na_values padrão)
+VALORES_AUSENTES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+def _tipo_polars(tipo):
+    import polars as pl
+    return {str: pl.String, 'float64': pl.Float64}[tipo]
+
+def _pontos_produto(lazy):
+    """_adicionar_pontos_produto como expressão: 'points' do Metadata, com o fallback de aspas simples."""
+    import polars as pl
+    if 'Metadata' not in lazy.collect_schema().names():
+        return lazy.with_columns(pl.lit(0).alias('Product Points'))
+
+    def pontos(texto):
+        return texto.str.json_path_match('$.points').cast(pl.Float64, strict=False)
+
+    metadata = pl.col('Metadata')
+    return lazy.with_columns(
+        pl.coalesce(pontos(metadata), pontos(metadata.str.replace_all("'", '"', literal=True)), pl.lit(0.0))
+        .alias('Product Points'))
+
+# Transformações 'pos' de ESQUEMAS com versão Polars; as demais rodam no DataFrame pandas
+POS_POLARS = {
+    _adicionar_pontos_produto: _pontos_produto,
+}
+
+def varrer_csv(caminho_csv, esquema):
+    """
+    LazyFrame do CSV com o esquema aplicado, como ler_csv_com_esquema: só as colunas do
+    esquema presentes no arquivo são lidas (projeção no scan_csv), com os mesmos dtypes,
+    datas (ISO 8601, inválidas viram nulo) e renomeações.
+
+    Args:
+        caminho_csv: caminho do arquivo ou buffer binário com cabeçalho e linhas
+        esquema: entrada de ESQUEMAS
+
+    Returns:
+        LazyFrame: tabela a coletar; a transformação 'pos' só entra se estiver em POS_POLARS
+    """
+    import polars as pl
+    cabecalho = pl.read_csv(caminho_csv, n_rows=0).columns
+    if hasattr(caminho_csv, 'seek'):
+        caminho_csv.seek(0)
+    # Ordem do arquivo, como no usecols do read_csv
+    colunas = [col for col in cabecalho if col in esquema['colunas']]
+    dtypes = {col: _tipo_polars(tipo) for col, tipo in esquema.get('dtypes', {}).items() if col in colunas}
+    datas = {destino: origem for destino, origem in esquema.get('datas', {}).items() if origem in colunas}
+
+    # Inferência sobre o arquivo inteiro, como o read_csv (uma coluna só decimal no fim continua float)
+    lazy = pl.scan_csv(caminho_csv, schema_overrides=dtypes, null_values=VALORES_AUSENTES,
+                       infer_schema_length=None, try_parse_dates=False).select(colunas)
+
+    conversoes = []
+    for destino, origem in datas.items():
+        coluna = pl.col(origem)
+        if lazy.collect_schema()[origem] == pl.String:
+            coluna = coluna.str.to_datetime(time_unit='us', strict=False)
+        conversoes.append(coluna.alias(destino))
+    if conversoes:
+        lazy = lazy.with_columns(conversoes)
+
+    lazy = lazy.rename(esquema.get('renomear', {}), strict=False)
+
+    if esquema.get('pos') in POS_POLARS:
+        lazy = POS_POLARS[esquema['pos']](lazy)
+    return lazy
+
+def ler_csv_polars(caminho_csv, esquema):
+    """
+    ler_csv_com_esquema com leitura e limpeza em Polars (multi-thread); a conversão
+    para pandas acontece uma vez, no fim.
+
+    Returns:
+        DataFrame: a mesma tabela que ler_csv_com_esquema devolveria
+    """
+    df = varrer_csv(caminho_csv, esquema).collect().to_pandas()
+    if 'pos' in esquema and esquema['pos'] not in POS_POLARS:
+        df = esquema['pos'](df)
+    return df
+
+def _faixa_etaria(lazy):
+    """_derivar_faixa_etaria como expressões: Faixa_Etaria é um Enum, que chega ao pandas como o pd.cut (ordenado)."""
+    import polars as pl
+    if 'Birth Date' not in lazy.collect_schema().names():
+        return lazy
+    idade = pl.lit(datetime.now().year) - pl.col('Birth Date').dt.year()
+    faixas = zip(LIMITES_FAIXA_ETARIA, LIMITES_FAIXA_ETARIA[1:], ROTULOS_FAIXA_ETARIA)
+    inicio, fim, rotulo = next(faixas)
+    faixa = pl.when((idade >= inicio) & (idade < fim)).then(pl.lit(rotulo))
+    for inicio, fim, rotulo in faixas:
+        faixa = faixa.when((idade >= inicio) & (idade < fim)).then(pl.lit(rotulo))
+    return lazy.with_columns(idade.alias('Age'),
+                             faixa.otherwise(None).cast(pl.Enum(ROTULOS_FAIXA_ETARIA)).alias('Faixa_Etaria'))
+
+def varrer_tabela(nome_tabela, caminho_csv=None):
+    """
+    LazyFrame da tabela base como carregar_tabela a devolveria (sem snapshot), para os
+    merges lazy: nada é lido até a coleta, e filtros e projeções do plano chegam ao scan_csv.
+
+    Args:
+        nome_tabela: chave em ESQUEMAS
+        caminho_csv: caminho ou buffer com o CSV; padrão o arquivo da tabela em DIRETORIO_DADOS
+    """
+    import polars as pl
+    esquema = ESQUEMAS[nome_tabela]
+    lazy = varrer_csv(caminho_csv or os.path.join(config.DIRETORIO_DADOS, esquema['arquivo']), esquema)
+    if 'pos' in esquema and esquema['pos'] not in POS_POLARS:
+        lazy = pl.from_pandas(esquema['pos'](lazy.collect().to_pandas())).lazy()
+    if nome_tabela == 'user':
+        lazy = _faixa_etaria(lazy)
+    return lazy
+
+# ==================== CADEIAS DE JOINS LAZY ====================
+
+# Coluna inteira de um LazyFrame de entrada: como no pandas, fica float64 no resultado se a
+# entrada tiver nulos nela (contagem de nulos coletada com as dos joins)
+_InteiraDaEntrada = namedtuple('_InteiraDaEntrada', ['contagem', 'coluna'])
+
+def _como_lazy(tabela):
+    """
+    LazyFrame de uma entrada dos merges e os dtypes pandas a restaurar no resultado:
+    os de um DataFrame pandas (linhas anexadas, chamadas diretas); nenhum para um LazyFrame.
+    """
+    import polars as pl
+    if isinstance(tabela, pl.LazyFrame):
+        return tabela, {}
+    return pl.from_pandas(tabela).lazy(), dict(tabela.dtypes.items())
+
+def _colunas(tabela):
+    import polars as pl
+    if isinstance(tabela, pl.LazyFrame):
+        return tabela.collect_schema().names()
+    return list(tabela.columns)
+
+def _para_pandas(tabela):
+    import polars as pl
+    if isinstance(tabela, pl.LazyFrame):
+        return tabela.collect().to_pandas()
+    return tabela
+
+def _filtrar_por_ids(tabela, coluna, ids):
+    """
+    merges._filtrar_por_ids no plano lazy: ids é um valor ou uma tabela com a mesma coluna
+    (semi join; chaves nulas casam entre si, como no isin).
+    """
+    import polars as pl
+    lazy, _ = _como_lazy(tabela)
+    if coluna not in _colunas(lazy):
+        return lazy
+    if isinstance(ids, pl.LazyFrame):
+        return lazy.join(ids.select(coluna), on=coluna, how='semi', nulls_equal=True, maintain_order='left')
+    return lazy.filter(pl.col(coluna) == ids)
+
+def _contagem_join(esquerda, direita, chave, how):
+    """
+    Plano de uma linha com as linhas da esquerda e do resultado do join, calculadas pelas
+    contagens de cada chave nos dois lados (como em juntar_com_controle).
+    """
+    import polars as pl
+    por_chave = pl.len().cast(pl.Int64)
+    contagem_esquerda = esquerda.group_by(chave).agg(por_chave.alias('__esquerda'))
+    contagem_direita = direita.group_by(chave).agg(por_chave.alias('__direita'))
+    # Sem par na direita: 1 linha num left join, nenhuma num inner join
+    sem_par = 1 if how == 'left' else 0
+    return contagem_esquerda.join(contagem_direita, on=chave, how='left', nulls_equal=True).select(
+        pl.col('__esquerda').sum().alias('esquerda'),
+        (pl.col('__esquerda') * pl.col('__direita').fill_null(sem_par)).sum().alias('linhas'))
+
+class _CadeiaJoins:
+    """
+    Sequência de joins com a semântica de pd.merge(on=chave), montada como um único
+    plano lazy Polars: com as entradas vindas de varrer_tabela, o filtro de parceiro e
+    as colunas usadas chegam até o scan_csv.
+
+    Chaves nulas casam entre si (nulls_equal), como no pd.merge; nomes de colunas e
+    sufixos seguem as regras do pd.merge; a ordem das linhas segue a da tabela base e,
+    para a mesma linha, a de cada tabela juntada (maintain_order='left_right').
+
+    Cada join guarda o plano da previsão do seu tamanho, feita pelas contagens de cada
+    chave nos dois lados. Em materializar, as previsões são coletadas juntas (collect_all
+    calcula uma vez os subplanos comuns, só com as colunas de chave) e conferidas na ordem
+    dos joins: um join que cresceria além do fator é recusado, como em juntar_com_controle,
+    antes de o plano final ser coletado.
+    """
+
+    def __init__(self, base):
+        """
+        Args:
+            base: tabela da esquerda do primeiro join (LazyFrame ou DataFrame pandas)
+        """
+        # Planos de uma linha coletados juntos em conferir
+        self._contagens = []
+        self._lazy, tipos = _como_lazy(base)
+        # Nome no resultado -> dtype pandas a restaurar (None: o da conversão do Polars)
+        self._tipos = self._tipos_entrada(self._lazy, tipos)
+        # Conferências na ordem da cadeia: ('crescimento', contagem, fator, descrição) ou
+        # ('linhas', contagem, nível, mensagem)
+        self._verificacoes = []
+        # Contagem com as linhas do plano atual (None depois de um filtro)
+        self._contagem_atual = None
+        self._valores = None
+
+    def _tipos_entrada(self, lazy, tipos):
+        """dtypes a restaurar das colunas de uma entrada; inteiras de LazyFrames como _InteiraDaEntrada."""
+        import polars as pl
+        esquema = lazy.collect_schema()
+        inteiras = [coluna for coluna, tipo in esquema.items() if coluna not in tipos and tipo.is_integer()]
+        if inteiras:
+            self._contagens.append(lazy.select(pl.col(inteiras).null_count()))
+        contagem = len(self._contagens) - 1
+        return {coluna: _InteiraDaEntrada(contagem, coluna) if coluna in inteiras else tipos.get(coluna)
+                for coluna in esquema.names()}
+
+    def __contains__(self, coluna):
+        return coluna in self._tipos
+
+    def filtrar(self, filtro, constantes=None):
+        """
+        Mantém as linhas que satisfazem filtro (expressão Polars).
+
+        Args:
+            constantes: dict coluna -> valor que substitui a coluna no resultado
+        """
+        import polars as pl
+        self._lazy = self._lazy.filter(filtro)
+        for coluna, valor in (constantes or {}).items():
+            self._lazy = self._lazy.with_columns(pl.lit(valor).alias(coluna))
+            self._tipos[coluna] = pd.Series([valor]).dtype
+        self._contagem_atual = None
+
+    def exigir_linhas(self, nivel=None, mensagem=None):
+        """Se o plano até aqui não tiver linhas, materializar registra o aviso (se houver) e devolve None."""
+        import polars as pl
+        if self._contagem_atual is None:
+            self._contagens.append(self._lazy.select(pl.len().alias('linhas')))
+            self._contagem_atual = len(self._contagens) - 1
+        self._verificacoes.append(('linhas', self._contagem_atual, nivel, mensagem))
+
+    def contar(self, expressao):
+        """
+        Agrega expressao (um valor) sobre o plano atual junto com as contagens dos joins.
+
+        Returns:
+            int: índice para contagem, depois de conferir
+        """
+        self._contagens.append(self._lazy.select(expressao.alias('valor')))
+        return len(self._contagens) - 1
+
+    def contagem(self, indice):
+        """Valor de uma agregação de contar (disponível depois de conferir)."""
+        return self._valores[indice]['valor']
+
+    def juntar(self, df_direita, chave, how='inner', colunas=None, sufixos=('_x', '_y'), fator_maximo=None,
+               descricao=None):
+        """
+        Acrescenta um join com df_direita[colunas] (padrão: todas) pela chave; o crescimento
+        é conferido em materializar.
+        """
+        direita, tipos_direita = _como_lazy(df_direita)
+        colunas = list(colunas if colunas is not None else _colunas(direita))
+        tipos_direita = self._tipos_entrada(direita.select(colunas), tipos_direita)
+        if chave not in self._tipos or chave not in colunas:
+            raise KeyError(chave)
+        nomes_esquerda, nomes_direita = nomes_merge(list(self._tipos), colunas, chave, sufixos)
+
+        self._contagens.append(_contagem_join(self._lazy, direita.select(chave), chave, how))
+        self._contagem_atual = len(self._contagens) - 1
+        self._verificacoes.append(('crescimento', self._contagem_atual, fator_maximo, descricao or chave))
+
+        direita = direita.select([chave] + list(nomes_direita)).rename(nomes_direita)
+        self._lazy = self._lazy.rename(nomes_esquerda).join(direita, on=chave, how=how, nulls_equal=True,
+                                                            maintain_order='left_right')
+        tipos = {nomes_esquerda[nome]: tipo for nome, tipo in self._tipos.items()}
+        tipos.update((nome, tipos_direita[coluna]) for coluna, nome in nomes_direita.items())
+        self._tipos = tipos
+
+    def renomear(self, nomes):
+        """Renomeia colunas do resultado (como DataFrame.rename(columns=nomes))."""
+        nomes = {antigo: novo for antigo, novo in nomes.items() if antigo in self._tipos}
+        self._lazy = self._lazy.rename(nomes)
+        self._tipos = {nomes.get(nome, nome): tipo for nome, tipo in self._tipos.items()}
+
+    def conferir(self, avisos=None):
+        """
+        Coleta as contagens e as confere na ordem da cadeia.
+
+        Returns:
+            bool: False se uma exigência de linhas falhou (com o aviso registrado)
+
+        Raises:
+            ErroCardinalidadeJoin: se algum join multiplicaria as linhas além do fator
+        """
+        import polars as pl
+        contagens = self._valores = [contagem.row(0, named=True) for contagem in pl.collect_all(self._contagens)]
+        self._tipos = {nome: (np.dtype('float64') if contagens[tipo.contagem][tipo.coluna] else None)
+                       if isinstance(tipo, _InteiraDaEntrada) else tipo
+                       for nome, tipo in self._tipos.items()}
+        for tipo, indice, primeiro, segundo in self._verificacoes:
+            if tipo == 'crescimento':
+                verificar_crescimento_join(contagens[indice]['esquerda'], contagens[indice]['linhas'], primeiro, segundo)
+            elif contagens[indice]['linhas'] == 0:
+                if segundo:
+                    registrar_aviso(avisos, primeiro, segundo)
+                return False
+        return True
+
+    def materializar(self, avisos=None):
+        """
+        Confere as contagens e coleta o plano, devolvendo o DataFrame pandas com os dtypes
+        das colunas de origem.
+
+        Returns:
+            DataFrame ou None: None se uma exigência de linhas falhou
+
+        Raises:
+            ErroCardinalidadeJoin: se algum join multiplicaria as linhas além do fator
+        """
+        if not self.conferir(avisos):
+            return None
+        df = self._lazy.collect().to_pandas()
+        return restaurar_tipos(df, {nome: tipo for nome, tipo in self._tipos.items() if tipo is not None})
+
+# ==================== MERGES ====================
+
+# As tabelas de entrada podem ser LazyFrames (registro com MOTOR_DADOS='polars', chaves
+# originais) ou DataFrames pandas; o resultado é sempre um DataFrame pandas.
+
+def fazer_merge_campanhas_polars(df_campaign_user, df_campaign, df_reward, df_product, df_partner, df_user,
+                                 partner_id=None, avisos=None):
+    """
+    fazer_merge_campanhas_corrigido num plano lazy Polars: mesmas colunas, avisos e
+    controle de cardinalidade, coletado uma vez no fim.
+    """
+    import polars as pl
+
+    # PASSO 0: Filtro de parceiro na origem (o mesmo do motor pandas), dentro do plano
+    if partner_id is not None:
+        df_campaign = _filtrar_por_ids(df_campaign, 'Partner ID', partner_id)
+        df_campaign_user = _filtrar_por_ids(df_campaign_user, 'Campaign ID', df_campaign)
+        df_reward = _filtrar_por_ids(df_reward, 'Campaign ID', df_campaign)
+        df_product = _filtrar_por_ids(df_product, 'Product ID', df_reward)
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', partner_id)
+
+    cadeia = _CadeiaJoins(df_campaign_user)
+    cadeia.exigir_linhas('aviso', "DataFrame campaign_user está vazio")
+
+    # PASSO 1: só as missões completadas, com o Status normalizado
+    if 'Status' in cadeia:
+        cadeia.filtrar(pl.col('Status').cast(pl.String).str.to_lowercase() == 'completed',
+                       constantes={'Status': 'completed'})
+    cadeia.exigir_linhas('aviso', "Nenhuma missão com status 'completed' encontrada")
+
+    # PASSOS 2 a 4: INNER JOINs obrigatórios com Campaign, Reward (uma linha por reward, sem limite) e Product
+    obrigatorios = [
+        (df_campaign, 'Campaign ID', None, None, 'campaign_user -> campaign', 'Campaign',
+         "Colunas Campaign ID não encontradas para merge"),
+        (df_reward, 'Campaign ID', None, SEM_LIMITE_CRESCIMENTO, 'campanhas -> reward', 'Reward',
+         "Colunas Campaign ID não encontradas para merge com Reward"),
+        (df_product, 'Product ID', ['Product ID', 'Product Points', 'Name', 'Type'], None, 'campanhas -> product',
+         'Product', "Colunas Product ID não encontradas para merge com Product"),
+    ]
+    for df_direita, chave, colunas, fator_maximo, descricao, nome, erro_colunas in obrigatorios:
+        if chave not in cadeia or chave not in _colunas(df_direita):
+            # Os avisos de linhas vazias antes desta etapa têm precedência, como no motor pandas
+            if cadeia.conferir(avisos):
+                registrar_aviso(avisos, 'erro', erro_colunas)
+            return pd.DataFrame()
+        sufixos = ('', '_product') if nome == 'Product' else ('_x', '_y')
+        cadeia.juntar(df_direita, chave, how='inner', colunas=colunas, sufixos=sufixos,
+                      fator_maximo=fator_maximo, descricao=descricao)
+        cadeia.exigir_linhas('erro', f"INNER JOIN com {nome} resultou em DataFrame vazio")
+    cadeia.renomear({'Name': 'Product Name'})
+
+    # PASSO 5: LEFT JOIN com Partner
+    if 'Partner ID' in cadeia and 'Partner ID' in _colunas(df_partner):
+        cadeia.juntar(df_partner, 'Partner ID', how='left', descricao='campanhas -> partner')
+
+    # PASSO 6: LEFT JOIN com User
+    colunas_user = _colunas(df_user)
+    if 'User ID' in cadeia and 'User ID' in colunas_user:
+        user_cols = ['User ID', 'Username', 'Email', 'Actual Points', 'Faixa_Etaria']
+        if 'Age' in colunas_user:
+            user_cols.append('Age')
+        sufixos = ('', '_user') if 'Email' in cadeia else ('', '')
+        cadeia.juntar(df_user, 'User ID', how='left', colunas=user_cols, sufixos=sufixos,
+                      descricao='campanhas -> user')
+
+    df_base = cadeia.materializar(avisos)
+    if df_base is None:
+        return pd.DataFrame()
+    return _finalizar_campanhas(df_base, avisos)
+
+def fazer_merge_rewards_polars(df_transacoes, df_store_product, df_product, df_partner, df_user, df_user_product=None,
+                               partner_id=None, avisos=None):
+    """
+    fazer_merge_rewards_corrigido num plano lazy Polars. Sem a chave Store Product ID a
+    ligação é por data mais próxima (merge_asof) e fica com o motor pandas.
+    """
+    import polars as pl
+
+    if (df_store_product is None or 'Store Product ID' not in _colunas(df_transacoes)
+            or 'Store Product ID' not in _colunas(df_store_product)):
+        tabelas = [None if tabela is None else _para_pandas(tabela)
+                   for tabela in (df_transacoes, df_store_product, df_product, df_partner, df_user)]
+        if callable(df_user_product):
+            obter_user_product = df_user_product
+            df_user_product = lambda: _para_pandas(obter_user_product())
+        elif df_user_product is not None:
+            df_user_product = _para_pandas(df_user_product)
+        return fazer_merge_rewards_corrigido(*tabelas, df_user_product, partner_id=partner_id, avisos=avisos)
+
+    # PASSO 0: Filtro de parceiro na origem; com a chave, as transações já ficam só as do parceiro
+    if partner_id is not None:
+        df_product = _filtrar_por_ids(df_product, 'Partner ID', partner_id)
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', partner_id)
+        df_store_product = _filtrar_por_ids(df_store_product, 'Product ID', df_product)
+        df_transacoes = _filtrar_por_ids(df_transacoes, 'Store Product ID', df_store_product)
+
+    # PASSO 1: Ligar cada transação ao seu store product
+    cadeia = _CadeiaJoins(df_transacoes)
+    sem_chave = cadeia.contar(pl.col('Store Product ID').null_count())
+    cadeia.juntar(df_store_product, 'Store Product ID', how='inner', fator_maximo=1.0,
+                  descricao='transação -> store_product')
+    cadeia.exigir_linhas()
+
+    # PASSOS 2 e 3: Product e Partner
+    if 'Product ID' in cadeia and 'Product ID' in _colunas(df_product):
+        cadeia.juntar(df_product, 'Product ID', how='left', descricao='rewards -> product')
+    if 'Partner ID' in cadeia and 'Partner ID' in _colunas(df_partner):
+        cadeia.juntar(df_partner, 'Partner ID', how='left', descricao='rewards -> partner')
+
+    # PASSO 4: User, sem duplicar o Email
+    colunas_user = _colunas(df_user)
+    if 'User ID' in cadeia and 'User ID' in colunas_user:
+        user_cols = ['User ID', 'Username', 'Actual Points', 'Faixa_Etaria']
+        if 'Email' not in cadeia:
+            user_cols.append('Email')
+        if 'Age' in colunas_user:
+            user_cols.append('Age')
+        cadeia.juntar(df_user, 'User ID', how='left', colunas=user_cols, descricao='rewards -> user')
+
+    df_final = cadeia.materializar(avisos)
+    _avisar_transacoes_sem_chave(avisos, cadeia.contagem(sem_chave))
+    return pd.DataFrame() if df_final is None else df_final
+
+def fazer_merge_boosts_polars(df_subscription, df_boost, df_partner, df_user, partner_id=None):
+    """fazer_merge_boosts_corrigido num plano lazy Polars."""
+    # PASSO 0: Filtro de parceiro na origem
+    if partner_id is not None:
+        df_boost = _filtrar_por_ids(df_boost, 'Partner ID', partner_id)
+        df_subscription = _filtrar_por_ids(df_subscription, 'Boost ID', df_boost)
+        df_partner = _filtrar_por_ids(df_partner, 'Partner ID', partner_id)
+
+    # PASSOS 1 a 3: subscription -> boost -> partner -> user
+    cadeia = _CadeiaJoins(df_subscription)
+    cadeia.juntar(df_boost, 'Boost ID', how='left', descricao='subscription -> boost')
+    if 'Partner ID' in cadeia and 'Partner ID' in _colunas(df_partner):
+        cadeia.juntar(df_partner, 'Partner ID', how='left', descricao='boosts -> partner')
+    colunas_user = _colunas(df_user)
+    if 'User ID' in cadeia and 'User ID' in colunas_user:
+        user_cols = ['User ID', 'Username', 'Actual Points', 'Faixa_Etaria']
+        if 'Age' in colunas_user:
+            user_cols.append('Age')
+        cadeia.juntar(df_user, 'User ID', how='left', colunas=user_cols, descricao='boosts -> user')
+
+    return _finalizar_boosts(cadeia.materializar())
@@ -0,0 +1,144 @@
+"""Métricas, figuras e tabelas que o dashboard mostra para um parceiro."""
+
+import numpy as np
+
+from .config import TODOS_OS_PARCEIROS
+from .distintos import contar_distintos
+from .kpis import COLUNAS_KPI, obter_kpis
+from .cubo import fatiar_cubo, fatiar_usuarios_semanais
+from .graficos import (
+    criar_grafico_novos_usuarios_por_semana,
+    criar_grafico_total_assinaturas_por_boost,
+    criar_grafico_campanhas_pontos_tempo,
+    criar_grafico_top5_campanhas_engajamento,
+    criar_tabela_top_usuario,
+    criar_grafico_distribuicao_faixa_etaria,
+    criar_grafico_top10_usuarios_product_points,
+    criar_grafico_pontos_resgatados_item,
+    criar_grafico_unidades_resgatadas_item,
+    criar_grafico_participacoes_tempo,
+    criar_grafico_engajamento_dia_semana,
+    criar_grafico_engajamento_por_hora,
+)
+from .exportacao import montar_resumo_resgates
+
+# ==================== CATÁLOGO DO PAINEL ====================
+
+# Tabelas do parceiro exibidas nas visões (e com dados brutos no modo ao vivo)
+TABELAS_PARCEIRO = ('rewards', 'boosts', 'campanhas')
+
+# Grupos de métricas: 'kpis' (linha da tabela materializada) e um por tabela do parceiro
+GRUPOS_METRICAS = ('kpis',) + TABELAS_PARCEIRO
+
+# Figura -> (função, entrada). A entrada é uma tabela do parceiro, 'user' ou um agregado de ENTRADAS_AGREGADAS
+FIGURAS_PAINEL = {
+    'pontos_tempo': (criar_grafico_campanhas_pontos_tempo, 'cubo_campanhas'),
+    'top5_campanhas': (criar_grafico_top5_campanhas_engajamento, 'campanhas'),
+    'novos_usuarios': (criar_grafico_novos_usuarios_por_semana, 'usuarios_boosts'),
+    'assinaturas_por_boost': (criar_grafico_total_assinaturas_por_boost, 'boosts'),
+    'faixa_etaria': (criar_grafico_distribuicao_faixa_etaria, 'user'),
+    'top10_usuarios': (criar_grafico_top10_usuarios_product_points, 'campanhas'),
+    'pontos_resgatados_item': (criar_grafico_pontos_resgatados_item, 'rewards'),
+    'unidades_resgatadas_item': (criar_grafico_unidades_resgatadas_item, 'rewards'),
+    'participacoes_tempo': (criar_grafico_participacoes_tempo, 'cubo_campanhas'),
+    'engajamento_dia_semana': (criar_grafico_engajamento_dia_semana, 'cubo_campanhas'),
+    'engajamento_por_hora': (criar_grafico_engajamento_por_hora, 'cubo_campanhas'),
+}
+
+# Entrada agregada -> (derivado do registro, fatiador(df, partner_name))
+ENTRADAS_AGREGADAS = {
+    'cubo_campanhas': ('cubo_temporal', lambda df, parceiro: fatiar_cubo(df, 'campanhas', parceiro)),
+    'usuarios_boosts': ('usuarios_semanais', lambda df, parceiro: fatiar_usuarios_semanais(df, 'boosts', parceiro)),
+}
+
+TABELAS_PAINEL = ('top_usuario', 'resumo_resgates')
+
+def _valor_simples(valor):
+    """Escalar numpy -> int/float do Python (serializável em JSON)."""
+    return valor.item() if hasattr(valor, 'item') else valor
+
+def calcular_metricas_tabela(nome, df):
+    """
+    Métricas de uma tabela do parceiro: linhas, usuários únicos e o total de pontos dela.
+
+    Returns:
+        dict: linhas, usuarios_unicos e, para rewards/campanhas, pontos
+    """
+    metricas = {
+        'linhas': len(df),
+        'usuarios_unicos': contar_distintos(df['User ID']) if 'User ID' in df.columns else 0,
+    }
+    if nome == 'rewards':
+        # Primeira linha de cada transação: máscara em vez de cópias deduplicadas do DataFrame
+        if 'Transaction ID' in df.columns:
+            transacao_unica = ~df['Transaction ID'].duplicated().to_numpy()
+        else:
+            transacao_unica = np.ones(len(df), dtype=bool)
+        metricas['pontos'] = df['Price'][transacao_unica].sum() if 'Price' in df.columns else 0
+    elif nome == 'campanhas':
+        metricas['pontos'] = df['Product Points'].sum() if 'Product Points' in df.columns else 0
+    return {chave: _valor_simples(valor) for chave, valor in metricas.items()}
+
+# ==================== PAINEL A PARTIR DO REGISTRO ====================
+
+class PainelParceiro:
+    """
+    Painel de um parceiro calculado do registro, sob demanda.
+
+    Com partner_id os derivados são montados já filtrados para o parceiro; sem ele,
+    TODOS_OS_PARCEIROS usa os derivados completos e os demais parceiros, as partições.
+    """
+
+    def __init__(self, registro, partner_name, partner_id=None):
+        self.registro = registro
+        self.partner_name = partner_name
+        self.partner_id = partner_id
+
+    def dados(self, nome):
+        """DataFrame derivado do parceiro (rewards, boosts ou campanhas)."""
+        if self.partner_id is not None:
+            return self.registro.obter(nome, partner_id=self.partner_id)
+        if self.partner_name == TODOS_OS_PARCEIROS:
+            return self.registro.obter(nome)
+        # Modo multi-parceiro: partição feita uma vez, troca de parceiro é só um lookup
+        return self.registro.particao(nome, self.partner_name)
+
+    def avisos(self, nome):
+        """Avisos registrados ao montar o derivado (partições herdam os do derivado completo)."""
+        return self.registro.avisos.get((nome, self.partner_id), [])
+
+    def metricas(self, grupo):
+        """Métricas de um grupo de GRUPOS_METRICAS, como dict de números."""
+        if grupo == 'kpis':
+            kpis = obter_kpis(self.registro.obter('kpis', partner_id=self.partner_id), self.partner_name)
+            return {coluna: _valor_simples(kpis[coluna]) for coluna in COLUNAS_KPI}
+        return calcular_metricas_tabela(grupo, self.dados(grupo))
+
+    def _entrada(self, entrada):
+        if entrada in ENTRADAS_AGREGADAS:
+            derivado, fatiar = ENTRADAS_AGREGADAS[entrada]
+            return fatiar(self.registro.obter(derivado, partner_id=self.partner_id), self.partner_name)
+        if entrada == 'user':
+            return self.registro['user']
+        return self.dados(entrada)
+
+    def figura(self, nome, **parametros):
+        """Figura de FIGURAS_PAINEL (ou None sem dados)."""
+        funcao, entrada = FIGURAS_PAINEL[nome]
+        return funcao(self._entrada(entrada), **parametros)
+
+    def tabela(self, nome):
+        """Tabela de TABELAS_PAINEL (ou None sem dados)."""
+        if nome == 'top_usuario':
+            return criar_tabela_top_usuario(self.registro['user'], self.dados('campanhas'), self.registro.codificador)
+        if nome == 'resumo_resgates':
+            df_rewards = self.dados('rewards')
+            if df_rewards.empty:
+                return None
+            return montar_resumo_resgates(df_rewards, self.registro['user'])
+        raise KeyError(nome)
+
+    def versao(self, nome):
+        """Versão dos dados de que a figura nome depende (chave do cache de figuras)."""
+        entrada = FIGURAS_PAINEL[nome][1]
+        return self.registro.versao_dados(ENTRADAS_AGREGADAS.get(entrada, (entrada,))[0])
@@ -0,0 +1,70 @@
+"""Verificação de paridade entre os motores de dados (MOTOR_DADOS) e o motor pandas."""
+
+import logging
+
+import pandas as pd
+
+from .esquemas import ESQUEMAS
+from .painel import TABELAS_PARCEIRO
+from .registro import criar_registro_padrao
+
+logger = logging.getLogger(__name__)
+
+def _diferenca(esperado, obtido):
+    """Mensagem da primeira diferença entre os DataFrames, ou None se forem iguais."""
+    try:
+        pd.testing.assert_frame_equal(esperado, obtido)
+    except AssertionError as e:
+        return str(e)
+    return None
+
+def _codigo_parceiro(registro, partner_id):
+    """Partner ID original -> código no registro (cada registro tem o seu codificador)."""
+    if partner_id is None or registro.codificador is None:
+        return partner_id
+    return registro.codificador.codificar(pd.Series([partner_id])).iloc[0]
+
+def verificar_paridade_motores(motor, referencia='pandas', tabelas=None, por_parceiro=True):
+    """
+    Monta as tabelas base e os merges com os dois motores, relendo os CSVs de DIRETORIO_DADOS
+    (sem snapshots), e compara os resultados com assert_frame_equal: mesmas linhas, na mesma
+    ordem, com as mesmas colunas e dtypes. As chaves são comparadas decodificadas: os códigos
+    dependem da ordem em que cada registro viu as tabelas.
+
+    Args:
+        motor: motor verificado (chave de MERGES_POR_MOTOR)
+        referencia: motor de referência
+        tabelas: tabelas base a comparar; padrão todas de ESQUEMAS
+        por_parceiro: compara também os merges filtrados por cada Partner ID
+
+    Returns:
+        list: (tabela, partner_id, mensagem) de cada diferença; vazia se houver paridade
+
+    Raises:
+        FileNotFoundError: algum CSV não existe em DIRETORIO_DADOS
+    """
+    registros = [criar_registro_padrao(usar_snapshot=False, incremental=False, motor=nome)
+                 for nome in (referencia, motor)]
+    tabelas = list(tabelas or ESQUEMAS)
+    for registro in registros:
+        registro.carregar_base(tabelas)
+
+    diferencas = []
+    for nome in tabelas:
+        mensagem = _diferenca(*(registro.decodificar(registro[nome]) for registro in registros))
+        if mensagem:
+            diferencas.append((nome, None, mensagem))
+
+    partner_ids = [None]
+    if por_parceiro:
+        partner_ids += list(registros[0].decodificar(registros[0]['partner'])['Partner ID'].dropna().unique())
+    for nome in TABELAS_PARCEIRO:
+        for partner_id in partner_ids:
+            mensagem = _diferenca(*(registro.decodificar(registro.obter(nome, _codigo_parceiro(registro, partner_id)))
+                                    for registro in registros))
+            if mensagem:
+                diferencas.append((nome, partner_id, mensagem))
+
+    logger.info("Paridade %s x %s: %d comparações de merges, %d diferenças",
+                motor, referencia, len(TABELAS_PARCEIRO) * len(partner_ids), len(diferencas))
+    return diferencas
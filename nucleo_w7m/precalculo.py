@@ -0,0 +1,257 @@
+"""Pré-cálculo dos painéis por parceiro em artefatos versionados, e leitura desses artefatos."""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import plotly.io as pio
+
+from . import config
+from .config import TODOS_OS_PARCEIROS
+from .esquemas import ESQUEMAS
+from .carga import calcular_fingerprint_arquivo, carregar_tabelas
+from .merges import Aviso
+from .registro import criar_registro_padrao
+from .painel import GRUPOS_METRICAS, TABELAS_PARCEIRO, FIGURAS_PAINEL, TABELAS_PAINEL, PainelParceiro
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que o layout dos artefatos mudar; o dashboard recusa versões de outro formato
+VERSAO_FORMATO_ARTEFATOS = 1
+
+# Arquivo, na raiz do diretório de artefatos, com o nome da versão publicada
+ARQUIVO_VERSAO_ATUAL = 'ATUAL'
+
+# ==================== GRAVAÇÃO DOS ARTEFATOS ====================
+
+def _pasta_parceiro(partner_name):
+    """Nome de pasta seguro e estável para o parceiro (o sufixo evita colisões entre nomes parecidos)."""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', partner_name).strip('_') or 'parceiro'
+    return f"{slug}-{hashlib.sha256(partner_name.encode('utf-8')).hexdigest()[:8]}"
+
+def _gravar_texto(caminho, texto):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(texto)
+
+def gravar_painel(painel, destino):
+    """
+    Grava métricas, avisos, figuras e tabelas de um painel numa pasta.
+
+    Layout: painel.json (métricas e avisos), figuras/<nome>.json (JSON Plotly) e
+    tabelas/<nome>.json (orient='split'); figuras e tabelas sem dados são gravadas como null.
+    """
+    os.makedirs(os.path.join(destino, 'figuras'), exist_ok=True)
+    os.makedirs(os.path.join(destino, 'tabelas'), exist_ok=True)
+
+    metricas = {grupo: painel.metricas(grupo) for grupo in GRUPOS_METRICAS}
+    # Depois das métricas: os derivados do parceiro já foram montados
+    avisos = {nome: [list(aviso) for aviso in painel.avisos(nome)] for nome in TABELAS_PARCEIRO}
+    _gravar_texto(os.path.join(destino, 'painel.json'),
+                  json.dumps({'partner_name': painel.partner_name, 'metricas': metricas, 'avisos': avisos},
+                             ensure_ascii=False))
+
+    for nome in FIGURAS_PAINEL:
+        figura = painel.figura(nome)
+        _gravar_texto(os.path.join(destino, 'figuras', f'{nome}.json'),
+                      'null' if figura is None else figura.to_json())
+
+    for nome in TABELAS_PAINEL:
+        tabela = painel.tabela(nome)
+        _gravar_texto(os.path.join(destino, 'tabelas', f'{nome}.json'),
+                      'null' if tabela is None else tabela.to_json(orient='split', index=False, force_ascii=False))
+
+# Registro de cada processo do pool, criado uma vez pelo inicializador
+_registro_processo = None
+
+def _iniciar_processo(diretorio_dados, usar_snapshot):
+    global _registro_processo
+    if diretorio_dados != config.DIRETORIO_DADOS:
+        config.definir_diretorio_dados(diretorio_dados)
+    # Um trabalhador de ingestão por processo: o paralelismo do job é entre parceiros
+    _registro_processo = criar_registro_padrao(usar_snapshot=usar_snapshot, trabalhadores=1)
+
+def _precalcular_parceiro(partner_name, destino):
+    """Monta e grava o painel de um parceiro no processo atual; devolve os segundos gastos."""
+    inicio = time.perf_counter()
+    # Mesmo caminho do dashboard multi-parceiro: derivados completos uma vez por processo, partições por parceiro
+    gravar_painel(PainelParceiro(_registro_processo, partner_name), destino)
+    return time.perf_counter() - inicio
+
+def _publicar_versao(diretorio_artefatos, versao):
+    temporario = os.path.join(diretorio_artefatos, ARQUIVO_VERSAO_ATUAL + '.tmp')
+    _gravar_texto(temporario, versao + '\n')
+    os.replace(temporario, os.path.join(diretorio_artefatos, ARQUIVO_VERSAO_ATUAL))
+
+def _apagar_versoes_antigas(diretorio_artefatos, manter):
+    versoes = sorted(nome for nome in os.listdir(diretorio_artefatos)
+                     if not nome.startswith('.') and os.path.isdir(os.path.join(diretorio_artefatos, nome)))
+    for versao in versoes[:-manter] if manter > 0 else []:
+        shutil.rmtree(os.path.join(diretorio_artefatos, versao), ignore_errors=True)
+        logger.info("Versão antiga de artefatos apagada: %s", versao)
+
+def precalcular(diretorio_artefatos=None, processos=None, parceiros=None, manter=None, usar_snapshot=True):
+    """
+    Pré-calcula o painel de cada parceiro de partner.csv (e de TODOS_OS_PARCEIROS) e publica
+    uma nova versão de artefatos.
+
+    A versão é gravada numa pasta temporária, renomeada ao final e só então apontada por
+    ATUAL (troca atômica): o dashboard nunca lê uma versão incompleta. Se algum parceiro
+    falhar nada é publicado e o erro do primeiro parceiro com falha é propagado.
+
+    Args:
+        diretorio_artefatos: raiz dos artefatos; padrão config.DIRETORIO_ARTEFATOS
+        processos: processos do pool (um parceiro por tarefa); padrão os.cpu_count(), 1 = sem pool
+        parceiros: restringe a estes nomes (padrão: todos)
+        manter: versões mantidas após publicar; padrão config.VERSOES_ARTEFATOS_MANTIDAS
+
+    Returns:
+        str: nome da versão publicada
+
+    Raises:
+        FileNotFoundError: algum CSV não existe em DIRETORIO_DADOS
+    """
+    diretorio_artefatos = diretorio_artefatos or config.DIRETORIO_ARTEFATOS
+    processos = processos or os.cpu_count() or 1
+    manter = config.VERSOES_ARTEFATOS_MANTIDAS if manter is None else manter
+    inicio = time.perf_counter()
+
+    # Fingerprints antes da leitura; a carga aqui também atualiza os snapshots que os processos vão ler
+    arquivos = {nome: calcular_fingerprint_arquivo(os.path.join(config.DIRETORIO_DADOS, esquema['arquivo']),
+                                                   com_hash=False)
+                for nome, esquema in ESQUEMAS.items()}
+    tabelas, _ = carregar_tabelas(['partner'] + [nome for nome in ESQUEMAS if nome != 'partner'],
+                                  usar_snapshot=usar_snapshot)
+    nomes = [TODOS_OS_PARCEIROS] + sorted(tabelas['partner']['Partner Name'].dropna().unique())
+    del tabelas
+    if parceiros:
+        nomes = [nome for nome in nomes if nome in set(parceiros)]
+
+    impressao = hashlib.sha256(json.dumps(arquivos, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    versao = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{impressao}"
+    pastas = {nome: _pasta_parceiro(nome) for nome in nomes}
+    temporario = os.path.join(diretorio_artefatos, f'.{versao}.tmp')
+    os.makedirs(os.path.join(temporario, 'parceiros'))
+
+    try:
+        destinos = {nome: os.path.join(temporario, 'parceiros', pasta) for nome, pasta in pastas.items()}
+        resultados = {}
+        if processos == 1:
+            _iniciar_processo(config.DIRETORIO_DADOS, usar_snapshot)
+            for nome in nomes:
+                try:
+                    resultados[nome] = (_precalcular_parceiro(nome, destinos[nome]), None)
+                except Exception as e:
+                    resultados[nome] = (None, e)
+        else:
+            with ProcessPoolExecutor(max_workers=min(processos, len(nomes)), initializer=_iniciar_processo,
+                                     initargs=(config.DIRETORIO_DADOS, usar_snapshot)) as executor:
+                futuros = {nome: executor.submit(_precalcular_parceiro, nome, destinos[nome]) for nome in nomes}
+                for nome, futuro in futuros.items():
+                    erro = futuro.exception()
+                    resultados[nome] = (None, erro) if erro is not None else (futuro.result(), None)
+
+        erros = [(nome, erro) for nome, (_, erro) in resultados.items() if erro is not None]
+        for nome, erro in erros[1:]:
+            logger.error("Falha ao pré-calcular %s: %s", nome, erro)
+        if erros:
+            raise erros[0][1]
+
+        manifesto = {
+            'versao_formato': VERSAO_FORMATO_ARTEFATOS,
+            'versao': versao,
+            'gerado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'arquivos': arquivos,
+            'parceiros': pastas,
+            'segundos': {nome: round(segundos, 3) for nome, (segundos, _) in resultados.items()},
+        }
+        _gravar_texto(os.path.join(temporario, 'manifesto.json'), json.dumps(manifesto, ensure_ascii=False, indent=1))
+        os.rename(temporario, os.path.join(diretorio_artefatos, versao))
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    _publicar_versao(diretorio_artefatos, versao)
+    _apagar_versoes_antigas(diretorio_artefatos, manter)
+    logger.info("Versão %s publicada: %d parceiros em %.2f s (%d processos)", versao, len(nomes),
+                time.perf_counter() - inicio, processos)
+    return versao
+
+# ==================== LEITURA DOS ARTEFATOS ====================
+
+def versao_atual(diretorio_artefatos=None):
+    """Nome da versão publicada (conteúdo de ATUAL), ou None se o job nunca rodou."""
+    caminho = os.path.join(diretorio_artefatos or config.DIRETORIO_ARTEFATOS, ARQUIVO_VERSAO_ATUAL)
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def ler_manifesto(versao, diretorio_artefatos=None):
+    """
+    Manifesto de uma versão de artefatos.
+
+    Raises:
+        ValueError: a versão foi gravada em outro VERSAO_FORMATO_ARTEFATOS
+    """
+    caminho = os.path.join(diretorio_artefatos or config.DIRETORIO_ARTEFATOS, versao, 'manifesto.json')
+    with open(caminho, encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('versao_formato') != VERSAO_FORMATO_ARTEFATOS:
+        raise ValueError(f"Artefatos {versao} no formato {manifesto.get('versao_formato')}, "
+                         f"esperado {VERSAO_FORMATO_ARTEFATOS}; rode o pré-cálculo de novo")
+    return manifesto
+
+class PainelPrecalculado:
+    """
+    Painel de um parceiro lido dos artefatos, com a mesma interface de PainelParceiro
+    (sem dados(): os DataFrames completos não fazem parte dos artefatos).
+
+    Figuras e tabelas são lidas do disco a cada pedido; parâmetros de figura são
+    ignorados (valem os do momento do pré-cálculo).
+    """
+
+    def __init__(self, manifesto, partner_name, diretorio_artefatos=None):
+        if partner_name not in manifesto['parceiros']:
+            raise KeyError(partner_name)
+        self.partner_name = partner_name
+        self.versao_artefatos = manifesto['versao']
+        self.gerado_em = manifesto['gerado_em']
+        self._pasta = os.path.join(diretorio_artefatos or config.DIRETORIO_ARTEFATOS, manifesto['versao'],
+                                   'parceiros', manifesto['parceiros'][partner_name])
+        with open(os.path.join(self._pasta, 'painel.json'), encoding='utf-8') as f:
+            conteudo = json.load(f)
+        self._metricas = conteudo['metricas']
+        self._avisos = conteudo['avisos']
+
+    def _ler(self, *partes):
+        with open(os.path.join(self._pasta, *partes), encoding='utf-8') as f:
+            texto = f.read()
+        return None if texto == 'null' else texto
+
+    def avisos(self, nome):
+        return [Aviso(*aviso) for aviso in self._avisos.get(nome, [])]
+
+    def metricas(self, grupo):
+        return self._metricas[grupo]
+
+    def figura(self, nome, **parametros):
+        texto = self._ler('figuras', f'{nome}.json')
+        return None if texto is None else pio.from_json(texto)
+
+    def tabela(self, nome):
+        texto = self._ler('tabelas', f'{nome}.json')
+        if texto is None:
+            return None
+        return pd.read_json(io.StringIO(texto), orient='split', dtype=False, convert_dates=False)
+
+    def versao(self, nome):
+        return self.versao_artefatos
@@ -0,0 +1,460 @@
+"""Registro lazy de tabelas e derivados."""
+
+import hashlib
+import io
+import threading
+import time
+import logging
+
+import pandas as pd
+
+from .esquemas import ESQUEMAS
+from .carga import calcular_fingerprint_arquivo, carregar_tabelas, resolver_motor
+from .merges import (
+    fazer_merge_campanhas_corrigido,
+    fazer_merge_rewards_corrigido,
+    fazer_merge_boosts_corrigido,
+)
+from .motor_duckdb import fazer_merge_rewards_duckdb, fazer_merge_boosts_duckdb, fazer_merge_campanhas_duckdb
+from .motor_polars import (
+    fazer_merge_rewards_polars,
+    fazer_merge_boosts_polars,
+    fazer_merge_campanhas_polars,
+    varrer_tabela,
+)
+from .tipos import (
+    CodificadorChaves,
+    otimizar_tipos,
+    _remover_categorias_nao_usadas,
+    concatenar_alinhando_tipos,
+)
+from .ingestao import _caminho_csv, estado_leitura, ler_linhas_anexadas, linhas_completas, _atualizar_marca_dagua
+from .kpis import materializar_kpis
+from .cubo import materializar_cubo_temporal, materializar_usuarios_semanais
+
+logger = logging.getLogger(__name__)
+
+# ==================== REGISTRO LAZY DE TABELAS ====================
+
+class RegistroTabelas:
+    """
+    Registro de DataFrames carregados sob demanda.
+    
+    Tabelas de ESQUEMAS são lidas e limpas no primeiro acesso; DataFrames derivados
+    (merges) são registrados com suas dependências e só são montados quando pedidos.
+    Tabelas que nenhuma aba pede nunca são lidas; as que um derivado pede são lidas juntas,
+    em paralelo (trabalhadores/pool/motor, ver carregar_tabelas), com o tempo de cada uma em tempos_carga.
+    
+    Cada tabela guarda o fingerprint (tamanho/mtime) do CSV lido; verificar_alteracoes
+    descarta apenas as tabelas cujo arquivo mudou, junto com os derivados que dependem delas.
+    Com incremental=True, tabelas de eventos (com 'marca_dagua' no esquema) cujo CSV só
+    cresceu recebem apenas as linhas novas, já enriquecidas pelos mesmos merges.
+    
+    Derivados registrados com lazy=True (merges do motor Polars) não carregam as tabelas
+    base: recebem LazyFrames de varrer, com as chaves originais, e o resultado é codificado.
+    """
+    
+    def __init__(self, usar_snapshot=True, codificar_chaves=True, ttl_segundos=None, incremental=True,
+                 trabalhadores=None, pool=None, motor=None):
+        self.usar_snapshot = usar_snapshot
+        self.motor = motor
+        self.ttl_segundos = ttl_segundos
+        self.incremental = incremental
+        self.trabalhadores = trabalhadores
+        self.pool = pool
+        self.tempos_carga = {}
+        self.codificador = CodificadorChaves() if codificar_chaves else None
+        self.relatorios_memoria = {}
+        self.avisos = {}
+        self._dados = {}
+        self._derivados = {}
+        self._fingerprints = {}
+        self._carregado_em = {}
+        self._estados_leitura = {}
+        self._kwargs_incrementais = {}
+        self._coletam_avisos = set()
+        self._lazy = set()
+        self._sob_demanda = {}
+        # Reentrante: montar um derivado acessa as dependências pelo próprio registro
+        self._lock = threading.RLock()
+    
+    def registrar(self, nome, funcao, dependencias, kwargs_incrementais=None, coletar_avisos=False, lazy=False,
+                  sob_demanda=None):
+        """
+        Registra um DataFrame derivado, calculado como funcao(*dependencias).
+        A função deve aceitar partner_id para montar a versão de um único parceiro e
+        tratar cada linha da primeira tabela de eventos de forma independente, para que
+        linhas anexadas possam ser enriquecidas sozinhas (com kwargs_incrementais).
+        Com coletar_avisos, a função recebe avisos=[] e a lista fica em self.avisos.
+        Com lazy, as tabelas base chegam como LazyFrames de varrer (linhas anexadas, como
+        DataFrame), com chaves e partner_id originais, e o resultado é codificado aqui.
+        sob_demanda (argumento -> tabela base) passa à função, em vez da tabela, uma função
+        sem argumentos que a devolve: a tabela só é lida se a função a pedir, mas conta como
+        dependência para invalidação e versão dos dados.
+        """
+        self._derivados[nome] = (funcao, list(dependencias))
+        self._kwargs_incrementais[nome] = dict(kwargs_incrementais or {})
+        if coletar_avisos:
+            self._coletam_avisos.add(nome)
+        if lazy:
+            self._lazy.add(nome)
+        self._sob_demanda[nome] = dict(sob_demanda or {})
+    
+    def __contains__(self, nome):
+        return nome in ESQUEMAS or nome in self._derivados
+    
+    def __getitem__(self, nome):
+        return self.obter(nome)
+    
+    def obter(self, nome, partner_id=None):
+        """
+        Devolve a tabela ou o derivado pedido, carregando-o no primeiro acesso.
+        
+        Args:
+            nome: tabela de ESQUEMAS ou derivado registrado
+            partner_id: monta o derivado já restrito a este parceiro (ignorado para tabelas base)
+        """
+        with self._lock:
+            if nome in self._derivados:
+                chave = (nome, partner_id)
+                if chave not in self._dados:
+                    # Tabelas base que faltam são lidas de uma vez, em paralelo
+                    self.carregar_base(self._bases_a_carregar(nome))
+                    kwargs = {'avisos': []} if nome in self._coletam_avisos else {}
+                    df = self._montar(nome, partner_id, **kwargs)
+                    if kwargs:
+                        self.avisos[chave] = kwargs['avisos']
+                    df, relatorio = otimizar_tipos(df)
+                    self.relatorios_memoria[chave] = relatorio
+                    logger.info("%s (parceiro %s): %d linhas, %.1f MB -> %.1f MB", nome, partner_id,
+                                relatorio['linhas'], relatorio['antes'] / 2 ** 20, relatorio['depois'] / 2 ** 20)
+                    self._dados[chave] = df
+                return self._dados[chave]
+            
+            if nome not in ESQUEMAS:
+                raise KeyError(nome)
+            if nome not in self._dados:
+                self.carregar_base([nome])
+            return self._dados[nome]
+    
+    def _montar(self, nome, partner_id, anexadas=None, **kwargs):
+        """
+        Calcula o derivado para partner_id. Derivados de derivados recebem as dependências
+        já restritas ao mesmo parceiro; anexadas (tabela -> DataFrame) substitui tabelas base
+        pelas linhas anexadas a elas.
+        """
+        funcao, dependencias = self._derivados[nome]
+        anexadas = anexadas or {}
+        obter = self.varrer if nome in self._lazy else self.obter
+        for argumento, tabela in self._sob_demanda[nome].items():
+            kwargs[argumento] = lambda tabela=tabela: obter(tabela)
+        if nome not in self._lazy:
+            return funcao(*[anexadas[dep] if dep in anexadas
+                            else self.obter(dep, partner_id) if dep in self._derivados else self[dep]
+                            for dep in dependencias], partner_id=partner_id, **kwargs)
+        
+        if partner_id is not None and self.codificador is not None:
+            partner_id = self.codificador.decodificar(pd.Series([partner_id])).iloc[0]
+        df = funcao(*[anexadas[dep] if dep in anexadas else self.varrer(dep) for dep in dependencias],
+                    partner_id=partner_id, **kwargs)
+        if self.codificador is not None:
+            df = self.codificador.codificar_tabela(df)
+        return df
+    
+    def _bases_a_carregar(self, nome):
+        """Tabelas base que o derivado lê do registro (as dos derivados lazy são varridas)."""
+        _, dependencias = self._derivados[nome]
+        bases = set()
+        for dep in dependencias:
+            if dep in self._derivados:
+                bases |= self._bases_a_carregar(dep)
+            elif nome not in self._lazy:
+                bases.add(dep)
+        return bases
+    
+    def varrer(self, nome):
+        """
+        LazyFrame Polars da tabela base, lido do CSV só quando o plano for coletado (sem
+        snapshot), com as chaves originais.
+        
+        O fingerprint do CSV é registrado como numa carga; com incremental, tabelas de eventos
+        são lidas até o offset já registrado (ou até a última linha completa, que passa a ser
+        o offset), para que as linhas anexadas depois cheguem só pela leitura incremental.
+        """
+        with self._lock:
+            if nome not in self._fingerprints:
+                self._fingerprints[nome] = _fingerprint_rapido(nome)
+                self._carregado_em[nome] = time.monotonic()
+            if not self.incremental or 'marca_dagua' not in ESQUEMAS[nome]:
+                return varrer_tabela(nome)
+            
+            estado = self._estados_leitura.get(nome)
+            with open(_caminho_csv(nome), 'rb') as f:
+                conteudo = f.read(estado['offset']) if estado else f.read()
+            if estado is None:
+                conteudo = linhas_completas(conteudo) or conteudo
+                # Sem a tabela em pandas não há marca d'água inicial; ela começa nas linhas anexadas
+                self._estados_leitura[nome] = estado_leitura(nome, len(conteudo))
+            return varrer_tabela(nome, io.BytesIO(conteudo))
+    
+    def carregar_base(self, nomes):
+        """
+        Carrega as tabelas base ainda não carregadas, lendo os CSVs em paralelo.
+        
+        A codificação de chaves e as marcas d'água são aplicadas depois, uma tabela por vez
+        na ordem de ESQUEMAS, então os códigos não dependem da ordem de conclusão das leituras.
+        Se alguma tabela falhar, nenhuma do lote é guardada e o erro da primeira é propagado
+        (CSV ausente: FileNotFoundError).
+        """
+        with self._lock:
+            nomes = set(nomes)
+            pendentes = [nome for nome in ESQUEMAS if nome in nomes and nome not in self._dados]
+            if not pendentes:
+                return
+            # Tabelas já varridas por derivados lazy cujo CSV mudou desde então: descartar esses
+            # derivados antes de reler, para que tabela e derivados venham do mesmo conteúdo
+            alteradas = [nome for nome in pendentes
+                         if nome in self._fingerprints and self._fingerprints[nome] != _fingerprint_rapido(nome)]
+            if alteradas:
+                self.invalidar(alteradas)
+            try:
+                for nome in pendentes:
+                    # Fingerprint tirado antes da leitura: uma troca de arquivo durante a carga é detectada depois
+                    self._fingerprints[nome] = _fingerprint_rapido(nome)
+                    self._carregado_em[nome] = time.monotonic()
+                # Offset = bytes efetivamente lidos (até a última linha completa), não o tamanho do stat:
+                # linhas anexadas ou incompletas durante a carga ficam para a leitura incremental
+                offsets = {}
+                tabelas, tempos = carregar_tabelas(pendentes, usar_snapshot=self.usar_snapshot,
+                                                   trabalhadores=self.trabalhadores, pool=self.pool,
+                                                   motor=self.motor, offsets=offsets)
+                if self.incremental:
+                    for nome in pendentes:
+                        if nome in offsets:
+                            self._estados_leitura[nome] = estado_leitura(nome, offsets[nome])
+            except Exception:
+                for nome in pendentes:
+                    self._fingerprints.pop(nome, None)
+                    self._carregado_em.pop(nome, None)
+                    self._estados_leitura.pop(nome, None)
+                raise
+            
+            self.tempos_carga.update(tempos)
+            for nome in pendentes:
+                df = tabelas[nome]
+                if nome in self._estados_leitura:
+                    self._estados_leitura[nome] = _atualizar_marca_dagua(nome, self._estados_leitura[nome], df)
+                if self.codificador is not None:
+                    df = self.codificador.codificar_tabela(df)
+                self._dados[nome] = df
+    
+    def decodificar(self, df):
+        """Prepara um DataFrame do registro para exibição, trocando códigos de chave por UUIDs."""
+        if self.codificador is None:
+            return df
+        return self.codificador.decodificar_tabela(df)
+    
+    def particao(self, nome, partner_name):
+        """
+        Devolve o derivado (montado para todos os parceiros) de um único parceiro.
+        A partição por Partner Name é feita uma vez; as chamadas seguintes são lookups.
+        """
+        with self._lock:
+            chave = (nome, 'particoes')
+            if chave not in self._dados:
+                self._dados[chave] = particionar_por_parceiro(self.obter(nome))
+            particoes = self._dados[chave]
+        
+        if partner_name in particoes:
+            return particoes[partner_name]
+        return self.obter(nome).iloc[0:0]
+    
+    def carregados(self):
+        """Nomes dos DataFrames já materializados."""
+        return list(self._dados)
+    
+    def _dependencias_base(self, nome):
+        if nome not in self._derivados:
+            return {nome}
+        return set().union(*[self._dependencias_base(dep) for dep in self._derivados[nome][1]],
+                           self._sob_demanda[nome].values())
+    
+    def versao_dados(self, nome):
+        """
+        Identificador da versão dos dados de uma tabela ou derivado: muda sempre que
+        algum CSV do qual ele depende é recarregado com outro conteúdo.
+        """
+        with self._lock:
+            partes = [(dep, self._fingerprints.get(dep)) for dep in sorted(self._dependencias_base(nome))]
+        return hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()[:16]
+    
+    def invalidar(self, nomes=None):
+        """
+        Descarta tabelas base (todas, se nomes for None) e todo derivado que dependa delas.
+        Elas são recarregadas no próximo acesso.
+        """
+        with self._lock:
+            if nomes is None:
+                nomes = list(ESQUEMAS)
+            nomes = set(nomes)
+            derivados_afetados = {derivado for derivado in self._derivados
+                                  if self._dependencias_base(derivado) & nomes}
+            
+            for chave in list(self._dados):
+                nome = chave[0] if isinstance(chave, tuple) else chave
+                if nome in nomes or nome in derivados_afetados:
+                    del self._dados[chave]
+                    self.relatorios_memoria.pop(chave, None)
+                    self.avisos.pop(chave, None)
+            for nome in nomes:
+                self._fingerprints.pop(nome, None)
+                self._carregado_em.pop(nome, None)
+                self._estados_leitura.pop(nome, None)
+                self.tempos_carga.pop(nome, None)
+    
+    def _anexar_linhas_novas(self, nome, fingerprint):
+        """
+        Acrescenta à tabela, aos derivados e às partições só as linhas anexadas ao CSV.
+        
+        Returns:
+            bool: False se o arquivo não cresceu por append e a tabela precisa ser recarregada
+        """
+        resultado = ler_linhas_anexadas(nome, self._estados_leitura[nome])
+        if resultado is None:
+            return False
+        df_novo, estado = resultado
+        self._estados_leitura[nome] = _atualizar_marca_dagua(nome, estado, df_novo)
+        self._fingerprints[nome] = fingerprint
+        if len(df_novo) == 0:
+            return True
+        
+        df_original = df_novo
+        if self.codificador is not None:
+            df_novo = self.codificador.codificar_tabela(df_novo)
+        if nome in self._dados:
+            self._dados[nome] = concatenar_alinhando_tipos(self._dados[nome], df_novo)
+        
+        for derivado, (_, dependencias) in self._derivados.items():
+            if nome not in dependencias:
+                if nome in self._dependencias_base(derivado):
+                    # Depende da tabela só via outro derivado (ex.: KPIs): recalculado no próximo acesso
+                    for chave in [chave for chave in self._dados if isinstance(chave, tuple) and chave[0] == derivado]:
+                        del self._dados[chave]
+                        self.relatorios_memoria.pop(chave, None)
+                continue
+            kwargs = self._kwargs_incrementais[derivado]
+            partes = {}
+            for chave in [chave for chave in self._dados if isinstance(chave, tuple) and chave[0] == derivado
+                          and chave[1] != 'particoes']:
+                anexadas = {nome: df_original if derivado in self._lazy else df_novo}
+                partes[chave[1]] = self._montar(derivado, chave[1], anexadas, **kwargs)
+                self._dados[chave] = concatenar_alinhando_tipos(self._dados[chave], partes[chave[1]])
+                if chave in self.relatorios_memoria:
+                    self.relatorios_memoria[chave]['linhas'] = len(self._dados[chave])
+            
+            chave_particoes = (derivado, 'particoes')
+            if chave_particoes in self._dados and None in partes:
+                particoes = dict(self._dados[chave_particoes])
+                for parceiro, grupo in particionar_por_parceiro(partes[None]).items():
+                    particoes[parceiro] = (concatenar_alinhando_tipos(particoes[parceiro], grupo)
+                                           if parceiro in particoes else grupo)
+                self._dados[chave_particoes] = particoes
+        
+        logger.info("%s: %d linhas anexadas (marca d'água %s)", nome, len(df_novo),
+                    self._estados_leitura[nome]['marca_dagua'])
+        return True
+    
+    def verificar_alteracoes(self):
+        """
+        Compara o fingerprint atual dos CSVs já carregados com o da carga e invalida os que
+        mudaram (ou que passaram do TTL, se configurado).
+        
+        Returns:
+            list: tabelas invalidadas
+        """
+        with self._lock:
+            agora = time.monotonic()
+            alteradas = []
+            for nome, fingerprint in list(self._fingerprints.items()):
+                try:
+                    atual = _fingerprint_rapido(nome)
+                except FileNotFoundError:
+                    # Arquivo sendo substituído pelo export: manter a versão carregada por enquanto
+                    continue
+                expirada = self.ttl_segundos and agora - self._carregado_em[nome] > self.ttl_segundos
+                if atual != fingerprint and not expirada and nome in self._estados_leitura:
+                    if self._anexar_linhas_novas(nome, atual):
+                        continue
+                if atual != fingerprint or expirada:
+                    alteradas.append(nome)
+            
+            if alteradas:
+                logger.info("Tabelas alteradas, recarregando sob demanda: %s", ', '.join(alteradas))
+                self.invalidar(alteradas)
+        return alteradas
+
+def _fingerprint_rapido(nome_tabela):
+    """Tamanho e mtime do CSV da tabela (sem ler o conteúdo)."""
+    fingerprint = calcular_fingerprint_arquivo(_caminho_csv(nome_tabela), com_hash=False)
+    return fingerprint['tamanho'], fingerprint['mtime_ns']
+
+def particionar_por_parceiro(df, coluna='Partner Name'):
+    """
+    Separa o DataFrame por parceiro numa única passada.
+    
+    Returns:
+        dict: nome do parceiro -> DataFrame só com as linhas dele
+    """
+    if coluna not in df.columns or len(df) == 0:
+        return {}
+    return {nome: _remover_categorias_nao_usadas(grupo)
+            for nome, grupo in df.groupby(coluna, sort=False, observed=True)}
+
+def resumir_memoria(registro):
+    """Tabela com linhas e memória (MB) de cada DataFrame derivado, antes e depois da otimização."""
+    linhas = []
+    for (nome, partner_id), relatorio in registro.relatorios_memoria.items():
+        linhas.append({
+            'DataFrame': nome if partner_id is None else f"{nome} (parceiro)",
+            'Linhas': relatorio['linhas'],
+            'Antes (MB)': round(relatorio['antes'] / 2 ** 20, 2),
+            'Depois (MB)': round(relatorio['depois'] / 2 ** 20, 2),
+        })
+    return pd.DataFrame(linhas)
+
+# Merges de rewards, boosts e campanhas de cada motor (MOTOR_DADOS)
+MERGES_POR_MOTOR = {
+    'pandas': (fazer_merge_rewards_corrigido, fazer_merge_boosts_corrigido, fazer_merge_campanhas_corrigido),
+    'duckdb': (fazer_merge_rewards_duckdb, fazer_merge_boosts_duckdb, fazer_merge_campanhas_duckdb),
+    'polars': (fazer_merge_rewards_polars, fazer_merge_boosts_polars, fazer_merge_campanhas_polars),
+}
+
+def criar_registro_padrao(usar_snapshot=True, codificar_chaves=True, ttl_segundos=None, incremental=True,
+                          trabalhadores=None, pool=None, motor=None):
+    """
+    Cria o registro com as tabelas base e os merges usados pelo dashboard.
+    
+    Args:
+        motor: chave de MERGES_POR_MOTOR; padrão MOTOR_DADOS (ver resolver_motor)
+    """
+    motor = resolver_motor(motor)
+    merge_rewards, merge_boosts, merge_campanhas = MERGES_POR_MOTOR[motor]
+    
+    registro = RegistroTabelas(usar_snapshot=usar_snapshot, codificar_chaves=codificar_chaves,
+                               ttl_segundos=ttl_segundos, incremental=incremental,
+                               trabalhadores=trabalhadores, pool=pool, motor=motor)
+    # Motor Polars: merges num plano lazy desde o scan_csv
+    lazy = motor == 'polars'
+    # user_product só é lido na ligação por data, quando as transações chegam sem Store Product ID
+    registro.registrar('rewards', merge_rewards,
+                       ['transacoes', 'store_product', 'product', 'partner', 'user'],
+                       coletar_avisos=True, lazy=lazy, sob_demanda={'df_user_product': 'user_product'})
+    registro.registrar('boosts', merge_boosts,
+                       ['subscription', 'boost', 'partner', 'user'], lazy=lazy)
+    registro.registrar('campanhas', merge_campanhas,
+                       ['campaign_user', 'campaign', 'reward', 'product', 'partner', 'user'],
+                       coletar_avisos=True, lazy=lazy)
+    registro.registrar('kpis', materializar_kpis, ['rewards', 'boosts', 'campanhas'])
+    registro.registrar('cubo_temporal', materializar_cubo_temporal, ['campanhas', 'boosts'])
+    registro.registrar('usuarios_semanais', materializar_usuarios_semanais, ['campanhas', 'boosts'])
+    return registro
@@ -0,0 +1,174 @@
+"""Codificação de chaves e otimização de tipos dos DataFrames."""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ==================== CODIFICAÇÃO DE CHAVES ====================
+
+# Colunas UUID usadas em joins; no registro viram códigos int32 compartilhados entre tabelas
+COLUNAS_CHAVE = ['User ID', 'Campaign ID', 'Product ID', 'Partner ID', 'Boost ID', 'Store Product ID']
+
+class CodificadorChaves:
+    """
+    Dicionário único UUID -> código inteiro, compartilhado por todas as tabelas do registro.
+    
+    Merges e groupbys rodam sobre os códigos (Int32, com <NA> para ausentes); os UUIDs
+    só são decodificados para exibição.
+    """
+    
+    def __init__(self):
+        self._uuids = []
+        self._indice = pd.Index([], dtype=object)
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._uuids)
+    
+    def codificar(self, serie):
+        """Converte uma série de UUIDs em códigos Int32, acrescentando UUIDs novos ao dicionário."""
+        with self._lock:
+            distintos = pd.Index(serie.dropna().unique())
+            novos = distintos[self._indice.get_indexer(distintos) < 0]
+            if len(novos) > 0:
+                novos = pd.Index(novos, dtype=object)
+                self._uuids.extend(novos.tolist())
+                self._indice = self._indice.append(novos)
+            codigos = self._indice.get_indexer(serie)
+        
+        codigos_int32 = pd.arrays.IntegerArray(codigos.astype(np.int32), codigos < 0)
+        return pd.Series(codigos_int32, index=serie.index, name=serie.name)
+    
+    def decodificar(self, serie):
+        """Converte códigos de volta para os UUIDs originais."""
+        uuids = np.asarray(self._uuids + [np.nan], dtype=object)
+        codigos = serie.fillna(-1).to_numpy(dtype=np.int64)
+        return pd.Series(uuids[codigos], index=serie.index, name=serie.name)
+    
+    def codificar_tabela(self, df):
+        """Codifica as COLUNAS_CHAVE presentes no DataFrame."""
+        colunas = [col for col in COLUNAS_CHAVE if col in df.columns]
+        if not colunas:
+            return df
+        df = df.copy()
+        for col in colunas:
+            df[col] = self.codificar(df[col])
+        return df
+    
+    def decodificar_tabela(self, df):
+        """Devolve uma cópia do DataFrame com as COLUNAS_CHAVE codificadas de volta em UUIDs."""
+        colunas = [col for col in COLUNAS_CHAVE
+                   if col in df.columns and pd.api.types.is_integer_dtype(df[col])]
+        if not colunas:
+            return df
+        df = df.copy()
+        for col in colunas:
+            df[col] = self.decodificar(df[col])
+        return df
+
+# ==================== OTIMIZAÇÃO DE TIPOS ====================
+
+# Colunas de texto com até esta fração de valores distintos viram category
+LIMITE_CARDINALIDADE_CATEGORIA = 0.5
+
+def memoria_dataframe(df):
+    """Memória ocupada pelo DataFrame em bytes, incluindo o conteúdo das strings."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+def _otimizar_coluna(serie, limite_cardinalidade):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+    
+    if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+        if len(serie) == 0 or pd.api.types.infer_dtype(serie, skipna=True) != 'string':
+            return serie
+        if serie.nunique() <= limite_cardinalidade * len(serie):
+            return serie.astype('category')
+        return serie
+    
+    if pd.api.types.is_bool_dtype(serie) or not isinstance(serie.dtype, np.dtype):
+        # Tipos nullable (como os códigos Int32 de chave) já são compactos
+        return serie
+    
+    if pd.api.types.is_integer_dtype(serie):
+        return pd.to_numeric(serie, downcast='integer')
+    
+    if pd.api.types.is_float_dtype(serie) and len(serie) > 0 and serie.notna().all():
+        # Só vira inteiro quando não perde nada: sem nulos e sem casas decimais
+        valores = serie.to_numpy()
+        if np.array_equal(valores, np.round(valores)) and np.abs(valores).max() < 2 ** 31:
+            return pd.to_numeric(serie.astype(np.int64), downcast='integer')
+    
+    return serie
+
+def otimizar_tipos(df, limite_cardinalidade=None):
+    """
+    Compacta os tipos de um DataFrame: texto de baixa cardinalidade vira category,
+    inteiros são reduzidos ao menor tipo e floats sem casas decimais nem nulos viram inteiros.
+    
+    Returns:
+        tuple: (DataFrame otimizado, dict com memória antes/depois em bytes)
+    """
+    if limite_cardinalidade is None:
+        limite_cardinalidade = LIMITE_CARDINALIDADE_CATEGORIA
+    
+    antes = memoria_dataframe(df)
+    otimizado = pd.DataFrame({col: _otimizar_coluna(df[col], limite_cardinalidade) for col in df.columns},
+                             index=df.index)
+    depois = memoria_dataframe(otimizado)
+    
+    return otimizado, {'linhas': len(df), 'antes': antes, 'depois': depois}
+
+def _remover_categorias_nao_usadas(df):
+    colunas = {col: df[col].cat.remove_unused_categories()
+               for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    return df.assign(**colunas) if colunas else df
+
+def contar_valores(serie):
+    """value_counts sem as categorias que não aparecem na série."""
+    contagem = serie.value_counts()
+    return contagem[contagem > 0]
+
+def concatenar_alinhando_tipos(df_base, df_novo):
+    """
+    Anexa df_novo a df_base mantendo os tipos compactos de df_base.
+    
+    Colunas category recebem as categorias novas no fim da lista, então os códigos
+    existentes não mudam; inteiros reduzidos mantêm o tipo quando os valores novos cabem
+    nele sem perda. As demais colunas seguem a promoção de tipos do pd.concat.
+    
+    Returns:
+        DataFrame: linhas de df_base seguidas das de df_novo, com índice novo
+    """
+    if len(df_novo) == 0:
+        return df_base
+    if len(df_base.columns) == 0:
+        return df_novo.reset_index(drop=True)
+    
+    df_novo = df_novo.reindex(columns=df_base.columns)
+    colunas_base, colunas_novo = {}, {}
+    for col in df_base.columns:
+        tipo = df_base[col].dtype
+        if isinstance(tipo, np.dtype) and tipo.kind in 'iu' and pd.api.types.is_numeric_dtype(df_novo[col]):
+            valores = df_novo[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            limites = np.iinfo(tipo)
+            if (np.isfinite(valores).all() and np.array_equal(valores, np.round(valores))
+                    and (len(valores) == 0 or (valores.min() >= limites.min and valores.max() <= limites.max))):
+                colunas_novo[col] = df_novo[col].astype(tipo)
+            continue
+        if not isinstance(tipo, pd.CategoricalDtype):
+            continue
+        categorias = df_base[col].cat.categories
+        distintos = pd.Index(df_novo[col].dropna().unique())
+        novas = distintos[categorias.get_indexer(distintos) < 0]
+        if len(novas) > 0:
+            colunas_base[col] = df_base[col].cat.add_categories(novas)
+            categorias = colunas_base[col].cat.categories
+        colunas_novo[col] = pd.Categorical(df_novo[col], categories=categorias)
+    
+    if colunas_base:
+        df_base = df_base.assign(**colunas_base)
+    if colunas_novo:
+        df_novo = df_novo.assign(**colunas_novo)
+    return pd.concat([df_base, df_novo], ignore_index=True)
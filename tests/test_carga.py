@@ -0,0 +1,28 @@
+"""Snapshots Parquet: falhas desativam o snapshot da tabela, com aviso no log."""
+
+import logging
+import shutil
+
+import pytest
+
+from nucleo_w7m import config
+from nucleo_w7m.carga import carregar_tabela
+
+@pytest.fixture
+def diretorio_dados(tmp_path):
+    anterior = config.DIRETORIO_DADOS
+    shutil.copy(f'{anterior}/partner.csv', tmp_path / 'partner.csv')
+    config.definir_diretorio_dados(str(tmp_path))
+    yield tmp_path
+    config.definir_diretorio_dados(anterior)
+
+@pytest.mark.skipif(not config.PARQUET_DISPONIVEL, reason="pyarrow não instalado")
+def test_snapshot_corrompido_relido_com_aviso(diretorio_dados, caplog):
+    esperado = carregar_tabela('partner')
+    (diretorio_dados / '.snapshots' / 'partner.parquet').write_bytes(b'corrompido')
+
+    with caplog.at_level(logging.WARNING, logger='nucleo_w7m.carga'):
+        df = carregar_tabela('partner')
+
+    assert len(df) == len(esperado)
+    assert any('Snapshot de partner ignorado' in registro.getMessage() for registro in caplog.records)
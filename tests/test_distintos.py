@@ -0,0 +1,98 @@
+"""Contagem de distintos: caminho exato abaixo do limite e HyperLogLog dentro do erro configurado."""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nucleo_w7m.config import ERRO_RELATIVO_HLL
+from nucleo_w7m.distintos import (
+    EsbocoHLL,
+    _bit_length,
+    _estimar_hll,
+    contar_distintos,
+    contar_distintos_por_grupo,
+    usar_contagem_aproximada,
+)
+
+def _ids(inicio, fim):
+    return pd.Series([f'u{i}' for i in range(inicio, fim)])
+
+def test_bit_length_igual_ao_do_python():
+    valores = [0, 1, 2, 3, 255, 256, 2**32 - 1, 2**32, 2**32 + 1, 2**53 + 1, 2**63, 2**64 - 1]
+
+    obtido = _bit_length(np.array(valores, dtype=np.uint64))
+
+    assert obtido.tolist() == [valor.bit_length() for valor in valores]
+
+def test_contagem_linear_com_poucos_registradores_ocupados():
+    registradores = np.zeros(1024, dtype=np.uint8)
+    registradores[:10] = 1
+
+    # Dez registradores ocupados de 1024: m * ln(m / zeros)
+    assert _estimar_hll(registradores) == round(1024 * np.log(1024 / 1014))
+    assert EsbocoHLL(10, registradores).estimar() == 10
+    assert EsbocoHLL(10).estimar() == 0
+
+@pytest.mark.parametrize('cardinalidade', [100, 5_000, 50_000, 200_000])
+def test_erro_relativo_do_hll(cardinalidade):
+    valores = _ids(0, cardinalidade)
+    # Repetições não mudam a estimativa
+    valores = pd.concat([valores, valores.iloc[:cardinalidade // 2]], ignore_index=True)
+
+    estimado = contar_distintos(valores, limite_linhas=1)
+
+    # Folga de três erros padrão sobre o erro relativo configurado
+    assert abs(estimado - cardinalidade) / cardinalidade <= 3 * ERRO_RELATIVO_HLL
+
+def test_caminho_exato_abaixo_do_limite():
+    valores = pd.Series(['a', 'b', None, 'a'])
+
+    assert not usar_contagem_aproximada(4, limite_linhas=4)
+    assert usar_contagem_aproximada(5, limite_linhas=4)
+    assert contar_distintos(valores, pd.Series(['b', 'c']), limite_linhas=6) == 3
+    assert contar_distintos(pd.Series([], dtype=object)) == 0
+
+def test_limite_zero_sempre_exato():
+    assert not usar_contagem_aproximada(10**12, limite_linhas=0)
+
+@pytest.mark.parametrize('ambiente, esperado', [
+    ({'DASHBOARD_LIMITE_CONTAGEM_EXATA': ''}, '5000000'),
+    ({'DASHBOARD_LIMITE_CONTAGEM_EXATA': '1000'}, '1000'),
+    ({'DASHBOARD_LIMITE_CONTAGEM_EXATA': '1000', 'DASHBOARD_CONTAGEM_APROXIMADA': '0'}, 'None'),
+])
+def test_limite_lido_do_ambiente(ambiente, esperado):
+    """Variável vazia usa o padrão; DASHBOARD_CONTAGEM_APROXIMADA='0' desativa o HyperLogLog."""
+    resultado = subprocess.run(
+        [sys.executable, '-c', 'from nucleo_w7m import config; print(config.LIMITE_LINHAS_CONTAGEM_EXATA)'],
+        env={**os.environ, **ambiente}, capture_output=True, text=True, check=True)
+
+    assert resultado.stdout.strip() == esperado
+
+def test_uniao_de_esbocos_igual_ao_esboco_da_uniao():
+    a, b = _ids(0, 30_000), _ids(20_000, 50_000)
+
+    unidos = EsbocoHLL().adicionar(a) | EsbocoHLL().adicionar(b)
+
+    assert unidos.estimar() == EsbocoHLL().adicionar(pd.concat([a, b])).estimar()
+    assert unidos.estimar() == contar_distintos(a, b, limite_linhas=1)
+    with pytest.raises(ValueError, match='precisões diferentes'):
+        EsbocoHLL(10) | EsbocoHLL(11)
+
+def test_por_grupo_aproximado_igual_aos_esbocos_de_cada_grupo():
+    valores = pd.concat([_ids(0, 20_000), _ids(10_000, 40_000), _ids(0, 500), pd.Series([None, 'x'])],
+                        ignore_index=True)
+    grupos = pd.Series(['A'] * 20_000 + ['B'] * 30_000 + ['C'] * 500 + ['A', None])
+
+    aproximado = contar_distintos_por_grupo(valores, grupos, limite_linhas=1)
+    exato = contar_distintos_por_grupo(valores, grupos, limite_linhas=10**9)
+
+    assert aproximado.index.tolist() == exato.index.tolist() == ['A', 'B', 'C']
+    assert exato.tolist() == [20_000, 30_000, 500]
+    for grupo in ('A', 'B', 'C'):
+        esboco = EsbocoHLL().adicionar(valores[(grupos == grupo) & valores.notna()])
+        assert aproximado[grupo] == esboco.estimar()
+        assert abs(aproximado[grupo] - exato[grupo]) / exato[grupo] <= 3 * ERRO_RELATIVO_HLL
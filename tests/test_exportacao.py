@@ -0,0 +1,86 @@
+"""Exportação para download aceita pelo st.download_button, e paginação com filtro e ordenação no servidor."""
+
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from nucleo_w7m.exportacao import FORMATOS_EXPORTACAO, exportar_para_arquivo, filtrar_texto, paginar_dados
+
+def _df_exemplo():
+    return pd.DataFrame({
+        'User ID': ['a', 'b', None],
+        'Price': [10.0, 2.5, None],
+        'Created At': pd.to_datetime(['2025-01-01', '2025-01-02', None]),
+    })
+
+@pytest.mark.parametrize('formato', list(FORMATOS_EXPORTACAO))
+def test_exportacao_aceita_pelo_download_button(formato):
+    """O retorno de gerar_exportacao (exportar_para_arquivo) passa pelo conversor do Streamlit."""
+    df = _df_exemplo()
+    # Blocos de uma linha: o arquivo é montado em várias escritas
+    dados = exportar_para_arquivo(df, formato, tamanho_bloco=1)
+
+    conteudo, _ = convert_data_to_bytes_and_infer_mime(dados, TypeError("tipo não suportado"))
+
+    if formato == 'csv':
+        lido = pd.read_csv(io.BytesIO(conteudo), parse_dates=['Created At'])
+    else:
+        lido = pd.read_parquet(io.BytesIO(conteudo))
+    assert len(lido) == len(df)
+    assert list(lido.columns) == list(df.columns)
+    assert lido['Price'].sum() == df['Price'].sum()
+
+def _df_paginacao():
+    return pd.DataFrame({
+        'Nome': ['Beta', 'alfa', None, 'Gama', 'ALFAIATE', 'beta'],
+        'Categoria': pd.Categorical(['Ouro', None, 'prata', 'Ouro', None, 'Prata']),
+        'Pontos': [30.0, 10.0, None, 10.0, None, 20.0],
+    }, index=[10, 11, 12, 13, 14, 15])
+
+def test_paginas_cobrem_as_linhas_sem_repetir():
+    df = _df_paginacao()
+
+    paginas = [paginar_dados(df, pagina, 4) for pagina in (1, 2, 3)]
+
+    assert [len(pagina) for pagina, _ in paginas] == [4, 2, 0]
+    assert all(total == 6 for _, total in paginas)
+    assert pd.concat([pagina for pagina, _ in paginas]).index.tolist() == df.index.tolist()
+
+def test_ordenacao_estavel_com_nulos_no_fim():
+    df = _df_paginacao()
+
+    crescente, _ = paginar_dados(df, 1, 10, ordenacao=df['Pontos'])
+    decrescente, _ = paginar_dados(df, 1, 10, ordenacao=df['Pontos'], ascendente=False)
+
+    # Empates (10.0 e os nulos) mantêm a ordem original nos dois sentidos
+    assert crescente.index.tolist() == [11, 13, 15, 10, 12, 14]
+    assert decrescente.index.tolist() == [10, 15, 11, 13, 12, 14]
+    # df não é reordenado
+    assert df.index.tolist() == [10, 11, 12, 13, 14, 15]
+
+def test_filtro_de_texto_ignora_maiusculas_e_nulos():
+    df = _df_paginacao()
+
+    assert filtrar_texto(df['Nome'], 'alfa').tolist() == [False, True, False, False, True, False]
+    assert filtrar_texto(df['Pontos'], '10').tolist() == [False, True, False, True, False, False]
+
+def test_codigo_nulo_de_category_nunca_casa():
+    df = _df_paginacao()
+
+    assert filtrar_texto(df['Categoria'], 'prata').tolist() == [False, False, True, False, False, True]
+    # 'nan' e '' casariam com o texto de um nulo convertido em string
+    assert not filtrar_texto(df['Categoria'], 'nan').any()
+    assert filtrar_texto(df['Categoria'], '').tolist() == df['Categoria'].notna().tolist()
+
+def test_filtro_combinado_com_ordenacao():
+    df = _df_paginacao()
+    mascara = filtrar_texto(df['Nome'], 'a')
+
+    pagina, total = paginar_dados(df, 2, 2, mascara=mascara, ordenacao=df['Pontos'], ascendente=False)
+
+    # Casam: Beta(30), alfa(10), Gama(10), ALFAIATE(nulo), beta(20) -> 30, 20, 10, 10, nulo
+    assert total == 5
+    assert pagina.index.tolist() == [11, 13]
+    assert paginar_dados(df, 3, 2, mascara=mascara, ordenacao=df['Pontos'], ascendente=False)[0].index.tolist() == [14]
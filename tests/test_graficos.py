@@ -0,0 +1,134 @@
+"""Redução de pontos dos gráficos (LTTB e cauda agrupada) e cache LRU de figuras."""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from nucleo_w7m.graficos import CacheFiguras, agrupar_cauda, indices_lttb, reduzir_serie
+
+@pytest.mark.parametrize('n, max_pontos', [(10, 3), (1_000, 50), (1_001, 500), (5_000, 4_999)])
+def test_lttb_mantem_extremos_em_ordem_com_max_pontos(n, max_pontos):
+    x = np.arange(n)
+    y = np.sin(x / 7.0) * 100 + np.random.default_rng(n).normal(size=n)
+
+    indices = indices_lttb(x, y, max_pontos)
+
+    assert len(indices) == max_pontos
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+def test_lttb_preserva_pico_isolado():
+    y = np.zeros(1_000)
+    y[437] = 50.0
+
+    assert 437 in indices_lttb(np.arange(1_000), y, 20)
+
+def test_lttb_sem_reducao_devolve_todos_os_indices():
+    assert indices_lttb(np.arange(5), np.arange(5), 5).tolist() == [0, 1, 2, 3, 4]
+    assert indices_lttb(np.arange(5), np.arange(5), 2).tolist() == [0, 1, 2, 3, 4]
+
+def test_reduzir_serie_dentro_do_limite_devolve_o_proprio_df():
+    df = pd.DataFrame({'Semana': pd.period_range('2025-01-06', periods=10, freq='W'), 'Usuários': range(10)})
+
+    assert reduzir_serie(df, 'Semana', 'Usuários', max_pontos=10) is df
+
+def test_reduzir_serie_com_datas_e_nulos():
+    df = pd.DataFrame({'Data': pd.date_range('2025-01-01', periods=2_000, freq='h'),
+                       'Pontos': np.where(np.arange(2_000) % 11 == 0, np.nan, np.arange(2_000.0))})
+
+    reduzido = reduzir_serie(df, 'Data', 'Pontos', max_pontos=100)
+
+    assert len(reduzido) == 100
+    assert reduzido['Data'].is_monotonic_increasing
+    assert reduzido.iloc[[0, -1]].index.tolist() == [0, 1_999]
+
+def test_agrupar_cauda_mantem_o_total_em_outros():
+    contagem = pd.Series([5, 40, 1, 12, 3, 7], index=['e', 'a', 'f', 'b', 'd', 'c'], name='Unidades')
+
+    agrupada = agrupar_cauda(contagem, max_barras=4)
+
+    assert agrupada.index.tolist() == ['a', 'b', 'c', 'Outros']
+    assert agrupada['Outros'] == 5 + 3 + 1
+    assert agrupada.sum() == contagem.sum()
+    assert agrupada.name == 'Unidades'
+
+def test_agrupar_cauda_dentro_do_limite_devolve_a_propria_contagem():
+    contagem = pd.Series([3, 2], index=['a', 'b'])
+
+    assert agrupar_cauda(contagem, max_barras=2) is contagem
+
+def _figura(tamanho):
+    return go.Figure(go.Bar(x=['a'], y=[1], name='x' * tamanho))
+
+def _construtor(figura, chamadas):
+    def construir():
+        chamadas.append(1)
+        return figura
+    return construir
+
+def test_cache_devolve_a_figura_sem_reconstruir():
+    cache, chamadas = CacheFiguras(max_itens=4, max_bytes=10**6), []
+
+    primeira = cache.obter('a', _construtor(_figura(1), chamadas))
+    segunda = cache.obter('a', _construtor(_figura(1), chamadas))
+
+    assert len(chamadas) == 1
+    assert segunda.to_dict()['data'] == primeira.to_dict()['data']
+    assert cache.obter('vazia', lambda: None) is None
+    assert cache.obter('vazia', _construtor(_figura(1), chamadas)) is None
+    assert len(chamadas) == 1
+    assert cache.estatisticas() == {'acertos': 2, 'falhas': 2, 'descartes': 0, 'itens': 2,
+                                    'bytes': len(primeira.to_json())}
+
+def test_cache_descarta_o_menos_usado_no_limite_de_itens():
+    cache = CacheFiguras(max_itens=2, max_bytes=10**6)
+    cache.obter('a', lambda: _figura(1))
+    cache.obter('b', lambda: _figura(1))
+    # 'a' volta a ser a mais recente, então 'b' sai quando 'c' entra
+    cache.obter('a', lambda: _figura(1))
+    cache.obter('c', lambda: _figura(1))
+
+    assert list(cache._itens) == ['a', 'c']
+    assert cache.estatisticas()['descartes'] == 1
+    chamadas = []
+    cache.obter('b', _construtor(_figura(1), chamadas))
+    assert chamadas == [1]
+    assert list(cache._itens) == ['c', 'b']
+
+def test_cache_respeita_o_limite_de_bytes():
+    tamanho = len(_figura(1_000).to_json())
+    cache = CacheFiguras(max_itens=100, max_bytes=int(tamanho * 2.5))
+
+    for chave in 'abcd':
+        cache.obter(chave, lambda: _figura(1_000))
+
+    estatisticas = cache.estatisticas()
+    assert list(cache._itens) == ['c', 'd']
+    assert estatisticas['bytes'] == 2 * tamanho <= cache.max_bytes
+    assert estatisticas['descartes'] == 2
+
+def test_cache_nao_guarda_figura_maior_que_o_limite():
+    pequena = _figura(1)
+    cache = CacheFiguras(max_itens=10, max_bytes=len(pequena.to_json()) + 100)
+    cache.obter('pequena', lambda: pequena)
+    chamadas = []
+
+    grande = cache.obter('grande', _construtor(_figura(1_000), chamadas))
+    cache.obter('grande', _construtor(_figura(1_000), chamadas))
+
+    assert grande is not None
+    assert len(chamadas) == 2
+    # A figura grande não entra nem expulsa as que já estavam guardadas
+    assert list(cache._itens) == ['pequena']
+    assert cache.estatisticas()['descartes'] == 0
+    assert cache.estatisticas()['falhas'] == 3
+
+def test_cache_limpar_esvazia_os_itens():
+    cache = CacheFiguras(max_itens=4, max_bytes=10**6)
+    cache.obter('a', lambda: _figura(1))
+
+    cache.limpar()
+
+    assert len(cache) == 0
+    assert cache.estatisticas()['bytes'] == 0
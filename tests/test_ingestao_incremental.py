@@ -0,0 +1,74 @@
+"""Leitura incremental: a carga inicial só cobre linhas completas e o offset é o do conteúdo lido."""
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from nucleo_w7m import config, registro as modulo_registro
+from nucleo_w7m.registro import RegistroTabelas
+
+ARQUIVO = 'campaign_user.csv'
+
+@pytest.fixture
+def diretorio_dados(tmp_path):
+    anterior = config.DIRETORIO_DADOS
+    shutil.copy(f'{anterior}/{ARQUIVO}', tmp_path / ARQUIVO)
+    config.definir_diretorio_dados(str(tmp_path))
+    yield tmp_path
+    config.definir_diretorio_dados(anterior)
+
+def _linhas(caminho):
+    return caminho.read_bytes().splitlines(keepends=True)
+
+def _carregar(usar_snapshot=False):
+    registro = RegistroTabelas(usar_snapshot=usar_snapshot, codificar_chaves=False, trabalhadores=1)
+    registro.carregar_base(['campaign_user'])
+    return registro
+
+def _conferir_com_carga_completa(registro):
+    esperado = _carregar()['campaign_user']
+    obtido = registro['campaign_user'].reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, check_categorical=False)
+    assert not obtido['Campaign User ID'].duplicated().any()
+
+@pytest.mark.parametrize('usar_snapshot', [False, True])
+def test_linha_incompleta_na_carga_inicial(diretorio_dados, usar_snapshot):
+    """Uma linha sendo escrita durante a primeira carga não entra truncada nem é lida duas vezes."""
+    caminho = diretorio_dados / ARQUIVO
+    linhas = _linhas(caminho)
+    nova = linhas[1].replace(linhas[1][:8], b'ffffffff', 1)
+    with open(caminho, 'ab') as f:
+        f.write(nova[:20])
+
+    registro = _carregar(usar_snapshot)
+    assert len(registro['campaign_user']) == len(linhas) - 1
+
+    # O escritor termina a linha: só ela é anexada, inteira
+    with open(caminho, 'ab') as f:
+        f.write(nova[20:])
+    assert registro.verificar_alteracoes() == []
+    assert len(registro['campaign_user']) == len(linhas)
+    _conferir_com_carga_completa(registro)
+
+def test_linhas_anexadas_entre_stat_e_leitura(diretorio_dados, monkeypatch):
+    """Linhas anexadas depois do fingerprint e antes da leitura não são ingeridas de novo."""
+    caminho = diretorio_dados / ARQUIVO
+    linhas = _linhas(caminho)
+    novas = [linha.replace(linha[:8], b'eeeeeeee', 1) for linha in linhas[-3:]]
+    fingerprint_original = modulo_registro._fingerprint_rapido
+
+    def fingerprint_e_anexar(nome_tabela):
+        fingerprint = fingerprint_original(nome_tabela)
+        with open(caminho, 'ab') as f:
+            f.writelines(novas)
+        return fingerprint
+
+    monkeypatch.setattr(modulo_registro, '_fingerprint_rapido', fingerprint_e_anexar)
+    registro = _carregar()
+    monkeypatch.setattr(modulo_registro, '_fingerprint_rapido', fingerprint_original)
+    assert len(registro['campaign_user']) == len(linhas) - 1 + len(novas)
+
+    assert registro.verificar_alteracoes() == []
+    assert len(registro['campaign_user']) == len(linhas) - 1 + len(novas)
+    _conferir_com_carga_completa(registro)
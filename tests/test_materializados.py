@@ -0,0 +1,133 @@
+"""KPIs materializados e fatias do cubo temporal conferidos contra as fórmulas por parceiro."""
+
+import pandas as pd
+import pytest
+
+from nucleo_w7m import cubo, kpis
+from nucleo_w7m.config import TODOS_OS_PARCEIROS
+from nucleo_w7m.cubo import (
+    fatiar_cubo,
+    fatiar_usuarios_semanais,
+    materializar_cubo_temporal,
+    materializar_usuarios_semanais,
+)
+from nucleo_w7m.kpis import calcular_kpis_dashboard_geral, materializar_kpis, obter_kpis
+from nucleo_w7m.merges import adicionar_colunas_calendario
+
+PARCEIROS = ['A', 'B', 'C', TODOS_OS_PARCEIROS]
+
+PONTOS_USUARIO = {'u1': 10, 'u2': 0, 'u3': 5, 'u4': 7, 'u5': 0, 'u6': 3}
+
+def _com_pontos(df):
+    df['Actual Points'] = df['User ID'].map(PONTOS_USUARIO)
+    return df
+
+@pytest.fixture
+def merges():
+    """rewards, boosts e campanhas já montados; u1 aparece em dois parceiros e há linhas sem parceiro."""
+    df_campanhas = _com_pontos(pd.DataFrame({
+        'Partner Name': ['A', 'A', 'B', 'B', None, 'A'],
+        'User ID': ['u1', 'u2', 'u1', 'u3', 'u4', None],
+        'Product Points': [10.0, 20.0, 30.0, 40.0, 50.0, 5.0],
+        'Campaign User Created At': pd.to_datetime(['2025-03-03 09:10', '2025-03-03 21:00', '2025-03-05 09:30',
+                                                    '2025-03-12 14:00', '2025-03-12 14:45', '2025-03-16 23:59']),
+    }))
+    adicionar_colunas_calendario(df_campanhas, 'Campaign User Created At', {
+        'data': 'data_participacao', 'semana': 'semana_participacao', 'hora': 'hora_participacao'})
+    df_boosts = _com_pontos(pd.DataFrame({
+        'Partner Name': ['A', 'B', 'B', None, 'B'],
+        'User ID': ['u1', 'u1', 'u5', 'u6', 'u5'],
+        'Subscription ID': ['s1', 's2', 's3', 's4', 's5'],
+        'Start Date': pd.to_datetime(['2025-03-03', '2025-03-04', '2025-03-04', '2025-03-06', '2025-03-11']),
+    }))
+    adicionar_colunas_calendario(df_boosts, 'Start Date', {
+        'data': 'data_inicio', 'semana': 'semana_inicio', 'hora': 'hora_inicio'})
+    df_rewards = _com_pontos(pd.DataFrame({
+        'Partner Name': ['A', 'A', 'B'],
+        'User ID': ['u2', None, 'u6'],
+        'Price': [100.0, 50.0, 25.0],
+    }))
+    return df_rewards, df_boosts, df_campanhas
+
+@pytest.fixture(params=['exata', 'aproximada'])
+def contagem(request, monkeypatch):
+    """Roda cada teste também pelo caminho dos esboços HLL (cardinalidades pequenas saem exatas)."""
+    if request.param == 'aproximada':
+        for modulo in (kpis, cubo):
+            monkeypatch.setattr(modulo, 'usar_contagem_aproximada', lambda linhas, limite_linhas=None: True)
+    return request.param
+
+def _filtrar(df, parceiro):
+    return df if parceiro == TODOS_OS_PARCEIROS else df[df['Partner Name'] == parceiro]
+
+def _kpis_esperados(df_rewards, df_boosts, df_campanhas, parceiro):
+    """Fórmulas do dashboard antes da tabela materializada: filtro por parceiro e conjuntos de usuários."""
+    filtrados = [_filtrar(df, parceiro) for df in (df_rewards, df_boosts, df_campanhas)]
+    engajados = set().union(*(set(df['User ID'].dropna()) for df in filtrados))
+    ativos = sum(PONTOS_USUARIO[usuario] > 0 for usuario in engajados)
+    rewards, boosts, campanhas = filtrados
+    pontos_missoes = campanhas['Product Points'].sum()
+    media = campanhas['Product Points'].mean() if len(campanhas) > 0 else 0
+    return {'usuarios_engajados': len(engajados), 'usuarios_ativos': ativos, 'pontos_missoes': pontos_missoes,
+            'media_pontos_missao': media, 'recompensas_resgatadas': len(rewards),
+            'novas_assinaturas': len(boosts), 'total_pontos': pontos_missoes + rewards['Price'].sum()}
+
+@pytest.mark.parametrize('parceiro', PARCEIROS)
+def test_kpis_iguais_as_formulas_por_parceiro(merges, contagem, parceiro):
+    df_kpis = materializar_kpis(*merges)
+    esperado = _kpis_esperados(*merges, parceiro)
+
+    linha = obter_kpis(df_kpis, parceiro)
+
+    for coluna, valor in esperado.items():
+        assert linha[coluna] == pytest.approx(valor), coluna
+    assert calcular_kpis_dashboard_geral(df_kpis, parceiro) == pytest.approx(
+        (esperado['usuarios_engajados'], esperado['pontos_missoes'], esperado['recompensas_resgatadas'],
+         esperado['novas_assinaturas'], esperado['total_pontos']))
+
+def test_todos_conta_usuarios_uma_vez_e_linhas_sem_parceiro(merges):
+    df_kpis = materializar_kpis(*merges)
+
+    # A tem u1 e u2, B tem u1, u3, u5 e u6; u4 só aparece numa linha sem parceiro
+    assert df_kpis.loc[['A', 'B'], 'usuarios_engajados'].tolist() == [2, 4]
+    assert df_kpis.loc[TODOS_OS_PARCEIROS, 'usuarios_engajados'] == 6
+    assert df_kpis.loc[TODOS_OS_PARCEIROS, 'pontos_missoes'] == 155.0
+
+@pytest.mark.parametrize('parceiro', PARCEIROS)
+def test_fatias_do_cubo_iguais_aos_agrupamentos_das_linhas(merges, parceiro):
+    _, df_boosts, df_campanhas = merges
+    cubo_temporal = materializar_cubo_temporal(df_campanhas, df_boosts)
+    campanhas = _filtrar(df_campanhas, parceiro)
+
+    fatia = fatiar_cubo(cubo_temporal, 'campanhas', parceiro)
+
+    assert fatia.groupby('semana')['pontos'].sum().to_dict() == \
+        campanhas.groupby('semana_participacao')['Product Points'].sum().to_dict()
+    assert fatia.groupby('dia')['eventos'].sum().to_dict() == campanhas.groupby('data_participacao').size().to_dict()
+    assert fatia.groupby('hora')['eventos'].sum().to_dict() == campanhas['hora_participacao'].value_counts().to_dict()
+    assert fatia.groupby('dia_semana')['eventos'].sum().to_dict() == \
+        campanhas['Campaign User Created At'].dt.dayofweek.value_counts().to_dict()
+    assert fatiar_cubo(cubo_temporal, 'boosts', parceiro)['eventos'].sum() == len(_filtrar(df_boosts, parceiro))
+
+@pytest.mark.parametrize('parceiro', PARCEIROS)
+def test_usuarios_semanais_iguais_ao_nunique_por_semana(merges, contagem, parceiro):
+    _, df_boosts, df_campanhas = merges
+    usuarios = materializar_usuarios_semanais(df_campanhas, df_boosts)
+
+    for fonte, df, coluna_semana in (('boosts', df_boosts, 'semana_inicio'),
+                                     ('campanhas', df_campanhas, 'semana_participacao')):
+        fatia = fatiar_usuarios_semanais(usuarios, fonte, parceiro)
+        filtrado = _filtrar(df, parceiro)
+        esperado = filtrado['User ID'].groupby(filtrado[coluna_semana]).nunique()
+
+        assert dict(zip(fatia['semana'], fatia['usuarios'])) == esperado[esperado > 0].to_dict()
+
+def test_usuarios_semanais_todos_nao_soma_os_parceiros(merges, contagem):
+    _, df_boosts, df_campanhas = merges
+    usuarios = materializar_usuarios_semanais(df_campanhas, df_boosts)
+    semana = pd.Period('2025-03-03', freq='W')
+
+    por_semana = fatiar_usuarios_semanais(usuarios, 'boosts', TODOS_OS_PARCEIROS).set_index('semana')['usuarios']
+
+    # Semana de 03/03: u1 em A e em B, u5 em B e u6 sem parceiro
+    assert por_semana[semana] == 3
@@ -0,0 +1,61 @@
+"""Merge de rewards sem a chave Store Product ID: ligação por data no user_product, com aviso."""
+
+import pandas as pd
+
+from nucleo_w7m.merges import fazer_merge_rewards_corrigido, vincular_transacoes_store_product
+
+def _transacoes():
+    return pd.DataFrame({
+        'Transaction ID': ['t1', 't2'],
+        'User ID': ['u1', 'u2'],
+        'Price': [100.0, 50.0],
+        'Transaction Created At': pd.to_datetime(['2025-08-01 10:00', '2025-08-02 12:00']),
+    })
+
+def _user_product():
+    return pd.DataFrame({
+        'User Product ID': ['up1', 'up2', 'up3'],
+        'Product ID': ['p1', 'p2', 'p1'],
+        'User ID': ['u1', 'u1', 'u2'],
+        'User Product Created At': pd.to_datetime(['2025-08-01 10:01', '2025-08-05 09:00', '2025-08-02 12:00']),
+    })
+
+def test_sem_chave_liga_pela_data_mais_proxima_com_aviso():
+    avisos = []
+    df = vincular_transacoes_store_product(_transacoes(), None, _user_product(), avisos)
+
+    assert dict(zip(df['Transaction ID'], df['Product ID'])) == {'t1': 'p1', 't2': 'p1'}
+    assert [aviso.nivel for aviso in avisos] == ['aviso']
+
+def test_sem_chave_e_sem_user_product_registra_erro():
+    avisos = []
+    df = vincular_transacoes_store_product(_transacoes(), None, None, avisos)
+
+    assert df.empty
+    assert [aviso.nivel for aviso in avisos] == ['erro']
+
+def test_merge_rewards_sem_chave_usa_user_product():
+    df_product = pd.DataFrame({'Product ID': ['p1', 'p2'], 'Partner ID': ['x', 'x'], 'Name': ['A', 'B']})
+    df_partner = pd.DataFrame({'Partner ID': ['x'], 'Partner Name': ['Parceiro']})
+    df_user = pd.DataFrame({'User ID': ['u1', 'u2'], 'Username': ['ana', 'bia'], 'Email': ['a@x', 'b@x'],
+                            'Actual Points': [1, 2], 'Faixa_Etaria': ['18-24', '25-34']})
+    df_store_product = pd.DataFrame({'Store Product ID': ['s1'], 'Product ID': ['p1']})
+    avisos = []
+
+    df = fazer_merge_rewards_corrigido(_transacoes(), df_store_product, df_product, df_partner, df_user,
+                                       _user_product(), avisos=avisos)
+
+    assert len(df) == 2
+    assert set(df['Partner Name']) == {'Parceiro'}
+    assert len(avisos) == 1
+
+def test_com_chave_avisa_transacoes_com_chave_nula():
+    df_transacoes = _transacoes().assign(**{'Store Product ID': ['s1', None]})
+    df_store_product = pd.DataFrame({'Store Product ID': ['s1'], 'Product ID': ['p1']})
+    avisos = []
+
+    df = vincular_transacoes_store_product(df_transacoes, df_store_product, None, avisos)
+
+    assert df['Transaction ID'].tolist() == ['t1']
+    assert [aviso.nivel for aviso in avisos] == ['aviso']
+    assert avisos[0].mensagem.startswith('1 transações sem Store Product ID')
@@ -0,0 +1,95 @@
+"""Merges dos motores DuckDB e Polars: mesmo resultado do pandas e crescimento conferido pelas contagens de chave."""
+
+import pandas as pd
+import pytest
+
+from nucleo_w7m.merges import ErroCardinalidadeJoin, fazer_merge_boosts_corrigido, fazer_merge_rewards_corrigido
+from nucleo_w7m.registro import MERGES_POR_MOTOR
+
+def _entradas_boosts():
+    df_subscription = pd.DataFrame({
+        'Subscription ID': ['s1', 's2', 's3', 's4'],
+        'User ID': ['u1', 'u2', None, 'u1'],
+        'Boost ID': ['b1', 'b2', 'b1', None],
+        'Status': ['active', 'active', 'canceled', 'active'],
+    })
+    df_boost = pd.DataFrame({
+        'Boost ID': ['b1', 'b3'],
+        'Partner ID': ['x', 'x'],
+        'Boost Name': ['Turbo', 'Mega'],
+        'Status': ['on', 'off'],
+    })
+    df_partner = pd.DataFrame({'Partner ID': ['x'], 'Partner Name': ['Parceiro']})
+    df_user = pd.DataFrame({'User ID': ['u1', 'u2'], 'Username': ['ana', 'bia'], 'Email': ['a@x', 'b@x'],
+                            'Actual Points': [1, 2], 'Faixa_Etaria': ['18-24', '25-34']})
+    return df_subscription, df_boost, df_partner, df_user
+
+@pytest.fixture(params=['duckdb', 'polars'])
+def merge_boosts(request):
+    pytest.importorskip(request.param)
+    return MERGES_POR_MOTOR[request.param][1]
+
+def test_boosts_igual_ao_pandas(merge_boosts):
+    esperado = fazer_merge_boosts_corrigido(*_entradas_boosts())
+
+    pd.testing.assert_frame_equal(merge_boosts(*_entradas_boosts()), esperado)
+    pd.testing.assert_frame_equal(merge_boosts(*_entradas_boosts(), partner_id='x'),
+                                  fazer_merge_boosts_corrigido(*_entradas_boosts(), partner_id='x'))
+
+def test_join_que_multiplica_as_linhas_e_recusado(merge_boosts):
+    df_subscription, df_boost, df_partner, df_user = _entradas_boosts()
+    # Quatro boosts com o mesmo ID: 4 assinaturas viram 10 linhas, acima do fator 2
+    df_boost = pd.concat([df_boost[df_boost['Boost ID'] == 'b1']] * 4, ignore_index=True)
+
+    with pytest.raises(ErroCardinalidadeJoin, match='subscription -> boost'):
+        merge_boosts(df_subscription, df_boost, df_partner, df_user)
+
+@pytest.mark.parametrize('motor', ['duckdb', 'polars'])
+def test_rewards_avisa_transacoes_sem_chave_como_o_pandas(motor):
+    pytest.importorskip(motor)
+    df_subscription, df_boost, df_partner, df_user = _entradas_boosts()
+    df_transacoes = pd.DataFrame({'Transaction ID': ['t1', 't2', 't3'], 'User ID': ['u1', 'u2', 'u1'],
+                                  'Store Product ID': ['sp1', None, None]})
+    df_store_product = pd.DataFrame({'Store Product ID': ['sp1'], 'Product ID': ['p1']})
+    df_product = pd.DataFrame({'Product ID': ['p1'], 'Partner ID': ['x'], 'Name': ['Camisa']})
+    entradas = (df_transacoes, df_store_product, df_product, df_partner, df_user)
+    esperados, avisos = [], []
+
+    esperado = fazer_merge_rewards_corrigido(*entradas, avisos=esperados)
+    df = MERGES_POR_MOTOR[motor][0](*entradas, avisos=avisos)
+
+    pd.testing.assert_frame_equal(df, esperado)
+    assert avisos == esperados
+    assert len(avisos) == 1
+
+def test_polars_aceita_lazyframes():
+    pl = pytest.importorskip('polars')
+    fazer_merge_boosts_polars = MERGES_POR_MOTOR['polars'][1]
+    entradas = _entradas_boosts()
+
+    df = fazer_merge_boosts_polars(*[pl.from_pandas(tabela).lazy() for tabela in entradas], partner_id='x')
+
+    esperado = fazer_merge_boosts_corrigido(*entradas, partner_id='x')
+    assert df['Subscription ID'].tolist() == esperado['Subscription ID'].tolist()
+    assert df['Boost Name'].tolist() == esperado['Boost Name'].tolist()
+
+@pytest.mark.parametrize('motor', ['pandas', 'duckdb', 'polars'])
+def test_campanha_com_varios_rewards_nao_e_recusada(motor):
+    pytest.importorskip(motor)
+    _, _, df_partner, df_user = _entradas_boosts()
+    df_campaign_user = pd.DataFrame({'Campaign User ID': ['cu1', 'cu2'], 'User ID': ['u1', 'u2'],
+                                     'Status': ['completed', 'Completed'], 'Campaign ID': ['c1', 'c1']})
+    df_campaign = pd.DataFrame({'Campaign ID': ['c1'], 'Partner ID': ['x'], 'Campaign Name': ['Missão']})
+    # Três rewards na mesma campanha: o join triplica as linhas
+    df_reward = pd.DataFrame({'Reward ID': ['r1', 'r2', 'r3'], 'Campaign ID': ['c1'] * 3,
+                              'Product ID': ['p1', 'p2', 'p3']})
+    df_product = pd.DataFrame({'Product ID': ['p1', 'p2', 'p3'], 'Product Points': [10.0, 20.0, 30.0],
+                               'Name': ['A', 'B', 'C'], 'Type': ['t', 't', 't']})
+    avisos = []
+
+    df = MERGES_POR_MOTOR[motor][2](df_campaign_user, df_campaign, df_reward, df_product, df_partner, df_user,
+                                    avisos=avisos)
+
+    assert len(df) == 6
+    assert df['Product Points'].sum() == 120.0
+    assert avisos == []
@@ -0,0 +1,39 @@
+"""Registro: user_product só é lido quando o merge de rewards precisa da ligação por data."""
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from nucleo_w7m import config
+from nucleo_w7m.registro import criar_registro_padrao
+
+TABELAS_REWARDS = ['store_transaction.csv', 'store_product.csv', 'product.csv', 'partner.csv', 'user.csv',
+                   'user_product.csv']
+
+@pytest.fixture
+def diretorio_dados(tmp_path):
+    anterior = config.DIRETORIO_DADOS
+    for arquivo in TABELAS_REWARDS:
+        shutil.copy(f'{anterior}/{arquivo}', tmp_path / arquivo)
+    config.definir_diretorio_dados(str(tmp_path))
+    yield tmp_path
+    config.definir_diretorio_dados(anterior)
+
+def test_rewards_com_chave_nao_le_user_product(diretorio_dados):
+    registro = criar_registro_padrao(usar_snapshot=False, motor='pandas', trabalhadores=1)
+
+    assert len(registro['rewards']) > 0
+    assert 'user_product' not in registro.carregados()
+
+def test_rewards_sem_chave_le_user_product_sob_demanda(diretorio_dados):
+    caminho = diretorio_dados / 'store_transaction.csv'
+    pd.read_csv(caminho).drop(columns=['Store Product ID']).to_csv(caminho, index=False)
+    registro = criar_registro_padrao(usar_snapshot=False, motor='pandas', trabalhadores=1)
+    versao_antes = registro.versao_dados('rewards')
+
+    assert len(registro['rewards']) > 0
+    assert 'user_product' in registro.carregados()
+    assert [aviso.nivel for aviso in registro.avisos[('rewards', None)]] == ['aviso']
+    # A leitura sob demanda entra na versão dos dados de rewards
+    assert registro.versao_dados('rewards') != versao_antes
@@ -0,0 +1,71 @@
+"""Codificação de chaves e otimização de tipos: códigos estáveis e valores preservados."""
+
+import numpy as np
+import pandas as pd
+
+from nucleo_w7m.tipos import LIMITE_CARDINALIDADE_CATEGORIA, CodificadorChaves, otimizar_tipos
+
+def test_codigos_voltam_aos_uuids_e_nao_mudam_entre_chamadas():
+    codificador = CodificadorChaves()
+    primeira = pd.Series(['a', 'b', None, 'a'], name='User ID', index=[10, 11, 12, 13])
+    segunda = pd.Series(['c', 'a', 'd', None, 'c'], name='User ID')
+
+    codigos_primeira = codificador.codificar(primeira)
+    codigos_segunda = codificador.codificar(segunda)
+
+    assert str(codigos_primeira.dtype) == 'Int32'
+    assert codigos_primeira.index.tolist() == [10, 11, 12, 13]
+    assert codigos_primeira.isna().tolist() == [False, False, True, False]
+    # UUIDs já vistos mantêm o código; os novos entram no fim do dicionário
+    assert codigos_segunda[1] == codigos_primeira[10]
+    assert codificador.codificar(primeira).equals(codigos_primeira)
+    assert len(codificador) == 4
+    pd.testing.assert_series_equal(codificador.decodificar(codigos_primeira), primeira, check_dtype=False)
+    pd.testing.assert_series_equal(codificador.decodificar(codigos_segunda), segunda, check_dtype=False)
+
+def test_codificar_tabela_compartilha_codigos_entre_colunas():
+    codificador = CodificadorChaves()
+    df = pd.DataFrame({'User ID': ['u1', 'u2'], 'Partner ID': ['p1', 'u1'], 'Nome': ['x', 'y']})
+
+    codificado = codificador.codificar_tabela(df)
+
+    assert codificado['Partner ID'][1] == codificado['User ID'][0]
+    assert codificado['Nome'].tolist() == ['x', 'y']
+    pd.testing.assert_frame_equal(codificador.decodificar_tabela(codificado), df, check_dtype=False)
+
+def test_otimizar_tipos_nao_muda_valores():
+    repetido = ['ouro', 'prata'] * 5
+    df = pd.DataFrame({
+        'Status': repetido,
+        'Username': [f'user{i}' for i in range(10)],
+        'Com nulo': ['a', None] * 5,
+        'Points': np.arange(10, dtype=np.int64) * 1_000,
+        'Price': np.arange(10) + 0.5,
+        'Inteiro em float': np.arange(10, dtype=np.float64),
+        'Float com nulo': [1.0, np.nan] * 5,
+        'Ativo': [True, False] * 5,
+    })
+
+    otimizado, memoria = otimizar_tipos(df)
+
+    for col in df.columns:
+        pd.testing.assert_series_equal(otimizado[col].astype(df[col].dtype), df[col])
+    assert isinstance(otimizado['Status'].dtype, pd.CategoricalDtype)
+    assert isinstance(otimizado['Com nulo'].dtype, pd.CategoricalDtype)
+    assert not isinstance(otimizado['Username'].dtype, pd.CategoricalDtype)
+    assert otimizado['Points'].dtype == np.int16
+    assert otimizado['Inteiro em float'].dtype == np.int8
+    assert otimizado['Price'].dtype == np.float64
+    assert otimizado['Float com nulo'].dtype == np.float64
+    assert otimizado['Ativo'].dtype == bool
+    assert memoria['depois'] < memoria['antes']
+
+def test_limite_de_cardinalidade_da_categoria():
+    # Quatro distintos em oito linhas: exatamente no limite de 0.5, vira category
+    no_limite = pd.DataFrame({'Tipo': list('abcdabcd')})
+    acima = pd.DataFrame({'Tipo': list('abcdeabc')})
+
+    assert LIMITE_CARDINALIDADE_CATEGORIA == 0.5
+    assert isinstance(otimizar_tipos(no_limite)[0]['Tipo'].dtype, pd.CategoricalDtype)
+    assert not isinstance(otimizar_tipos(acima)[0]['Tipo'].dtype, pd.CategoricalDtype)
+    assert isinstance(otimizar_tipos(acima, limite_cardinalidade=0.7)[0]['Tipo'].dtype, pd.CategoricalDtype)